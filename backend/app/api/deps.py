@@ -1,16 +1,33 @@
 """
 API Dependencies
 """
+import os
 from functools import lru_cache
+from typing import Optional
 from app.services.vision_engine import VisionEngine
 from app.services.geometry_calc import GeometryCalculator
 from app.services.llm_analyzer import LLMAnalyzer
+from app.services.scoring import RuleScoringEngine
+from app.services.enrichment import EnrichmentService
+from app.services.admission import AdmissionController
+from app.services.result_store import IdempotencyService
+from app.services.overlay import OverlayCache
+from app.services.live import LiveSessionManager
+from app.services.shared_cache import SharedCache
+from app.services.percentiles import PercentileIndex
+from app.core.config import settings
+
+
+@lru_cache()
+def get_shared_cache() -> Optional[SharedCache]:
+    """Get cached cross-worker SharedCache, or None when SHARED_CACHE is off"""
+    return SharedCache() if settings.shared_cache else None
 
 
 @lru_cache()
 def get_vision_engine() -> VisionEngine:
     """Get cached VisionEngine instance"""
-    return VisionEngine()
+    return VisionEngine(cache=get_shared_cache())
 
 
 @lru_cache()
@@ -19,7 +36,61 @@ def get_geometry_calculator() -> GeometryCalculator:
     return GeometryCalculator()
 
 
+@lru_cache()
+def get_percentile_index() -> Optional[PercentileIndex]:
+    """Get cached population PercentileIndex, or None when PERCENTILE_INDEX_PATH doesn't exist"""
+    if not os.path.isfile(settings.percentile_index_path):
+        return None
+    return PercentileIndex.load()
+
+
+@lru_cache()
+def get_scoring_engine() -> RuleScoringEngine:
+    """Get cached RuleScoringEngine instance"""
+    return RuleScoringEngine(percentile_index=get_percentile_index())
+
+
 @lru_cache()
 def get_llm_analyzer() -> LLMAnalyzer:
     """Get cached LLMAnalyzer instance"""
-    return LLMAnalyzer()
+    return LLMAnalyzer(
+        scoring_engine=get_scoring_engine(),
+        cache=get_shared_cache(),
+        percentile_index=get_percentile_index()
+    )
+
+
+@lru_cache()
+def get_enrichment_service() -> EnrichmentService:
+    """Get cached EnrichmentService instance"""
+    return EnrichmentService(llm_analyzer=get_llm_analyzer(), admission=get_llm_admission())
+
+
+@lru_cache()
+def get_vision_admission() -> AdmissionController:
+    """Get cached admission controller for the decode + FaceMesh stage"""
+    return AdmissionController("vision", slots=settings.vision_concurrency, initial_service_seconds=0.05)
+
+
+@lru_cache()
+def get_llm_admission() -> AdmissionController:
+    """Get cached admission controller for request-path LLM calls"""
+    return AdmissionController("llm", slots=settings.llm_concurrency, initial_service_seconds=2.0)
+
+
+@lru_cache()
+def get_idempotency_service() -> IdempotencyService:
+    """Get cached IdempotencyService; its SQLite result store opens on the first keyed request"""
+    return IdempotencyService()
+
+
+@lru_cache()
+def get_overlay_cache() -> OverlayCache:
+    """Get cached LRU of rendered landmark overlays"""
+    return OverlayCache(shared=get_shared_cache())
+
+
+@lru_cache()
+def get_live_sessions() -> LiveSessionManager:
+    """Get cached live-mode session manager"""
+    return LiveSessionManager()
@@ -0,0 +1,60 @@
+"""
+Client disconnect handling for long-running analysis endpoints
+"""
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+from app.core.metrics import ABANDONED_REQUESTS, route_key
+
+T = TypeVar("T")
+
+# HTTP status logged for requests the client abandoned (nginx convention)
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client goes away before the pipeline finishes"""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Block until the ASGI server reports that the client disconnected"""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """
+    Run `work` until it finishes or the client disconnects, whichever comes first
+    
+    On disconnect the work task is cancelled, which stops pending vision stages
+    and aborts in-flight LLM HTTP requests.
+    
+    Args:
+        request: Incoming request (its body must already be consumed)
+        work: Pipeline coroutine
+    
+    Returns:
+        The pipeline result
+    
+    Raises:
+        ClientDisconnected: If the client went away first
+    """
+    work_task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    
+    try:
+        await asyncio.wait({work_task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not work_task.done():
+            work_task.cancel()
+    
+    if work_task.cancelled() or not work_task.done():
+        ABANDONED_REQUESTS.inc(endpoint=route_key(request.scope))
+        raise ClientDisconnected(request.url.path)
+    
+    return work_task.result()
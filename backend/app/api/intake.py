@@ -0,0 +1,65 @@
+"""
+Request intake limits - reject oversized bodies before they are buffered and parsed
+"""
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestTooLarge(HTTPException):
+    """
+    Raised from the wrapped receive channel once the body passes the limit
+    
+    Subclassing HTTPException lets it pass through FastAPI's body parsing
+    (which turns other exceptions into 400s) and render as a 413.
+    """
+    
+    def __init__(self, max_body_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail={
+                "code": "PAYLOAD_TOO_LARGE",
+                "message": f"Request body exceeds the {max_body_bytes / (1024 * 1024):g} MB limit."
+            }
+        )
+
+
+class BodySizeLimitMiddleware:
+    """
+    Pure ASGI middleware enforcing a maximum request body size
+    
+    Requests announcing a larger Content-Length are rejected before a single
+    body byte is read; chunked uploads are cut off as soon as the running
+    total crosses the limit.
+    """
+    
+    def __init__(self, app: ASGIApp, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_body_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self.max_body_bytes:
+                error = RequestTooLarge(self.max_body_bytes)
+                response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                await response(scope, receive, send)
+                return
+        
+        received = 0
+        
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise RequestTooLarge(self.max_body_bytes)
+            return message
+        
+        await self.app(scope, limited_receive, send)
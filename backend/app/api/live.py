@@ -0,0 +1,215 @@
+"""
+Live mode WebSocket protocol
+Frames stream in, smoothed measurements stream out, and the LLM runs once
+when the user freezes a frame
+"""
+import asyncio
+import time
+from typing import Optional
+
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+from app.api.responses import dump_json
+from app.services.admission import AdmissionController, ServerOverloadedError, PRIORITY_QUICK
+from app.services.live import LiveSession
+from app.services.llm_analyzer import LLMAnalyzer
+from app.services.vision_engine import ImageTooLargeError
+
+
+class _LatestFrame:
+    """
+    Single-slot mailbox between the receiver and the frame processor.
+    A frame arriving while the previous one is still being processed
+    replaces the waiting one, so the session always works on the newest
+    frame and never builds a backlog (the client sees a lower frame rate
+    instead of growing latency).
+    """
+    
+    def __init__(self):
+        self.frame: Optional[tuple] = None
+        self.dropped = 0
+        self._ready = asyncio.Event()
+    
+    def put(self, image_bytes: bytes, timestamp: float) -> None:
+        if self.frame is not None:
+            self.dropped += 1
+        self.frame = (image_bytes, timestamp)
+        self._ready.set()
+    
+    async def take(self) -> tuple:
+        await self._ready.wait()
+        self._ready.clear()
+        frame, self.frame = self.frame, None
+        return frame
+
+
+class LiveConnection:
+    """
+    One client connection in live mode
+    
+    Client -> server:
+    - binary message: an encoded frame (JPEG recommended, ~640x480)
+    - {"type": "frame", "image": "<base64 or data URL>"}: same, as text
+    - {"type": "freeze"}: run the LLM analysis on the current measurements
+    - {"type": "resume"}: go back to streaming after a freeze
+    
+    Server -> client:
+    - {"type": "ready", "max_frame_side": ...}
+    - {"type": "measurements", "frame", "face_detected", "measurements", "processing_ms", "dropped"}
+    - {"type": "skipped", "reason": "server_busy", "dropped"}: frame not processed
+    - {"type": "frozen", "measurements"} then {"type": "analysis", "data"}
+    - {"type": "error", "code", "message"}
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session: LiveSession,
+        llm_analyzer: LLMAnalyzer,
+        vision_admission: AdmissionController,
+        llm_admission: AdmissionController
+    ):
+        self.websocket = websocket
+        self.session = session
+        self.llm_analyzer = llm_analyzer
+        self.vision_admission = vision_admission
+        self.llm_admission = llm_admission
+        self.mailbox = _LatestFrame()
+        self.frozen = False
+        self._send_lock = asyncio.Lock()
+        self._analysis: Optional[asyncio.Task] = None
+    
+    async def send(self, payload: dict) -> None:
+        text = dump_json(payload).decode()
+        async with self._send_lock:
+            await self.websocket.send_text(text)
+    
+    async def error(self, code: str, message: str) -> None:
+        await self.send({"type": "error", "code": code, "message": message})
+    
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects"""
+        await self.send({"type": "ready", "max_frame_side": self.session.max_frame_side})
+        processor = asyncio.create_task(self._process_frames())
+        try:
+            await self._receive()
+        finally:
+            processor.cancel()
+            if self._analysis is not None:
+                self._analysis.cancel()
+            await asyncio.gather(processor, return_exceptions=True)
+    
+    async def _receive(self) -> None:
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            
+            if message.get("bytes") is not None:
+                if not self.frozen:
+                    self.mailbox.put(message["bytes"], time.perf_counter())
+                continue
+            
+            try:
+                command = orjson.loads(message.get("text") or "")
+                kind = command.get("type")
+            except (orjson.JSONDecodeError, AttributeError):
+                await self.error("INVALID_MESSAGE", "Text messages must be JSON objects with a 'type'.")
+                continue
+            
+            if kind == "frame":
+                if self.frozen:
+                    continue
+                try:
+                    image_bytes = await run_in_threadpool(
+                        self.session.vision_engine.decode_base64_bytes, str(command.get("image", ""))
+                    )
+                except Exception as e:
+                    await self.error("INVALID_FRAME", str(e))
+                    continue
+                self.mailbox.put(image_bytes, time.perf_counter())
+            elif kind == "freeze":
+                await self._freeze()
+            elif kind == "resume":
+                self.frozen = False
+            else:
+                await self.error("INVALID_MESSAGE", f"Unknown message type: {kind!r}.")
+    
+    async def _process_frames(self) -> None:
+        while True:
+            image_bytes, timestamp = await self.mailbox.take()
+            if self.frozen:
+                continue
+            
+            if not self.vision_admission.idle:
+                # Frames share the vision slots with requests but never queue
+                # for one: a stale frame is worth less than the next one, and
+                # waiting requests go first
+                self.mailbox.dropped += 1
+                await self.send({"type": "skipped", "reason": "server_busy", "dropped": self.mailbox.dropped})
+                continue
+            
+            start = time.perf_counter()
+            try:
+                # The stage is idle, so this takes a free slot without waiting
+                async with self.vision_admission.admit(PRIORITY_QUICK):
+                    measurements = await run_in_threadpool(self.session.process_frame, image_bytes, timestamp)
+            except ImageTooLargeError as e:
+                await self.error("IMAGE_TOO_LARGE", str(e))
+                continue
+            except Exception as e:
+                await self.error("INVALID_FRAME", f"Could not process frame: {e}")
+                continue
+            
+            if self.frozen:
+                # Froze while this frame was in flight; keep the frozen values
+                continue
+            await self.send({
+                "type": "measurements",
+                "frame": self.session.frames,
+                "face_detected": measurements is not None,
+                "measurements": measurements,
+                "processing_ms": round((time.perf_counter() - start) * 1000, 1),
+                "dropped": self.mailbox.dropped,
+            })
+    
+    async def _freeze(self) -> None:
+        measurements = self.session.measurements
+        if measurements is None:
+            await self.error("FACE_NOT_DETECTED", "No face is being tracked; nothing to freeze.")
+            return
+        if self.frozen:
+            # One LLM call per freeze; resume first to analyze a new frame
+            return
+        
+        self.frozen = True
+        await self.send({"type": "frozen", "measurements": measurements})
+        self._analysis = asyncio.create_task(self._analyze(measurements))
+    
+    async def _analyze(self, measurements) -> None:
+        try:
+            async with self.llm_admission.admit(PRIORITY_QUICK):
+                result = await self.llm_analyzer.analyze_async(measurements)
+        except ServerOverloadedError as e:
+            await self.error("SERVER_BUSY", f"The server is busy. Please retry in {e.retry_after}s.")
+            return
+        except Exception as e:
+            await self.error("ANALYSIS_ERROR", f"An error occurred during analysis: {e}")
+            return
+        await self.send({"type": "analysis", "data": result})
+
+
+async def serve_live_session(
+    websocket: WebSocket,
+    session: LiveSession,
+    llm_analyzer: LLMAnalyzer,
+    vision_admission: AdmissionController,
+    llm_admission: AdmissionController
+) -> None:
+    """Run the live protocol on an accepted WebSocket"""
+    try:
+        await LiveConnection(websocket, session, llm_analyzer, vision_admission, llm_admission).run()
+    except WebSocketDisconnect:
+        pass
@@ -0,0 +1,115 @@
+"""
+Response classes (orjson JSON, msgpack) and Accept header negotiation
+"""
+from typing import Any, Optional, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # Optional: pip install msgpack
+    msgpack = None
+
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    Serialize types orjson does not know natively
+    
+    Pydantic models are rendered by pydantic-core straight to JSON bytes and
+    embedded as a Fragment, so no intermediate dict is built.
+    """
+    if isinstance(obj, BaseModel):
+        return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj))
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson
+    
+    Routes can return one of these directly (content may contain pydantic
+    models, datetimes, enums and NumPy arrays) to skip FastAPI's
+    response_model re-validation and jsonable_encoder pass.
+    """
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def dump_json(content: Any) -> bytes:
+    """orjson with the same options as ORJSONResponse (also used for WebSocket messages)"""
+    return orjson.dumps(
+        content,
+        default=_orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+class MsgPackResponse(Response):
+    """
+    Response rendered with msgpack (optional dependency)
+    
+    bytes values are packed as msgpack bin, so NumPy buffers pass through
+    without per-element encoding.
+    """
+    media_type = "application/msgpack"
+    
+    def render(self, content: Any) -> bytes:
+        if msgpack is None:
+            raise ImportError("msgpack package not installed. Run: pip install msgpack")
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def negotiate(accept: Optional[str], offered: Sequence[str]) -> Optional[str]:
+    """
+    Pick the best of `offered` media types for an Accept header
+    
+    Honors q-values and type/* and */* wildcards. On ties the earlier entry in
+    `offered` wins, so list the default first.
+    
+    Args:
+        accept: Raw Accept header (missing means anything is acceptable)
+        offered: Media types the endpoint can produce
+    
+    Returns:
+        The chosen media type, or None if nothing offered is acceptable
+    """
+    if not accept:
+        return offered[0] if offered else None
+    
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = part.strip().split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.strip().lower(), quality))
+    
+    best, best_quality = None, 0.0
+    for media_type in offered:
+        main_type = media_type.split("/")[0]
+        # The most specific matching range decides the quality
+        quality, specificity = 0.0, -1
+        for media_range, range_quality in ranges:
+            if media_range == media_type:
+                match = 2
+            elif media_range == f"{main_type}/*":
+                match = 1
+            elif media_range == "*/*":
+                match = 0
+            else:
+                continue
+            if match > specificity:
+                quality, specificity = range_quality, match
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
@@ -1,21 +1,81 @@
 """
 API Routes for Project Adam
 """
-from fastapi import APIRouter, HTTPException, Depends
+import os
+from contextlib import contextmanager
+
+import anyio
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response, WebSocket, status
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
+from typing import Awaitable, Callable, Iterator, Optional, Union
 
 from app.models.schemas import (
     ImageInput,
     QuickAnalysisInput,
     AnalysisResponse,
+    DeferredAnalysisResponse,
+    EnrichmentResponse,
+    EnrichmentStatus,
     HealthResponse,
+    LandmarksInput,
+    LandmarksResponse,
+    GroupAnalysisInput,
+    GroupAnalysisResponse,
+    FaceAnalysis,
+    GeometricMeasurements,
     ErrorResponse,
     ErrorDetail
 )
-from app.services.vision_engine import VisionEngine
+from app.services.vision_engine import VisionEngine, ImageTooLargeError
+from app.services.quality import ImageQualityError
 from app.services.geometry_calc import GeometryCalculator
 from app.services.llm_analyzer import LLMAnalyzer
-from app.api.deps import get_vision_engine, get_geometry_calculator, get_llm_analyzer
+from app.services.scoring import RuleScoringEngine
+from app.services.enrichment import EnrichmentService
+from app.services.shared_cache import SharedCache
+from app.services.admission import (
+    AdmissionController,
+    ServerOverloadedError,
+    PRIORITY_QUICK,
+    PRIORITY_ANALYZE,
+    PRIORITY_COMPARE,
+)
+from app.services.overlay import (
+    OverlayCache,
+    OVERLAY_MEDIA_TYPES,
+    encode_overlay,
+    overlay_id,
+    render_overlay,
+)
+from app.services.live import LiveSessionManager
+from app.services import llm_clients
+from app.services.result_store import (
+    IdempotencyService,
+    IdempotencyConflictError,
+    request_fingerprint,
+)
+from app.core.config import settings
+from app.core.memory import memory_stats
+from app.core.metrics import FACE_NOT_DETECTED, record_cache, stage
+from app.core.readiness import readiness
+from app.api.responses import MsgPackResponse, ORJSONResponse, msgpack, negotiate
+from app.api.disconnect import cancel_on_disconnect, ClientDisconnected
+from app.api.live import serve_live_session
+from app.api.deps import (
+    get_vision_engine,
+    get_geometry_calculator,
+    get_llm_analyzer,
+    get_scoring_engine,
+    get_enrichment_service,
+    get_vision_admission,
+    get_llm_admission,
+    get_idempotency_service,
+    get_overlay_cache,
+    get_live_sessions,
+    get_shared_cache,
+    get_percentile_index,
+)
 
 router = APIRouter()
 
@@ -23,30 +83,278 @@ router = APIRouter()
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
-    Health check endpoint
+    Health check endpoint (liveness: always 200 while the process serves)
+    
+    Use `/ready` to decide whether to route traffic to this worker.
     """
+    llm_pool = llm_clients.pool_stats()
     return HealthResponse(
         status="healthy",
         version="1.0.0",
         services={
-            "mediapipe": "ok",
-            "llm": "ok"
-        }
+            "mediapipe": "ok" if get_vision_engine.cache_info().currsize else "not_loaded",
+            "llm": "ok" if llm_pool["api_key_configured"] else "not_configured",
+            "percentiles": "ok" if get_percentile_index() is not None else "not_configured"
+        },
+        memory=memory_stats.snapshot()
+    )
+
+
+@router.get("/ready")
+async def readiness_check(
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission),
+    enrichment: EnrichmentService = Depends(get_enrichment_service),
+    live_sessions: LiveSessionManager = Depends(get_live_sessions),
+    shared_cache: Optional[SharedCache] = Depends(get_shared_cache)
+):
+    """
+    Readiness probe for load balancers and container health checks
+    
+    200 once this worker has built the vision engine, run a warm-up
+    inference and opened its LLM connection (skipped with
+    PRELOAD_MODELS=false); 503 while starting or shutting down. The body reports warm-up timings and pool sizes either way.
+    """
+    thread_limiter = anyio.to_thread.current_default_thread_limiter()
+    shared_cache_stats = await run_in_threadpool(shared_cache.stats) if shared_cache is not None else None
+    return ORJSONResponse(
+        {
+            "ready": readiness.is_ready,
+            **readiness.snapshot(),
+            "pid": os.getpid(),
+            "pools": {
+                "vision_admission": vision_admission.stats(),
+                "llm_admission": llm_admission.stats(),
+                "llm_client": llm_clients.pool_stats(),
+                "enrichment": enrichment.stats(),
+                "live_sessions": live_sessions.stats(),
+                "shared_cache": shared_cache_stats,
+                # Only once built: the probe must not load the vision stack
+                "vision_engine": get_vision_engine().stats() if get_vision_engine.cache_info().currsize else None,
+                "threadpool": {
+                    "size": int(thread_limiter.total_tokens),
+                    "busy": thread_limiter.borrowed_tokens,
+                },
+            },
+        },
+        status_code=200 if readiness.is_ready else 503
     )
 
 
-@router.post("/analyze", response_model=AnalysisResponse)
+DEFER_LLM_QUERY = Query(
+    False,
+    description="Return the rule-based result immediately and run the LLM analysis in the background"
+)
+
+
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=255,
+    description="Client-generated key; retries with the same key replay the first result instead of re-running the analysis"
+)
+
+
+@contextmanager
+def _api_errors(code: str, action: str) -> Iterator[None]:
+    """
+    Map pipeline exceptions to the API's error responses
+    
+    HTTPException and client disconnects pass through unchanged; anything
+    unexpected becomes a 500.
+    
+    Args:
+        code: Error code of the 500 response
+        action: What failed, completing "An error occurred ..."
+    """
+    try:
+        yield
+    except (HTTPException, ClientDisconnected):
+        raise
+    except IdempotencyConflictError:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "IDEMPOTENCY_KEY_REUSED",
+                "message": "This Idempotency-Key was already used for a different request."
+            }
+        )
+    except ServerOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "code": "SERVER_BUSY",
+                "message": "The server is busy. Please retry shortly."
+            },
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "code": "IMAGE_TOO_LARGE",
+                "message": str(e)
+            }
+        )
+    except ImageQualityError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": e.code,
+                "message": str(e)
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "code": code,
+                "message": f"An error occurred {action}: {str(e)}"
+            }
+        )
+
+
+async def _respond(
+    request: Request,
+    idempotency_key: Optional[str],
+    idempotency: IdempotencyService,
+    make_work: Callable[[], Awaitable[Response]]
+) -> Response:
+    """
+    Run the pipeline for this request, cancelling it if the client disconnects
+    
+    With an Idempotency-Key the pipeline runs at most once per key: the
+    response is replayed on retry, and retries arriving mid-flight attach to
+    the running pipeline (which then survives the original client dropping).
+    """
+    if not idempotency_key:
+        return await cancel_on_disconnect(request, make_work())
+    
+    fingerprint = await request_fingerprint(request)
+    return await cancel_on_disconnect(
+        request,
+        idempotency.run(idempotency_key, fingerprint, make_work)
+    )
+
+
+async def _deferred_response(
+    measurements,
+    scoring_engine: RuleScoringEngine,
+    enrichment: EnrichmentService
+) -> ORJSONResponse:
+    """Answer with the instant rule-based result and queue the LLM enrichment"""
+    job = await enrichment.submit(measurements)
+    return ORJSONResponse(DeferredAnalysisResponse.model_construct(
+        success=True,
+        data=scoring_engine.analyze(measurements),
+        enrichment_id=job.id,
+        status=job.status,
+        timestamp=datetime.utcnow()
+    ))
+
+
+async def _measure_face(
+    front_image: str,
+    side_image: Optional[str],
+    not_detected_message: str,
+    profile: str,
+    priority: int,
+    vision_engine: VisionEngine,
+    geometry_calc: GeometryCalculator,
+    vision_admission: AdmissionController
+) -> GeometricMeasurements:
+    """Landmarks (admitted to the vision stage) -> measurements"""
+    async with vision_admission.admit(priority):
+        landmark_data = await vision_engine.extract_landmarks_from_base64_async(
+            front_image_base64=front_image,
+            side_image_base64=side_image,
+            profile=profile
+        )
+    
+    if not landmark_data.face_detected:
+        FACE_NOT_DETECTED.inc()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "FACE_NOT_DETECTED",
+                "message": not_detected_message
+            }
+        )
+    
+    with stage("geometry"):
+        return geometry_calc.calculate_all_measurements(
+            front_landmarks=landmark_data.front_landmarks,
+            side_landmarks=landmark_data.side_landmarks
+        )
+
+
+async def _run_analysis(
+    front_image: str,
+    side_image: Optional[str],
+    not_detected_message: str,
+    profile: str,
+    defer_llm: bool,
+    vision_engine: VisionEngine,
+    geometry_calc: GeometryCalculator,
+    llm_analyzer: LLMAnalyzer,
+    scoring_engine: RuleScoringEngine,
+    enrichment: EnrichmentService,
+    priority: int,
+    vision_admission: AdmissionController,
+    llm_admission: AdmissionController
+) -> ORJSONResponse:
+    """
+    Shared analysis pipeline: landmarks -> measurements -> LLM (or deferred)
+    
+    Every stage is awaited, so cancelling the task stops the remaining work.
+    Each stage is admitted separately; an overloaded LLM stage is detected
+    before any CPU is spent on the image.
+    """
+    if not defer_llm:
+        llm_admission.check(priority)
+    
+    # Steps 1-2: Extract landmarks, calculate geometric measurements
+    measurements = await _measure_face(
+        front_image, side_image, not_detected_message, profile, priority,
+        vision_engine, geometry_calc, vision_admission
+    )
+    
+    if defer_llm:
+        return await _deferred_response(measurements, scoring_engine, enrichment)
+    
+    # Step 3: Get LLM analysis
+    async with llm_admission.admit(priority):
+        analysis_result = await llm_analyzer.analyze_async(measurements)
+    
+    # Step 4: Return response (internally produced, skip re-validation)
+    return ORJSONResponse(AnalysisResponse.model_construct(
+        success=True,
+        data=analysis_result,
+        timestamp=datetime.utcnow()
+    ))
+
+
+@router.post("/analyze", response_model=Union[AnalysisResponse, DeferredAnalysisResponse])
 async def analyze_face(
+    request: Request,
     input_data: ImageInput,
+    defer_llm: bool = DEFER_LLM_QUERY,
     vision_engine: VisionEngine = Depends(get_vision_engine),
     geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
-    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer)
+    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer),
+    scoring_engine: RuleScoringEngine = Depends(get_scoring_engine),
+    enrichment: EnrichmentService = Depends(get_enrichment_service),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
 ):
     """
     Analyze facial aesthetics from front and side images
     
     - **front_image**: Base64 encoded front-facing image
     - **side_image**: Base64 encoded side profile image
+    - **defer_llm**: Return the rule-based result now; poll `/results/{enrichment_id}` for the LLM analysis
     
     Returns detailed analysis including:
     - Overall score (1-10)
@@ -54,104 +362,398 @@ async def analyze_face(
     - Geometric measurements
     - AI-generated analysis and recommendations
     """
-    try:
-        # Step 1: Extract landmarks from images
-        landmark_data = vision_engine.extract_landmarks_from_base64(
-            front_image_base64=input_data.front_image,
-            side_image_base64=input_data.side_image
-        )
+    with _api_errors("ANALYSIS_ERROR", "during analysis"):
+        return await _respond(request, idempotency_key, idempotency, lambda: _run_analysis(
+            front_image=input_data.front_image,
+            side_image=input_data.side_image,
+            not_detected_message="Could not detect a face in the front image. Please ensure your face is clearly visible and well-lit.",
+            profile=settings.analyze_profile,
+            defer_llm=defer_llm,
+            vision_engine=vision_engine,
+            geometry_calc=geometry_calc,
+            llm_analyzer=llm_analyzer,
+            scoring_engine=scoring_engine,
+            enrichment=enrichment,
+            priority=PRIORITY_ANALYZE,
+            vision_admission=vision_admission,
+            llm_admission=llm_admission
+        ))
+
+
+@router.post("/analyze/quick", response_model=Union[AnalysisResponse, DeferredAnalysisResponse])
+async def quick_analyze(
+    request: Request,
+    input_data: QuickAnalysisInput,
+    defer_llm: bool = DEFER_LLM_QUERY,
+    vision_engine: VisionEngine = Depends(get_vision_engine),
+    geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
+    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer),
+    scoring_engine: RuleScoringEngine = Depends(get_scoring_engine),
+    enrichment: EnrichmentService = Depends(get_enrichment_service),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
+):
+    """
+    Quick analysis using only front-facing image
+    
+    Note: Some measurements (gonial angle, nasofrontal angle) will be estimated
+    since side profile is not provided.
+    """
+    with _api_errors("ANALYSIS_ERROR", "during analysis"):
+        # Front image only (side_landmarks will be None)
+        return await _respond(request, idempotency_key, idempotency, lambda: _run_analysis(
+            front_image=input_data.front_image,
+            side_image=None,
+            not_detected_message="Could not detect a face in the image.",
+            profile=settings.quick_profile,
+            defer_llm=defer_llm,
+            vision_engine=vision_engine,
+            geometry_calc=geometry_calc,
+            llm_analyzer=llm_analyzer,
+            scoring_engine=scoring_engine,
+            enrichment=enrichment,
+            priority=PRIORITY_QUICK,
+            vision_admission=vision_admission,
+            llm_admission=llm_admission
+        ))
+
+
+@router.post("/analyze/group", response_model=GroupAnalysisResponse)
+async def analyze_group(
+    request: Request,
+    input_data: GroupAnalysisInput,
+    vision_engine: VisionEngine = Depends(get_vision_engine),
+    geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
+    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER
+):
+    """
+    Analyze every face of a group photo in one request
+    
+    The photo is decoded and searched once, measurements for all faces are
+    computed as one batch and the per-face LLM analyses run concurrently.
+    Faces come back left to right, each with its normalized box. Like
+    /analyze/quick, angles are estimated from the front view.
+    """
+    max_faces = min(input_data.max_faces or settings.group_max_faces, settings.group_max_faces)
+    
+    async def run_group():
+        llm_admission.check(PRIORITY_ANALYZE)
         
-        if not landmark_data.face_detected:
+        # Step 1: Find and mesh every face
+        async with vision_admission.admit(PRIORITY_ANALYZE):
+            faces = await vision_engine.extract_faces_from_base64_async(input_data.image, max_faces)
+        
+        if not len(faces):
+            FACE_NOT_DETECTED.inc()
             raise HTTPException(
                 status_code=400,
                 detail={
                     "code": "FACE_NOT_DETECTED",
-                    "message": "Could not detect a face in the front image. Please ensure your face is clearly visible and well-lit."
+                    "message": "Could not detect any face in the photo."
                 }
             )
         
-        # Step 2: Calculate geometric measurements
-        measurements = geometry_calc.calculate_all_measurements(
-            front_landmarks=landmark_data.front_landmarks,
-            side_landmarks=landmark_data.side_landmarks
-        )
+        # Step 2: Measurements for the whole (F, N, 3) batch
+        with stage("geometry"):
+            measurements = geometry_calc.calculate_batch_measurements(faces)
+            points = faces[:, :, :2].astype(float)
+            corners = zip(points.min(axis=1).round(4).tolist(), points.max(axis=1).round(4).tolist())
+            boxes = [[*low, *high] for low, high in corners]
         
-        # Step 3: Get LLM analysis
-        analysis_result = llm_analyzer.analyze(measurements)
+        # Step 3: One LLM call per face, concurrently, each admitted on its
+        # own; cancelling the gather cancels every pending provider request
+        results = await llm_admission.gather(
+            PRIORITY_ANALYZE, (llm_analyzer.analyze_async(m) for m in measurements)
+        )
         
-        # Step 4: Return response
-        return AnalysisResponse(
+        return ORJSONResponse(GroupAnalysisResponse.model_construct(
             success=True,
-            data=analysis_result,
+            face_count=len(results),
+            faces=[
+                FaceAnalysis.model_construct(index=i, box=boxes[i], data=result)
+                for i, result in enumerate(results)
+            ],
             timestamp=datetime.utcnow()
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+        ))
+    
+    with _api_errors("ANALYSIS_ERROR", "during analysis"):
+        return await _respond(request, idempotency_key, idempotency, run_group)
+
+
+@router.get("/results/{enrichment_id}", response_model=EnrichmentResponse)
+async def get_enrichment_result(
+    enrichment_id: str,
+    wait: float = Query(
+        0.0,
+        ge=0.0,
+        description="Seconds to long-poll for completion (capped by ENRICHMENT_MAX_WAIT_SECONDS)"
+    ),
+    enrichment: EnrichmentService = Depends(get_enrichment_service)
+):
+    """
+    Fetch the LLM analysis for a deferred `/analyze?defer_llm=true` request
+    
+    Poll until `status` is `completed` or `failed`, or pass `wait` to long-poll.
+    """
+    job = await enrichment.wait(
+        enrichment_id,
+        timeout=min(wait, settings.enrichment_max_wait_seconds)
+    )
+    
+    record_cache("enrichment", hit=job is not None)
+    if job is None:
         raise HTTPException(
-            status_code=500,
+            status_code=404,
             detail={
-                "code": "ANALYSIS_ERROR",
-                "message": f"An error occurred during analysis: {str(e)}"
+                "code": "RESULT_NOT_FOUND",
+                "message": "Unknown or expired enrichment id."
             }
         )
+    
+    return ORJSONResponse(EnrichmentResponse.model_construct(
+        success=job.status != EnrichmentStatus.FAILED,
+        enrichment_id=job.id,
+        status=job.status,
+        data=job.result,
+        error=job.error,
+        timestamp=datetime.utcnow()
+    ))
 
 
-@router.post("/analyze/quick", response_model=AnalysisResponse)
-async def quick_analyze(
-    input_data: QuickAnalysisInput,
+# Media types /landmarks can produce; the first is the default
+LANDMARK_MEDIA_TYPES = ["application/json", "application/octet-stream"]
+if msgpack is not None:
+    LANDMARK_MEDIA_TYPES += ["application/msgpack", "application/x-msgpack"]
+
+LANDMARK_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+@router.post(
+    "/landmarks",
+    response_model=LandmarksResponse,
+    responses={200: {"content": {
+        "application/octet-stream": {},
+        "application/msgpack": {},
+    }}}
+)
+async def extract_landmarks(
+    input_data: LandmarksInput,
+    accept: Optional[str] = Header(None),
+    dtype: str = Query(
+        "float32",
+        pattern="^(float32|float16)$",
+        description="Precision of binary formats (float16 halves the size, ~0.0005 resolution)"
+    ),
     vision_engine: VisionEngine = Depends(get_vision_engine),
-    geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
-    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer)
+    vision_admission: AdmissionController = Depends(get_vision_admission)
 ):
     """
-    Quick analysis using only front-facing image
+    Raw 478-point Face Mesh only: no measurements, no LLM call
     
-    Note: Some measurements (gonial angle, nasofrontal angle) will be estimated
-    since side profile is not provided.
+    The format follows the `Accept` header:
+    - `application/json` (default): `landmarks` as `[[x, y, z], ...]`
+    - `application/octet-stream`: 478 x 3 little-endian floats (`dtype`), row-major;
+      shape, dtype and image size are in the `X-Landmarks-*` headers
+    - `application/msgpack`: map with `shape`, `dtype`, `image_width`,
+      `image_height` and the same buffer as `data` (requires msgpack on the server)
+    
+    Coordinates are normalized: x and y in 0-1 of the image width/height,
+    z relative depth on roughly the same scale as x.
     """
-    try:
-        # Extract landmarks from front image only
-        landmark_data = vision_engine.extract_landmarks_from_base64(
-            front_image_base64=input_data.front_image,
-            side_image_base64=None
+    media_type = negotiate(accept, LANDMARK_MEDIA_TYPES)
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail={
+                "code": "NOT_ACCEPTABLE",
+                "message": f"Supported formats: {', '.join(LANDMARK_MEDIA_TYPES)}."
+            }
         )
-        
-        if not landmark_data.face_detected:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "code": "FACE_NOT_DETECTED",
-                    "message": "Could not detect a face in the image."
-                }
-            )
-        
-        # Calculate measurements (side_landmarks will be None)
-        measurements = geometry_calc.calculate_all_measurements(
-            front_landmarks=landmark_data.front_landmarks,
-            side_landmarks=None
+    
+    with _api_errors("ANALYSIS_ERROR", "during landmark extraction"):
+        async with vision_admission.admit(PRIORITY_QUICK):
+            landmarks, (width, height) = await vision_engine.extract_landmark_array_async(input_data.image)
+    
+    if landmarks is None:
+        FACE_NOT_DETECTED.inc()
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "FACE_NOT_DETECTED",
+                "message": "Could not detect a face in the image."
+            }
         )
+    
+    headers = {"Vary": "Accept"}
+    if media_type == "application/json":
+        return ORJSONResponse({
+            "success": True,
+            "landmark_count": len(landmarks),
+            "image_width": width,
+            "image_height": height,
+            "landmarks": landmarks
+        }, headers=headers)
+    
+    data = landmarks.astype(LANDMARK_DTYPES[dtype], copy=False).tobytes()
+    if media_type == "application/octet-stream":
+        headers.update({
+            "X-Landmarks-Shape": ",".join(map(str, landmarks.shape)),
+            "X-Landmarks-Dtype": f"{dtype}-le",
+            "X-Image-Size": f"{width}x{height}",
+        })
+        return Response(content=data, media_type=media_type, headers=headers)
+    
+    return MsgPackResponse({
+        "shape": list(landmarks.shape),
+        "dtype": f"{dtype}-le",
+        "image_width": width,
+        "image_height": height,
+        "data": data
+    }, media_type=media_type, headers=headers)
+
+
+OVERLAY_CACHE_CONTROL = "public, max-age=86400, immutable"
+
+
+def _overlay_response(request: Request, key: str, fmt: str, data: bytes) -> Response:
+    return Response(
+        content=data,
+        media_type=OVERLAY_MEDIA_TYPES[fmt],
+        headers={
+            "ETag": f'"{key}"',
+            "Cache-Control": OVERLAY_CACHE_CONTROL,
+            "X-Overlay-Id": key,
+            "Location": str(request.url_for("get_landmark_overlay", overlay_id=key)),
+        }
+    )
+
+
+@router.post(
+    "/overlay",
+    response_class=Response,
+    responses={200: {"content": {"image/jpeg": {}, "image/png": {}}}}
+)
+async def render_landmark_overlay(
+    request: Request,
+    input_data: LandmarksInput,
+    format: str = Query("jpeg", pattern="^(jpeg|png)$", description="Output image format"),
+    points: bool = Query(True, description="Draw all 478 landmarks"),
+    mesh: bool = Query(True, description="Draw the Face Mesh tessellation"),
+    measurements: bool = Query(True, description="Draw the lines behind the geometric measurements"),
+    vision_engine: VisionEngine = Depends(get_vision_engine),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    overlay_cache: OverlayCache = Depends(get_overlay_cache)
+):
+    """
+    Annotated image: landmarks, tessellation and measurement lines
+    
+    Overlays are cached by image hash + options. The response carries the
+    overlay id (`X-Overlay-Id`, `Location`); share pages can then load
+    `GET /overlay/{overlay_id}` without redrawing.
+    """
+    with _api_errors("ANALYSIS_ERROR", "while rendering the overlay"):
+        image_bytes = await run_in_threadpool(vision_engine.decode_base64_bytes, input_data.image)
+        key = overlay_id(image_bytes, format, points, mesh, measurements)
         
-        # Get LLM analysis
-        analysis_result = llm_analyzer.analyze(measurements)
+        cached = await run_in_threadpool(overlay_cache.get, key)
+        if cached is not None:
+            return _overlay_response(request, key, *cached)
         
-        return AnalysisResponse(
-            success=True,
-            data=analysis_result,
-            timestamp=datetime.utcnow()
-        )
+        async with vision_admission.admit(PRIORITY_QUICK):
+            with stage("decode"):
+                image = await run_in_threadpool(vision_engine.decode_image_bytes, image_bytes)
+            del image_bytes
+            landmarks = await run_in_threadpool(vision_engine.process_image_array, image)
+            if landmarks is None:
+                FACE_NOT_DETECTED.inc()
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "code": "FACE_NOT_DETECTED",
+                        "message": "Could not detect a face in the image."
+                    }
+                )
+            
+            def draw() -> bytes:
+                with stage("overlay"):
+                    return encode_overlay(render_overlay(image, landmarks, points, mesh, measurements), format)
+            
+            data = await run_in_threadpool(draw)
         
-    except HTTPException:
-        raise
-    except Exception as e:
+        await run_in_threadpool(overlay_cache.put, key, format, data)
+        return _overlay_response(request, key, format, data)
+
+
+@router.get(
+    "/overlay/{overlay_id}",
+    response_class=Response,
+    responses={200: {"content": {"image/jpeg": {}, "image/png": {}}}}
+)
+async def get_landmark_overlay(
+    request: Request,
+    overlay_id: str,
+    if_none_match: Optional[str] = Header(None),
+    overlay_cache: OverlayCache = Depends(get_overlay_cache)
+):
+    """
+    Fetch a previously rendered overlay by id
+    
+    Returns 404 once the overlay has been evicted; POST the image to
+    `/overlay` again to re-render it (the id stays the same).
+    """
+    if if_none_match and f'"{overlay_id}"' in if_none_match:
+        return Response(
+            status_code=304,
+            headers={"ETag": f'"{overlay_id}"', "Cache-Control": OVERLAY_CACHE_CONTROL}
+        )
+    
+    cached = await run_in_threadpool(overlay_cache.get, overlay_id)
+    if cached is None:
         raise HTTPException(
-            status_code=500,
+            status_code=404,
             detail={
-                "code": "ANALYSIS_ERROR",
-                "message": f"An error occurred during analysis: {str(e)}"
+                "code": "OVERLAY_NOT_FOUND",
+                "message": "Unknown or expired overlay id."
             }
         )
+    return _overlay_response(request, overlay_id, *cached)
+
+
+@router.websocket("/live")
+async def live_analysis(
+    websocket: WebSocket,
+    vision_engine: VisionEngine = Depends(get_vision_engine),
+    geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
+    live_sessions: LiveSessionManager = Depends(get_live_sessions),
+    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission)
+):
+    """
+    Live camera mode
+    
+    Stream frames (binary JPEG messages) and receive smoothed measurements
+    for each processed frame; send `{"type": "freeze"}` to get the LLM
+    analysis of the current frame. Frames only run on a free vision slot
+    and are skipped otherwise. See app.api.live for the protocol.
+    """
+    # Building a FaceMesh graph takes tens of ms; keep it off the event loop
+    session = await run_in_threadpool(live_sessions.open, vision_engine, geometry_calc)
+    if session is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many live sessions")
+        return
+    
+    try:
+        await websocket.accept()
+        await serve_live_session(websocket, session, llm_analyzer, vision_admission, llm_admission)
+    finally:
+        await run_in_threadpool(live_sessions.close, session)
 
 
 @router.get("/landmarks-info")
@@ -212,52 +814,39 @@ async def get_available_models():
 
 @router.post("/analyze/compare")
 async def compare_models(
+    request: Request,
     input_data: "MultiModelInput",
     vision_engine: VisionEngine = Depends(get_vision_engine),
     geometry_calc: GeometryCalculator = Depends(get_geometry_calculator),
+    vision_admission: AdmissionController = Depends(get_vision_admission),
+    llm_admission: AdmissionController = Depends(get_llm_admission),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    llm_analyzer: LLMAnalyzer = Depends(get_llm_analyzer),
 ):
     """
     Compare analysis results from all 4 Gemini models
     
     Returns results from each model for side-by-side comparison.
     """
-    import asyncio
-    from concurrent.futures import ThreadPoolExecutor
+    import time
     from app.models.schemas import GeminiModel, MultiModelInput
     from app.core.prompts import AESTHETIC_EXPERT_PROMPT, format_analysis_prompt
-    import google.generativeai as genai
-    from app.core.config import settings
     
-    try:
-        # Step 1: Extract landmarks
-        landmark_data = vision_engine.extract_landmarks_from_base64(
-            front_image_base64=input_data.front_image,
-            side_image_base64=input_data.side_image
-        )
-        
-        if not landmark_data.face_detected:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "code": "FACE_NOT_DETECTED",
-                    "message": "Could not detect a face in the image."
-                }
-            )
+    async def run_comparison():
+        llm_admission.check(PRIORITY_COMPARE)
         
-        # Step 2: Calculate measurements (same for all models)
-        measurements = geometry_calc.calculate_all_measurements(
-            front_landmarks=landmark_data.front_landmarks,
-            side_landmarks=landmark_data.side_landmarks
+        # Steps 1-2: Extract landmarks, calculate measurements (same for all models)
+        measurements = await _measure_face(
+            input_data.front_image, input_data.side_image, "Could not detect a face in the image.",
+            settings.analyze_profile, PRIORITY_COMPARE, vision_engine, geometry_calc, vision_admission
         )
         
         # Step 3: Prepare prompt
         user_prompt = format_analysis_prompt(measurements.model_dump())
         full_prompt = f"{AESTHETIC_EXPERT_PROMPT}\n\n{user_prompt}"
         
-        # Step 4: Configure Gemini
-        genai.configure(api_key=settings.google_api_key)
-        
-        # Step 5: Run all models in parallel
+        # Step 4: Run all models concurrently (shared, pooled clients)
         models = [
             GeminiModel.FLASH_2_0.value,
             GeminiModel.FLASH_1_5.value,
@@ -266,14 +855,12 @@ async def compare_models(
         ]
         
         results = {}
-        errors = {}
         
-        def call_model(model_name: str):
+        async def call_model(model_name: str):
             try:
-                import time
                 start = time.time()
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(full_prompt)
+                model = await llm_clients.get_gemini_model_async(model_name)
+                response = await model.generate_content_async(full_prompt)
                 elapsed = time.time() - start
                 return {
                     "model": model_name,
@@ -288,52 +875,43 @@ async def compare_models(
                     "success": False
                 }
         
-        # Run in parallel using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {executor.submit(call_model, m): m for m in models}
-            for future in futures:
-                result = future.result()
-                model_name = result["model"]
-                if result["success"]:
-                    # Parse the response
-                    try:
-                        llm_analyzer = LLMAnalyzer()
-                        analysis_data = llm_analyzer._parse_json_response(result["response"])
-                        analysis_result = llm_analyzer._construct_result(analysis_data, measurements)
-                        results[model_name] = {
-                            "success": True,
-                            "data": analysis_result.model_dump(),
-                            "time_seconds": result["time_seconds"]
-                        }
-                    except Exception as e:
-                        results[model_name] = {
-                            "success": False,
-                            "error": f"Failed to parse response: {e}",
-                            "raw_response": result["response"][:500]
-                        }
-                else:
+        # One admission slot per model; cancelling the gather cancels every
+        # pending provider request
+        model_outputs = await llm_admission.gather(PRIORITY_COMPARE, (call_model(m) for m in models))
+        
+        for result in model_outputs:
+            model_name = result["model"]
+            if result["success"]:
+                # Parse the response
+                try:
+                    analysis_data = llm_analyzer._parse_json_response(result["response"])
+                    analysis_result = llm_analyzer._construct_result(analysis_data, measurements)
+                    results[model_name] = {
+                        "success": True,
+                        "data": analysis_result,
+                        "time_seconds": result["time_seconds"]
+                    }
+                except Exception as e:
                     results[model_name] = {
                         "success": False,
-                        "error": result["error"]
+                        "error": f"Failed to parse response: {e}",
+                        "raw_response": result["response"][:500]
                     }
+            else:
+                results[model_name] = {
+                    "success": False,
+                    "error": result["error"]
+                }
         
-        return {
+        return ORJSONResponse({
             "success": True,
-            "measurements": measurements.model_dump(),
+            "measurements": measurements,
             "model_results": results,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail={
-                "code": "COMPARISON_ERROR",
-                "message": f"An error occurred during model comparison: {str(e)}"
-            }
-        )
+            "timestamp": datetime.utcnow()
+        })
+    
+    with _api_errors("COMPARISON_ERROR", "during model comparison"):
+        return await _respond(request, idempotency_key, idempotency, run_comparison)
 
 
 # Import MultiModelInput at module level
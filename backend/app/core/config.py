@@ -18,16 +18,119 @@ class Settings(BaseSettings):
     port: int = 8000
     debug: bool = True
     
+    # Production Workers (start.py)
+    # Enrichment jobs, the overlay LRU and metrics are still per process, so
+    # more than one worker needs sticky routing (see DEPLOYMENT.md)
+    workers: int = 1  # Uvicorn worker processes
+    worker_max_requests: int = 2000  # Recycle a worker after N requests (0 = never)
+    worker_max_requests_jitter: int = 200  # Stagger recycling so workers don't restart together
+    preload_models: bool = True  # Build + warm the vision engine before accepting traffic
+    
     # LLM Provider
     llm_provider: Literal["claude", "gemini"] = "gemini"
     
     # CORS Settings
     frontend_url: str = "http://localhost:3000"
     
+    # Request Intake Limits
+    max_request_body_mb: float = 16.0  # Whole JSON body (front + side base64)
+    max_image_mb: float = 8.0  # Per decoded image file
+    max_image_megapixels: float = 24.0  # Per image, checked from the header before decode
+    
+    # Landmark Backend ("face_landmarker" needs the MediaPipe Tasks model bundle)
+    vision_backend: Literal["face_mesh", "face_landmarker"] = "face_mesh"
+    face_landmarker_model_path: str = "models/face_landmarker.task"
+    face_landmarker_live_mode: Literal["video", "live_stream"] = "video"  # Live sessions; VisionEngine always uses image mode
+    face_landmarker_delegate: Literal["cpu", "gpu"] = "cpu"
+    face_landmarker_threads: int = 0  # XNNPACK threads for the CPU delegate (0 = MediaPipe default)
+    face_landmarker_timeout_seconds: float = 5.0  # live_stream: wait for the result callback
+    
+    # Engine Profiles ("precise" = refined eyes/lips + iris, "fast" = base mesh only)
+    vision_pool_size: int = 1  # Graphs per profile; raise only with spare cores per worker
+    analyze_profile: Literal["precise", "fast"] = "precise"  # /analyze front image
+    quick_profile: Literal["precise", "fast"] = "fast"  # /analyze/quick front image
+    side_profile: Literal["precise", "fast"] = "fast"  # Side images (only 3 points are read)
+    live_profile: Literal["precise", "fast"] = "fast"  # Live-mode tracking graphs
+    
+    # Face ROI (Face Mesh re-run on a crop around small or missed faces)
+    roi_crop: bool = True
+    roi_refine_below: float = 0.35  # Refine faces spanning less than this fraction of the frame
+    roi_detect_side: int = 320  # Longest side of the copy the fallback detector sees
+    roi_padding: float = 2.2  # Crop side as a multiple of the detector's face box
+    roi_mesh_side: int = 384  # Larger crops are downscaled before Face Mesh
+    
+    # Group Photos (/analyze/group)
+    group_max_faces: int = 8  # Faces analyzed per photo, one LLM call each
+    group_profile: Literal["precise", "fast"] = "fast"
+    
+    # Image Quality Gate (/analyze*, before Face Mesh and any LLM call)
+    quality_gate: bool = True
+    quality_min_side: int = 240  # Pixels, shorter side
+    quality_min_brightness: float = 40.0  # Mean gray level (0-255)
+    quality_max_brightness: float = 220.0
+    quality_min_sharpness: float = 50.0  # Laplacian variance at 256 px; sharp photos score in the hundreds
+    quality_min_face_px: int = 64  # Detected face height or width
+    
+    # Admission Control (per worker process; overload answers 503 + Retry-After)
+    vision_concurrency: int = 2  # Requests decoding/running FaceMesh at once
+    llm_concurrency: int = 16  # Concurrent provider calls from request handlers
+    admission_max_queue: int = 32  # Waiting requests per stage before rejecting
+    admission_max_wait_seconds: float = 10.0  # Estimated (and maximum) queue wait per stage
+    
+    # Response Compression ("brotli" needs the optional brotli-asgi package)
+    response_compression: Literal["off", "gzip", "brotli"] = "gzip"
+    compression_min_size: int = 1024  # Bytes; small payloads aren't worth the CPU
+    
+    # Landmark Overlays (/overlay)
+    overlay_cache_mb: float = 64.0  # Encoded overlays kept per worker (LRU by image hash)
+    overlay_jpeg_quality: int = 90
+    
+    # Live Mode (/live WebSocket, per worker)
+    live_max_sessions: int = 4  # Each session holds its own FaceMesh graph
+    live_max_frame_side: int = 640  # Longer frames are downscaled before tracking
+    live_smoothing_min_cutoff: float = 1.0  # One Euro filter (Hz): lower = steadier at rest
+    live_smoothing_beta: float = 10.0  # One Euro filter: higher = less lag when moving
+    
+    # Population Percentiles (AnalysisResult.percentiles; built with scripts/build_percentiles.py)
+    percentile_index_path: str = "data/percentiles.npz"  # Missing file = percentiles off
+    percentile_min_samples: int = 100  # Columns with fewer reference values get no percentile
+    
+    # Shared Cache (SQLite, shared by all workers: landmarks, analyses, overlays)
+    shared_cache: bool = False
+    shared_cache_path: str = "shared_cache.sqlite3"
+    shared_cache_mb: float = 256.0  # Total size; least recently used entries are evicted
+    
+    # Idempotency-Key Result Store (SQLite, shared by all workers; opened on the
+    # first request with an Idempotency-Key, so the directory must be writable)
+    idempotency_db_path: str = "idempotency.sqlite3"
+    idempotency_ttl_seconds: float = 86400.0  # How long a key's response is replayed
+    idempotency_claim_timeout_seconds: float = 300.0  # A running claim older than this (dead worker) is taken over
+    idempotency_poll_seconds: float = 0.25  # How often a retry on another worker checks the running claim
+    
+    # Request Tracing (/analyze* endpoints)
+    server_timing: bool = True  # Per-stage Server-Timing header for browser devtools
+    trace_exporter: Literal["off", "stdout", "file"] = "off"  # Where sampled traces are written (JSONL)
+    trace_file: str = "traces.jsonl"  # Used by the "file" exporter
+    trace_sample_rate: float = 1.0  # Fraction of traced requests exported
+    
     # Model Settings - Best value choices
     claude_model: str = "claude-3-5-sonnet-20241022"  # If using Anthropic
     gemini_model: str = "gemini-1.5-pro"  # Best quality for GCP credits ($300 = ~100K requests)
     
+    # LLM Provider Connections (one pooled client per provider per worker)
+    llm_max_connections: int = 32  # Keep-alive pool size
+    llm_keepalive_seconds: float = 120.0  # Idle time before a pooled connection is dropped
+    llm_timeout_seconds: float = 60.0  # Per provider request
+    llm_warmup_timeout_seconds: float = 3.0  # Startup budget for opening the first connection
+    
+    # Deferred LLM Enrichment
+    enrichment_workers: int = 2  # Concurrent background LLM calls
+    enrichment_ttl_seconds: float = 3600.0  # How long enriched results stay retrievable
+    enrichment_max_wait_seconds: float = 30.0  # Upper bound for /results long-polling
+    enrichment_max_defer_seconds: float = 30.0  # Longest a job waits for the LLM stage to go idle
+    enrichment_poll_seconds: float = 0.1  # How often a deferred job re-checks the LLM stage
+    enrichment_max_queued: int = 256  # Jobs waiting for a worker before defer_llm gets 503
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
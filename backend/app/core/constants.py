@@ -65,6 +65,26 @@ LANDMARK_INDICES = {
     "face_right_1": 454,
 }
 
+# Landmark pairs behind each GeometryCalculator measurement (drawn by /overlay)
+MEASUREMENT_LINES = {
+    "canthal_tilt": [
+        ("left_inner_canthus", "left_outer_canthus"),
+        ("right_inner_canthus", "right_outer_canthus"),
+    ],
+    "bigonial_width": [("left_gonion", "right_gonion")],
+    "bizygomatic_width": [("left_zygion", "right_zygion")],
+    "gonial_angle": [
+        ("left_jaw_1", "left_gonion"),
+        ("left_gonion", "chin_menton"),
+    ],
+    "midface": [("nasion", "upper_lip")],
+    "facial_thirds": [
+        ("forehead_top", "glabella"),
+        ("glabella", "subnasale"),
+        ("subnasale", "chin_menton"),
+    ],
+}
+
 # ============================================
 # IDEAL AESTHETIC VALUES
 # Based on PSL/Orthotropics research
@@ -134,6 +154,43 @@ IDEAL_VALUES = {
     },
 }
 
+# ============================================
+# RULE-BASED SCORING
+# Near-ideal margins below/above each IDEAL_VALUES range
+# (None = unbounded on that side)
+# ============================================
+
+RULE_SCORING = {
+    "canthal_tilt": {
+        "field": "canthal_tilt",
+        "radar": "eyes",
+        "margin": (4.0, None),  # Neutral (0°) still reads as near-ideal
+    },
+    "bigonial_bizygomatic_ratio": {
+        "field": "bigonial_bizygomatic_ratio",
+        "radar": "jaw",
+        "margin": (0.05, 0.05),
+    },
+    "gonial_angle": {
+        "field": "gonial_angle",
+        "radar": "jaw",
+        "margin": (5.0, 5.0),
+    },
+    "midface_ratio": {
+        "field": "midface_ratio",
+        "radar": "midface",
+        "margin": (0.03, 0.03),
+    },
+    "symmetry": {
+        "field": "symmetry_score",
+        "radar": "symmetry",
+        "margin": (0.05, None),
+    },
+}
+
+# Score awarded per band: far below, near below, ideal, near above, far above
+RULE_BAND_SCORES = (5.0, 7.0, 9.0, 7.0, 5.0)
+
 # ============================================
 # SCORING TIERS
 # ============================================
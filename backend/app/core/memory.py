@@ -0,0 +1,98 @@
+"""
+Process memory tracking for capacity planning
+"""
+import resource
+import sys
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import registry, route_key
+
+
+def _read_status_kb(field: str) -> Optional[int]:
+    """Read a kB field (VmRSS, VmHWM) from /proc/self/status on Linux"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_kb() -> int:
+    """Resident set size of this process in kB"""
+    rss = _read_status_kb("VmRSS")
+    return rss if rss is not None else peak_rss_kb()
+
+
+def peak_rss_kb() -> int:
+    """High-water mark of the resident set size in kB"""
+    peak = _read_status_kb("VmHWM")
+    if peak is not None:
+        return peak
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kB on Linux
+    return maxrss // 1024 if sys.platform == "darwin" else maxrss
+
+
+class MemoryStats:
+    """
+    Per-endpoint record of how far requests pushed the process peak RSS
+    
+    Growth is attributed to whichever request was running when the peak moved,
+    so it is exact for serial traffic and an upper bound under concurrency.
+    """
+    
+    def __init__(self):
+        self.requests: Dict[str, int] = {}
+        self.max_peak_growth_kb: Dict[str, int] = {}
+    
+    def record(self, path: str, peak_growth_kb: int) -> None:
+        self.requests[path] = self.requests.get(path, 0) + 1
+        if peak_growth_kb > self.max_peak_growth_kb.get(path, 0):
+            self.max_peak_growth_kb[path] = peak_growth_kb
+    
+    def snapshot(self) -> dict:
+        """Memory summary in MB for health/metrics output"""
+        return {
+            "rss_mb": round(current_rss_kb() / 1024, 1),
+            "peak_rss_mb": round(peak_rss_kb() / 1024, 1),
+            "max_request_peak_growth_mb": {
+                path: round(kb / 1024, 1)
+                for path, kb in sorted(self.max_peak_growth_kb.items())
+            },
+        }
+
+
+memory_stats = MemoryStats()
+
+registry.gauge(
+    "adam_process_resident_memory_bytes", "Current resident set size",
+    callback=lambda: current_rss_kb() * 1024
+)
+registry.gauge(
+    "adam_process_peak_resident_memory_bytes", "Peak resident set size",
+    callback=lambda: peak_rss_kb() * 1024
+)
+
+
+class MemoryTrackingMiddleware:
+    """Pure ASGI middleware recording peak-RSS growth per request path"""
+    
+    def __init__(self, app: ASGIApp, stats: MemoryStats = memory_stats):
+        self.app = app
+        self.stats = stats
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        peak_before = peak_rss_kb()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.stats.record(route_key(scope), max(0, peak_rss_kb() - peak_before))
@@ -0,0 +1,379 @@
+"""
+In-process metrics registry with Prometheus text exposition
+Counters, gauges and histograms cheap enough to sit on the request hot path
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .tracing import record_span
+
+# Latency buckets (seconds) spanning sub-millisecond geometry to multi-second LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+_PATH_PARAM = re.compile(r"\{(\w+)(?::\w+)?\}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    """Render {name="value",...} with Prometheus escaping"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Base class: name, help text, label names and per-label-set children"""
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[LabelValues, object] = {}
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def labels(self, **labels: str):
+        """
+        Child metric for one label set
+        
+        Hot paths can hold on to the child and skip the label lookup entirely.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def _sorted_children(self) -> List[Tuple[LabelValues, object]]:
+        with self._lock:
+            return sorted(self._children.items())
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    """Single counter/gauge value"""
+    __slots__ = ("value", "_lock")
+    
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+    
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+    
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+    
+    def _new_child(self) -> _Value:
+        return _Value()
+    
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self.labels(**labels).inc(amount)
+    
+    def get(self, **labels: str) -> float:
+        return self.labels(**labels).value
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self._sorted_children()
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, or be read from a callback at scrape time"""
+    kind = "gauge"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+    
+    def set(self, value: float, **labels: str) -> None:
+        self.labels(**labels).set(value)
+    
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.labels(**labels).dec(amount)
+    
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            return [f"{self.name} {_format_value(self._callback())}"]
+        return super().samples()
+
+
+class _HistogramValue:
+    """Per-bucket counts (+Inf last), sum and count for one label set"""
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+    
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (cumulative buckets are computed at scrape time)"""
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+    
+    def observe(self, value: float, **labels: str) -> None:
+        self.labels(**labels).observe(value)
+    
+    def count(self, **labels: str) -> int:
+        return self.labels(**labels).count
+    
+    def samples(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for key, child in self._sorted_children():
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders the Prometheus text format"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ============================================
+# APPLICATION METRICS
+# ============================================
+
+REQUESTS = registry.counter(
+    "adam_http_requests_total", "HTTP requests by endpoint and status code", ("endpoint", "status")
+)
+REQUEST_DURATION = registry.histogram(
+    "adam_http_request_duration_seconds", "End-to-end request latency", ("endpoint",)
+)
+IN_FLIGHT_REQUESTS = registry.gauge(
+    "adam_http_requests_in_flight", "Requests currently being handled"
+)
+ABANDONED_REQUESTS = registry.counter(
+    "adam_abandoned_requests_total", "Requests cancelled because the client disconnected", ("endpoint",)
+)
+STAGE_DURATION = registry.histogram(
+    "adam_stage_duration_seconds", "Pipeline stage latency (decode, mesh, geometry, prompt, llm, parse)", ("stage",)
+)
+STAGES_IN_FLIGHT = registry.gauge(
+    "adam_stages_in_flight", "Pipeline stages currently running", ("stage",)
+)
+FACE_NOT_DETECTED = registry.counter(
+    "adam_face_not_detected_total", "Analyses rejected because no face was found"
+)
+IMAGE_QUALITY_REJECTED = registry.counter(
+    "adam_image_quality_rejected_total", "Images rejected by the quality gate, by error code", ("code",)
+)
+LLM_FALLBACKS = registry.counter(
+    "adam_llm_fallback_total", "Rule-based fallbacks used instead of LLM output", ("reason",)
+)
+CACHE_REQUESTS = registry.counter(
+    "adam_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ("cache", "result")
+)
+
+
+# Bound (histogram, in-flight gauge) children per stage name
+_stage_children: Dict[str, Tuple[_HistogramValue, _Value]] = {}
+
+
+class stage:
+    """
+    Context manager timing one pipeline stage
+    
+        with stage("mesh"):
+            results = face_mesh.process(image)
+    
+    Records into adam_stage_duration_seconds, the stage in-flight gauge and,
+    when the request is traced, its Server-Timing/trace spans.
+    """
+    __slots__ = ("name", "_duration", "_in_flight", "_start")
+    
+    def __init__(self, name: str):
+        self.name = name
+        children = _stage_children.get(name)
+        if children is None:
+            children = _stage_children[name] = (
+                STAGE_DURATION.labels(stage=name),
+                STAGES_IN_FLIGHT.labels(stage=name),
+            )
+        self._duration, self._in_flight = children
+    
+    def __enter__(self) -> "stage":
+        self._in_flight.inc()
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._start
+        self._duration.observe(duration)
+        self._in_flight.dec()
+        record_span(self.name, self._start, duration)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def route_key(scope: Scope) -> str:
+    """
+    Bounded label for a request: the concrete path for static routes, the
+    route template for parameterized ones, "unmatched" for 404s
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    path_params = scope.get("path_params")
+    if not path_params:
+        return scope["path"]
+    
+    # Routes from included routers may carry only their own path, without the
+    # router prefix; recover the prefix by matching the rendered route path
+    template = getattr(route, "path", "")
+    rendered = _PATH_PARAM.sub(lambda match: str(path_params.get(match.group(1), "")), template)
+    if rendered and scope["path"].endswith(rendered):
+        return scope["path"][:len(scope["path"]) - len(rendered)] + template
+    return template or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request count, latency and in-flight gauge"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        # The route (and so a bounded label) is only known once routing ran
+        IN_FLIGHT_REQUESTS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_FLIGHT_REQUESTS.dec()
+            endpoint = route_key(scope)
+            REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint)
+            REQUESTS.inc(endpoint=endpoint, status=str(status_code))
@@ -0,0 +1,94 @@
+"""
+Worker readiness for load balancer probes
+Tracks startup state and how long each warm-up step took
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from .metrics import registry
+
+STARTING = "starting"
+WARMING = "warming"
+READY = "ready"
+STOPPING = "stopping"
+
+
+@dataclass
+class WarmUpStep:
+    """Outcome of one warm-up step"""
+    status: str  # "ok", "skipped" or "failed"
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Readiness:
+    """
+    Startup state of this worker process.
+    The lifespan hook moves it from starting -> warming -> ready, and to
+    stopping on shutdown; /ready only answers 200 in the ready state.
+    """
+    
+    def __init__(self):
+        self.state = STARTING
+        self.created_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.steps: Dict[str, WarmUpStep] = {}
+    
+    @property
+    def is_ready(self) -> bool:
+        return self.state == READY
+    
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """
+        Time a warm-up step; a failure is recorded and re-raised
+        
+        Args:
+            name: Step name reported by /ready
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.steps[name] = WarmUpStep("failed", time.perf_counter() - start, str(e))
+            raise
+        self.steps[name] = WarmUpStep("ok", time.perf_counter() - start)
+    
+    def record(self, name: str, status: str, seconds: Optional[float] = None) -> None:
+        """Record a step timed elsewhere (or skipped)"""
+        self.steps[name] = WarmUpStep(status, seconds)
+    
+    def mark_warming(self) -> None:
+        self.state = WARMING
+    
+    def mark_ready(self) -> None:
+        self.state = READY
+        self.ready_at = time.time()
+    
+    def mark_stopping(self) -> None:
+        self.state = STOPPING
+    
+    def snapshot(self) -> dict:
+        """State, startup duration and per-step warm-up timings"""
+        return {
+            "state": self.state,
+            "startup_seconds": round(self.ready_at - self.created_at, 3) if self.ready_at else None,
+            "warm_up": {
+                name: {
+                    "status": step.status,
+                    "ms": round(step.seconds * 1000, 1) if step.seconds is not None else None,
+                    **({"error": step.error} if step.error else {}),
+                }
+                for name, step in self.steps.items()
+            },
+        }
+
+
+readiness = Readiness()
+
+registry.gauge(
+    "adam_worker_ready", "1 once this worker finished warming up",
+    callback=lambda: 1.0 if readiness.is_ready else 0.0
+)
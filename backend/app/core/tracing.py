@@ -0,0 +1,204 @@
+"""
+Per-request stage traces - Server-Timing headers and sampled span export
+Spans recorded by metrics.stage() are attached to the trace of the current request
+"""
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class Trace:
+    """Spans recorded while handling one request"""
+    __slots__ = ("trace_id", "name", "started_at", "start", "duration", "spans")
+    
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        # (name, start offset, duration) in seconds
+        self.spans: List[Tuple[str, float, float]] = []
+    
+    def add_span(self, name: str, start: float, duration: float) -> None:
+        """Record a span; start is a time.perf_counter() reading"""
+        self.spans.append((name, start - self.start, duration))
+    
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+    
+    def totals(self) -> Dict[str, float]:
+        """Summed duration per span name, in first-seen order (front + side decode add up)"""
+        totals: Dict[str, float] = {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+    
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in self.totals().items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+    
+    def to_dict(self, **attributes) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            **attributes,
+            "spans": [
+                {"name": name, "start_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("adam_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the request being handled, if it is traced"""
+    return _current_trace.get()
+
+
+def record_span(name: str, start: float, duration: float) -> None:
+    """Attach a finished span to the current trace (no-op outside a trace)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(name, start, duration)
+
+
+def detach() -> None:
+    """
+    Stop recording into the inherited trace
+    
+    Long-lived tasks (e.g. enrichment workers) copy the context of whichever
+    request started them; they call this so their spans don't leak into it.
+    """
+    _current_trace.set(None)
+
+
+class span:
+    """
+    Context manager recording an ad-hoc span on the current trace
+    
+        with span("render"):
+            ...
+    
+    Unlike metrics.stage() it does not feed the stage histograms.
+    """
+    __slots__ = ("name", "_start")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self) -> "span":
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        record_span(self.name, self._start, time.perf_counter() - self._start)
+
+
+# ============================================
+# EXPORTERS
+# ============================================
+
+class TraceExporter:
+    """Writes finished traces as one JSON object per line"""
+    
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self._lock = threading.Lock()
+    
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def build_exporter(kind: str, path: str) -> Optional[TraceExporter]:
+    """
+    Create the configured exporter
+    
+    Args:
+        kind: 'off', 'stdout' or 'file'
+        path: JSONL file used by the 'file' exporter
+    
+    Returns:
+        Exporter, or None when export is off
+    """
+    if kind == "stdout":
+        return TraceExporter(sys.stdout)
+    if kind == "file":
+        # Line-buffered append; each worker process writes whole lines
+        return TraceExporter(open(path, "a", buffering=1, encoding="utf-8"))
+    return None
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware tracing requests under the given path prefixes
+    
+    Adds a Server-Timing header (visible in browser devtools) and hands a
+    sampled subset of traces to the exporter.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        path_prefixes: Sequence[str],
+        header: bool = True,
+        exporter: Optional[TraceExporter] = None,
+        sample_rate: float = 1.0
+    ):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.header = header
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        
+        sampled = self.exporter is not None and random.random() < self.sample_rate
+        if not (self.header or sampled):
+            await self.app(scope, receive, send)
+            return
+        
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        status_code = 500
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                if self.header:
+                    headers.append("Server-Timing", trace.server_timing())
+                    # Let the (cross-origin) frontend read the timings too
+                    headers.append("Timing-Allow-Origin", "*")
+                if sampled:
+                    headers.append("X-Trace-Id", trace.trace_id)
+            await send(message)
+        
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            if sampled:
+                self.exporter.export(trace.to_dict(status=status_code))
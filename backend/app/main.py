@@ -3,11 +3,33 @@ Project Adam - AI Face Aesthetics Scorer
 FastAPI Application Entry Point
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.api.routes import router
+from app.api.deps import (
+    get_enrichment_service,
+    get_vision_engine,
+    get_vision_admission,
+    get_llm_admission,
+    get_idempotency_service,
+    get_overlay_cache,
+    get_live_sessions,
+    get_shared_cache,
+    get_percentile_index,
+)
+from app.api.disconnect import ClientDisconnected, CLIENT_CLOSED_REQUEST
+from app.api.responses import ORJSONResponse
+from app.api.intake import BodySizeLimitMiddleware
+from app.core.memory import MemoryTrackingMiddleware
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.readiness import readiness
+from app.core.tracing import ServerTimingMiddleware, build_exporter
+from app.services import llm_clients
 
 
 @asynccontextmanager
@@ -20,9 +42,55 @@ async def lifespan(app: FastAPI):
     print(f"📡 LLM Provider: {settings.llm_provider}")
     print(f"🌐 Allowing CORS from: {settings.frontend_url}")
     
+    readiness.mark_warming()
+    
+    # Build stateful singletons up front: the lru_cache getters run in the
+    # threadpool, so a concurrent first burst could otherwise create several
+    get_shared_cache()
+    percentile_index = get_percentile_index()
+    if percentile_index is not None:
+        print(f"📊 Percentile index: {percentile_index.stats()['sources']} datasets loaded")
+    get_vision_admission()
+    get_llm_admission()
+    get_idempotency_service()
+    get_overlay_cache()
+    get_live_sessions()
+    
+    # Import the LLM SDK and build its client even when warm-up is skipped:
+    # the first request would otherwise do it on the event loop (~1 s for Gemini)
+    try:
+        with readiness.step("llm_client"):
+            llm_status = await run_in_threadpool(llm_clients.build)
+        if llm_status == "skipped":
+            readiness.record("llm_client", "skipped")
+    except Exception as e:
+        print(f"⚠️ LLM client not built: {e}")
+    
+    if settings.preload_models:
+        # Runs in every worker before it starts accepting connections
+        with readiness.step("vision_engine"):
+            vision_engine = get_vision_engine()
+        with readiness.step("vision_inference"):
+            vision_engine.warm_up()
+        print(f"🔥 Vision engine warmed up ({readiness.steps['vision_inference'].seconds * 1000:.0f} ms)")
+        
+        # Build the pooled LLM client and open its first connection
+        llm_status, llm_seconds = await llm_clients.warm_up()
+        readiness.record("llm_connection", llm_status, llm_seconds)
+        if llm_status == "ok":
+            print(f"🔥 LLM connection warmed up ({llm_seconds * 1000:.0f} ms)")
+    else:
+        # Serverless: load the heavy vision stack on first use instead
+        for name in ("vision_engine", "vision_inference", "llm_connection"):
+            readiness.record(name, "skipped")
+    readiness.mark_ready()
+    
     yield
     
     # Shutdown
+    readiness.mark_stopping()
+    await get_enrichment_service().shutdown()
+    await llm_clients.close()
     print("👋 Project Adam API shutting down...")
 
 
@@ -43,14 +111,41 @@ app = FastAPI(
     ### Endpoints:
     - `POST /api/v1/analyze` - Full analysis with front + side images
     - `POST /api/v1/analyze/quick` - Quick analysis with front image only
-    - `GET /api/v1/health` - Health check
+    - `POST /api/v1/analyze/group` - Every face of a group photo in one request
+    - `GET /api/v1/results/{id}` - Deferred LLM analysis (`?defer_llm=true`)
+    - `GET /api/v1/health` - Liveness check
+    - `GET /api/v1/ready` - Readiness probe (503 until this worker is warmed up)
+    - `GET /metrics` - Prometheus metrics
     """,
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Reject oversized bodies before they are buffered and JSON-parsed
+# (added before CORS so 413s still carry CORS headers)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_bytes=int(settings.max_request_body_mb * 1024 * 1024)
+)
+
+# Track peak-RSS growth per endpoint (reported by /api/v1/health)
+app.add_middleware(MemoryTrackingMiddleware)
+
+# Request counts, latency and in-flight gauges (scraped from /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Per-request stage breakdown: Server-Timing header + sampled trace export
+app.add_middleware(
+    ServerTimingMiddleware,
+    path_prefixes=["/api/v1/analyze"],
+    header=settings.server_timing,
+    exporter=build_exporter(settings.trace_exporter, settings.trace_file),
+    sample_rate=settings.trace_sample_rate
+)
+
 # Configure CORS - Allow all origins for deployment
 app.add_middleware(
     CORSMiddleware,
@@ -60,10 +155,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large payloads (e.g. /analyze/compare)
+if settings.response_compression == "brotli":
+    try:
+        from brotli_asgi import BrotliMiddleware
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.compression_min_size)
+    except ImportError:
+        print("⚠️ brotli-asgi not installed, falling back to gzip. Run: pip install brotli-asgi")
+        app.add_middleware(GZipMiddleware, minimum_size=settings.compression_min_size)
+elif settings.response_compression == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=settings.compression_min_size)
+
 # Include API routes
 app.include_router(router, prefix="/api/v1", tags=["Analysis"])
 
 
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    """
+    Client closed the connection mid-analysis; nobody will read this response
+    """
+    return Response(status_code=CLIENT_CLOSED_REQUEST)
+
+
 @app.get("/")
 async def root():
     """
@@ -78,6 +192,17 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of request, stage, fallback and cache metrics
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Run with: uvicorn app.main:app --reload
 if __name__ == "__main__":
     import uvicorn
@@ -2,7 +2,7 @@
 Pydantic models for request/response schemas
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -19,6 +19,14 @@ class GeminiModel(str, Enum):
     PRO_2_0 = "gemini-2.0-pro-exp"  # Experimental
 
 
+class EnrichmentStatus(str, Enum):
+    """Lifecycle of a deferred LLM enrichment"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 # ============================================
 # INPUT MODELS
 # ============================================
@@ -72,6 +80,27 @@ class MultiModelInput(BaseModel):
     )
 
 
+class LandmarksInput(BaseModel):
+    """Single-image input for /landmarks and /overlay (no measurements, no LLM)"""
+    image: str = Field(
+        ..., 
+        description="Base64 encoded front-facing image"
+    )
+
+
+class GroupAnalysisInput(BaseModel):
+    """Input for group-photo analysis (every face in one image)"""
+    image: str = Field(
+        ..., 
+        description="Base64 encoded group photo"
+    )
+    max_faces: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Most faces to analyze (capped by the server's GROUP_MAX_FACES)"
+    )
+
+
 # ============================================
 # MEASUREMENT MODELS
 # ============================================
@@ -186,6 +215,11 @@ class AnalysisResult(BaseModel):
         ..., 
         description="Raw geometric measurements"
     )
+    percentiles: Optional[Dict[str, float]] = Field(
+        None,
+        description="Percentile (0-100) of each measurement in the reference population "
+                    "(facial_thirds as facial_thirds_upper/middle/lower); null without an index"
+    )
 
 
 class AnalysisResponse(BaseModel):
@@ -227,6 +261,64 @@ class AnalysisResponse(BaseModel):
         }
 
 
+class DeferredAnalysisResponse(BaseModel):
+    """API response for deferred mode: rule-based result now, LLM analysis later"""
+    success: bool = True
+    data: AnalysisResult = Field(
+        ..., 
+        description="Rule-based result (score, tier, radar) available immediately"
+    )
+    enrichment_id: str = Field(
+        ..., 
+        description="Id to fetch the LLM analysis from /results/{enrichment_id}"
+    )
+    status: EnrichmentStatus = EnrichmentStatus.PENDING
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class FaceAnalysis(BaseModel):
+    """Result for one face of a group photo"""
+    index: int = Field(..., description="Position from left to right, starting at 0")
+    box: List[float] = Field(
+        ..., 
+        description="Normalized [x_min, y_min, x_max, y_max] around the face's landmarks"
+    )
+    data: AnalysisResult
+
+
+class GroupAnalysisResponse(BaseModel):
+    """API response for group-photo analysis"""
+    success: bool = True
+    face_count: int
+    faces: List[FaceAnalysis]
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class EnrichmentResponse(BaseModel):
+    """API response for a deferred LLM enrichment"""
+    success: bool = True
+    enrichment_id: str
+    status: EnrichmentStatus
+    data: Optional[AnalysisResult] = Field(
+        None, 
+        description="LLM analysis, present once status is 'completed'"
+    )
+    error: Optional[str] = None
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class LandmarksResponse(BaseModel):
+    """JSON rendering of /landmarks (binary formats carry the same data)"""
+    success: bool = True
+    landmark_count: int = Field(..., description="478 (468 face + 10 iris)")
+    image_width: int
+    image_height: int
+    landmarks: List[List[float]] = Field(
+        ..., 
+        description="Normalized [x, y, z] per landmark; x and y in 0-1 of the image size"
+    )
+
+
 # ============================================
 # ERROR & STATUS MODELS
 # ============================================
@@ -254,6 +346,10 @@ class HealthResponse(BaseModel):
             "llm": "ok"
         }
     )
+    memory: Optional[dict] = Field(
+        None, 
+        description="Process RSS, peak RSS and worst per-endpoint peak growth (MB)"
+    )
 
 
 # ============================================
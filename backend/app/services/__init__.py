@@ -2,3 +2,4 @@
 from .vision_engine import VisionEngine
 from .geometry_calc import GeometryCalculator
 from .llm_analyzer import LLMAnalyzer
+from .scoring import RuleScoringEngine
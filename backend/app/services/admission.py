@@ -0,0 +1,230 @@
+"""
+Admission Control - Bounded priority queues in front of the vision and LLM stages
+Fails fast with a Retry-After estimate instead of letting latency grow without limit
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# Lower value is admitted first
+PRIORITY_QUICK = 0
+PRIORITY_ANALYZE = 1
+PRIORITY_COMPARE = 2
+PRIORITY_BACKGROUND = 3  # Deferred enrichment, behind every request
+
+# Weight of the newest sample in the service-time average
+EWMA_ALPHA = 0.2
+
+ADMISSION_ACTIVE = registry.gauge(
+    "adam_admission_active", "Requests holding an admission slot", ("stage",)
+)
+ADMISSION_QUEUED = registry.gauge(
+    "adam_admission_queued", "Requests waiting for an admission slot", ("stage",)
+)
+ADMISSION_REJECTED = registry.counter(
+    "adam_admission_rejected_total", "Requests refused by admission control", ("stage", "reason")
+)
+
+
+class ServerOverloadedError(Exception):
+    """Raised when a stage cannot admit a request within the configured limits"""
+    
+    def __init__(self, stage: str, reason: str, retry_after: int):
+        super().__init__(f"{stage} stage overloaded ({reason})")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded, prioritized wait queue.
+    
+    A request is admitted immediately while slots are free. Otherwise it waits
+    in priority order, unless the queue is full or the estimated wait (queue
+    position x average service time / slots) is above the limit, in which case
+    it is rejected up front.
+    """
+    
+    def __init__(
+        self,
+        stage: str,
+        slots: int,
+        max_queue: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None,
+        initial_service_seconds: float = 0.1
+    ):
+        """
+        Args:
+            stage: Stage name used in metrics and errors
+            slots: Requests allowed to run the stage at once
+            max_queue: Waiting requests allowed before rejecting, defaults to settings
+            max_wait_seconds: Estimated wait allowed before rejecting, defaults to settings
+            initial_service_seconds: Service-time estimate until real samples arrive
+        """
+        self.stage = stage
+        self.slots = max(1, slots)
+        self.max_queue = settings.admission_max_queue if max_queue is None else max_queue
+        self.max_wait_seconds = max_wait_seconds or settings.admission_max_wait_seconds
+        self.service_seconds = initial_service_seconds
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._active_gauge = ADMISSION_ACTIVE.labels(stage=stage)
+        self._queued_gauge = ADMISSION_QUEUED.labels(stage=stage)
+    
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+    
+    @property
+    def idle(self) -> bool:
+        """A slot is free and nothing is waiting for one"""
+        return self._active < self.slots and not self._waiters
+    
+    def stats(self) -> dict:
+        """Slots, current load and the service-time estimate (for /ready)"""
+        return {
+            "slots": self.slots,
+            "active": self._active,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "service_ms": round(self.service_seconds * 1000, 1),
+        }
+    
+    def estimated_wait(self, priority: int) -> float:
+        """Seconds a new request of this priority would wait for a slot"""
+        if self._active < self.slots and not self._waiters:
+            return 0.0
+        ahead = sum(1 for p, _, _ in self._waiters if p <= priority)
+        return (ahead + 1) * self.service_seconds / self.slots
+    
+    def retry_after(self) -> int:
+        """Whole seconds until the current queue should have drained"""
+        return max(1, math.ceil((self.queued + 1) * self.service_seconds / self.slots))
+    
+    def check(self, priority: int) -> None:
+        """
+        Raise if a request of this priority would be rejected right now
+        
+        Lets callers refuse work before spending CPU on earlier stages.
+        
+        Raises:
+            ServerOverloadedError: If the queue is full or the wait too long
+        """
+        if self._active < self.slots and not self._waiters:
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full")
+        if self.estimated_wait(priority) > self.max_wait_seconds:
+            self._reject("wait_too_long")
+    
+    def _reject(self, reason: str) -> None:
+        ADMISSION_REJECTED.inc(stage=self.stage, reason=reason)
+        raise ServerOverloadedError(self.stage, reason, self.retry_after())
+    
+    async def _acquire(self, priority: int) -> None:
+        if self._active < self.slots and not self._waiters:
+            self._active += 1
+            self._active_gauge.set(self._active)
+            return
+        
+        self.check(priority)
+        
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._queued_gauge.set(self.queued)
+        try:
+            # Estimates can be wrong (or low priorities starved); never wait unbounded
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                return
+            self._reject("timeout")
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                # The slot was handed over just as we were cancelled
+                self._release()
+            raise
+        finally:
+            self._queued_gauge.set(self.queued)
+    
+    def _abandon(self, waiter: asyncio.Future) -> bool:
+        """Withdraw from the queue; False if a slot was already handed to us"""
+        if waiter.done():
+            return False
+        waiter.cancel()
+        self._waiters = [entry for entry in self._waiters if entry[2] is not waiter]
+        heapq.heapify(self._waiters)
+        return True
+    
+    def _release(self) -> None:
+        """Hand the slot to the best waiting request, or free it"""
+        if self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            waiter.set_result(None)
+            return
+        self._active -= 1
+        self._active_gauge.set(self._active)
+    
+    @asynccontextmanager
+    async def admit(self, priority: int = PRIORITY_ANALYZE) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the block
+        
+        Args:
+            priority: PRIORITY_QUICK, PRIORITY_ANALYZE or PRIORITY_COMPARE
+        
+        Raises:
+            ServerOverloadedError: If the request is not admitted
+        """
+        await self._acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.service_seconds += EWMA_ALPHA * (elapsed - self.service_seconds)
+            self._release()
+    
+    async def gather(self, priority: int, calls: Iterable[Coroutine[Any, Any, Any]]) -> List[Any]:
+        """
+        Run calls concurrently, each holding its own slot
+        
+        A request that fans out into several calls (one per face or model)
+        is admitted call by call, so it can't take more of the stage than
+        the slots allow. If one call fails or is rejected, the others are
+        cancelled.
+        
+        Args:
+            priority: PRIORITY_QUICK, PRIORITY_ANALYZE or PRIORITY_COMPARE
+            calls: Coroutines, started only once admitted
+        
+        Returns:
+            Results in call order
+        
+        Raises:
+            ServerOverloadedError: If a call is not admitted
+        """
+        async def admitted(call: Coroutine[Any, Any, Any]) -> Any:
+            try:
+                async with self.admit(priority):
+                    return await call
+            finally:
+                # No-op once it ran; otherwise it was never admitted
+                call.close()
+        
+        tasks = [asyncio.ensure_future(admitted(call)) for call in calls]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
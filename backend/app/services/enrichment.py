@@ -0,0 +1,242 @@
+"""
+Enrichment Service - Deferred LLM Analysis
+Queues LLM enrichment in the background while the API answers with the rule-based result
+"""
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.tracing import detach
+from app.models.schemas import EnrichmentStatus, GeometricMeasurements, AnalysisResult
+from app.services.admission import (
+    ADMISSION_REJECTED,
+    PRIORITY_BACKGROUND,
+    AdmissionController,
+    ServerOverloadedError,
+)
+from app.services.llm_analyzer import LLMAnalyzer
+
+
+@dataclass
+class EnrichmentJob:
+    """A single deferred LLM analysis"""
+    id: str
+    measurements: GeometricMeasurements
+    status: EnrichmentStatus = EnrichmentStatus.PENDING
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class EnrichmentService:
+    """
+    In-process queue of deferred LLM analyses.
+    A fixed number of workers drain the queue, so bursts of deferred requests
+    are smoothed out instead of hitting the provider all at once.
+    
+    With an admission controller, a worker only starts a call once the LLM
+    stage is idle, so interactive requests keep their slots; after
+    max_defer_seconds it queues for a slot behind them. Queued jobs with the
+    same measurements are deduplicated into one provider call. Jobs with
+    different measurements are not batched: each still costs its own call.
+    
+    At most max_queued jobs wait at once; submit() refuses the rest with
+    ServerOverloadedError, so a stalled provider cannot grow the backlog
+    without bound.
+    """
+    
+    def __init__(
+        self,
+        llm_analyzer: LLMAnalyzer,
+        workers: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        admission: Optional[AdmissionController] = None,
+        max_defer_seconds: Optional[float] = None,
+        poll_seconds: Optional[float] = None,
+        max_queued: Optional[int] = None
+    ):
+        """
+        Args:
+            llm_analyzer: Analyzer used to produce the enriched result
+            workers: Number of concurrent LLM calls, defaults to settings
+            ttl_seconds: How long finished results are kept, defaults to settings
+            admission: LLM stage admission shared with request handlers;
+                None runs jobs as soon as a worker is free
+            max_defer_seconds: Longest wait for an idle LLM stage, defaults to settings
+            poll_seconds: Interval between idle checks, defaults to settings
+            max_queued: Most jobs waiting for a worker, defaults to settings
+        """
+        self.llm_analyzer = llm_analyzer
+        self.worker_count = workers or settings.enrichment_workers
+        self.ttl_seconds = ttl_seconds or settings.enrichment_ttl_seconds
+        self.admission = admission
+        self.max_defer_seconds = (
+            settings.enrichment_max_defer_seconds if max_defer_seconds is None else max_defer_seconds
+        )
+        self.poll_seconds = poll_seconds or settings.enrichment_poll_seconds
+        self.max_queued = max_queued or settings.enrichment_max_queued
+        self._jobs: Dict[str, EnrichmentJob] = {}
+        # Queued jobs grouped by identical measurements, oldest first
+        self._pending: "OrderedDict[str, List[EnrichmentJob]]" = OrderedDict()
+        self._queued = 0
+        self._rejected = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers = []
+    
+    def stats(self) -> dict:
+        """Worker count and backlog (for /ready)"""
+        return {
+            "workers": self.worker_count,
+            "queued": self._queued,
+            "max_queued": self.max_queued,
+            "rejected": self._rejected,
+            "distinct": len(self._pending),
+            "jobs": len(self._jobs),
+        }
+    
+    def _ensure_workers(self):
+        """Start worker tasks on the running event loop (first use only)"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._workers = [
+                asyncio.create_task(self._worker())
+                for _ in range(self.worker_count)
+            ]
+    
+    async def _next_jobs(self) -> List[EnrichmentJob]:
+        """Oldest queued jobs sharing one set of measurements, once the LLM stage can take them"""
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            
+            if self.admission is not None:
+                deadline = time.monotonic() + self.max_defer_seconds
+                while not self.admission.idle and time.monotonic() < deadline:
+                    await asyncio.sleep(self.poll_seconds)
+            # Another worker may have taken the last jobs meanwhile
+            if self._pending:
+                jobs = self._pending.popitem(last=False)[1]
+                self._queued -= len(jobs)
+                return jobs
+    
+    async def _analyze(self, measurements: GeometricMeasurements) -> AnalysisResult:
+        """One provider call, holding an LLM slot behind every request"""
+        if self.admission is None:
+            return await self.llm_analyzer.analyze_async(measurements)
+        
+        while True:
+            try:
+                async with self.admission.admit(PRIORITY_BACKGROUND):
+                    return await self.llm_analyzer.analyze_async(measurements)
+            except ServerOverloadedError:
+                await asyncio.sleep(self.poll_seconds)
+    
+    async def _worker(self):
+        """Take queued jobs and run one LLM analysis per set of measurements"""
+        # Started from inside a request; don't record spans into its trace
+        detach()
+        while True:
+            jobs = await self._next_jobs()
+            try:
+                for job in jobs:
+                    job.status = EnrichmentStatus.RUNNING
+                result = await self._analyze(jobs[0].measurements)
+                for job in jobs:
+                    job.result = result
+                    job.status = EnrichmentStatus.COMPLETED
+            except Exception as e:
+                for job in jobs:
+                    job.error = str(e)
+                    job.status = EnrichmentStatus.FAILED
+            finally:
+                finished_at = time.monotonic()
+                for job in jobs:
+                    job.finished_at = finished_at
+                    job.done.set()
+    
+    def _prune(self):
+        """Drop jobs that finished longer than the TTL ago"""
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    async def submit(self, measurements: GeometricMeasurements) -> EnrichmentJob:
+        """
+        Queue measurements for LLM enrichment
+        
+        Joins queued jobs with the same measurements, if there are any, so
+        they share one provider call.
+        
+        Args:
+            measurements: Calculated geometric measurements
+        
+        Returns:
+            The queued job (its id is handed back to the client)
+        
+        Raises:
+            ServerOverloadedError: If max_queued jobs are already waiting
+        """
+        self._ensure_workers()
+        self._prune()
+        
+        if self._queued >= self.max_queued:
+            self._rejected += 1
+            ADMISSION_REJECTED.inc(stage="enrichment", reason="queue_full")
+            raise ServerOverloadedError("enrichment", "queue_full", self._retry_after())
+        
+        job = EnrichmentJob(id=uuid.uuid4().hex, measurements=measurements)
+        self._jobs[job.id] = job
+        self._pending.setdefault(measurements.model_dump_json(), []).append(job)
+        self._queued += 1
+        self._wakeup.set()
+        return job
+    
+    def _retry_after(self) -> int:
+        """Whole seconds for the workers to get through the current backlog"""
+        service_seconds = self.admission.service_seconds if self.admission is not None else 1.0
+        return max(1, math.ceil(len(self._pending) * service_seconds / self.worker_count))
+    
+    def get(self, job_id: str) -> Optional[EnrichmentJob]:
+        """Look up a job by id"""
+        return self._jobs.get(job_id)
+    
+    async def wait(self, job_id: str, timeout: float) -> Optional[EnrichmentJob]:
+        """
+        Long-poll for a job to finish
+        
+        Args:
+            job_id: Enrichment id
+            timeout: Maximum seconds to wait (0 returns immediately)
+        
+        Returns:
+            The job in whatever state it reached, or None if unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is None or timeout <= 0 or job.done.is_set():
+            return job
+        
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+    
+    async def shutdown(self):
+        """Cancel worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._wakeup = None
@@ -0,0 +1,293 @@
+"""
+Landmark Backends - Face Mesh implementations behind VisionEngine
+The legacy Solutions FaceMesh graph and the MediaPipe Tasks FaceLandmarker,
+selected with the VISION_BACKEND setting
+"""
+import dataclasses
+import os
+import queue
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+FACE_LANDMARKER_MODEL_URL = (
+    "https://storage.googleapis.com/mediapipe-models/face_landmarker/"
+    "face_landmarker/float16/1/face_landmarker.task"
+)
+
+
+class LandmarkBackend:
+    """
+    Runs a face landmark model on one RGB image.
+    
+    VisionEngine borrows instances from a BackendPool, so implementations
+    see one image at a time and need no locking of their own. Only image-mode
+    instances are pooled: the tracking modes carry the previous frame's face
+    into the next call, which is only right for frames of one stream (live
+    sessions).
+    """
+    
+    name = ""
+    running_mode = "image"
+    
+    def detect(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Landmarks of the first face
+        
+        Args:
+            image: RGB image (C-contiguous uint8)
+        
+        Returns:
+            (478, 3) float64 landmarks normalized to the image, or None
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Release the underlying graph"""
+
+
+class FaceMeshBackend(LandmarkBackend):
+    """Legacy mp.solutions.face_mesh graph"""
+    
+    name = "face_mesh"
+    
+    def __init__(self, refine_landmarks: bool = True, running_mode: str = "image"):
+        """
+        Args:
+            refine_landmarks: Run the attention sub-model that refines eyes
+                and lips and adds the 10 iris points (478 instead of 468)
+            running_mode: "image" (static image mode) or "video" (tracking
+                across calls, static_image_mode=False)
+        """
+        import mediapipe as mp  # Lazy, see VisionEngine.__init__
+        
+        if running_mode not in ("image", "video"):
+            raise ValueError(f"face_mesh has no {running_mode!r} running mode")
+        self.running_mode = running_mode
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=running_mode == "image",
+            max_num_faces=1,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+    
+    def detect(self, image: np.ndarray) -> Optional[np.ndarray]:
+        results = self.face_mesh.process(image)
+        if not results.multi_face_landmarks:
+            return None
+        return np.array(
+            [(landmark.x, landmark.y, landmark.z) for landmark in results.multi_face_landmarks[0].landmark]
+        )
+    
+    def close(self) -> None:
+        self.face_mesh.close()
+
+
+class FaceLandmarkerBackend(LandmarkBackend):
+    """
+    MediaPipe Tasks FaceLandmarker
+    
+    Running modes:
+    - image: every call detects from scratch (what face_mesh does)
+    - video: calls are frames of one stream; the previous face's region is
+      reused and detection only re-runs when tracking is lost
+    - live_stream: frames go through detect_async and the result arrives on
+      the task's callback thread; detect() waits for it
+    
+    The CPU delegate runs the models through XNNPACK with a configurable
+    thread count, which the legacy graph does not expose.
+    """
+    
+    name = "face_landmarker"
+    
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        running_mode: str = "image",
+        delegate: Optional[str] = None,
+        threads: Optional[int] = None
+    ):
+        """
+        Args:
+            model_path: face_landmarker.task bundle, defaults to settings
+            running_mode: "image", "video" or "live_stream"
+            delegate: "cpu" or "gpu", defaults to settings
+            threads: XNNPACK threads for the CPU delegate (0 = MediaPipe's default)
+        
+        Raises:
+            FileNotFoundError: If the model bundle is missing
+        """
+        import mediapipe as mp  # Lazy, see VisionEngine.__init__
+        from mediapipe.tasks.python import vision
+        
+        model_path = model_path or settings.face_landmarker_model_path
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(
+                f"FaceLandmarker model not found at {model_path!r}. "
+                f"Download it from {FACE_LANDMARKER_MODEL_URL}"
+            )
+        self.running_mode = running_mode
+        threads = settings.face_landmarker_threads if threads is None else threads
+        
+        self._mp = mp
+        self._timestamp_ms = 0
+        self._pending: Dict[int, Future] = {}
+        
+        mode = {
+            "image": vision.RunningMode.IMAGE,
+            "video": vision.RunningMode.VIDEO,
+            "live_stream": vision.RunningMode.LIVE_STREAM,
+        }[self.running_mode]
+        self.landmarker = vision.FaceLandmarker.create_from_options(vision.FaceLandmarkerOptions(
+            base_options=_base_options(model_path, delegate or settings.face_landmarker_delegate, threads),
+            running_mode=mode,
+            num_faces=1,
+            min_face_detection_confidence=0.5,
+            min_face_presence_confidence=0.5,
+            min_tracking_confidence=0.5,
+            result_callback=self._on_result if self.running_mode == "live_stream" else None
+        ))
+    
+    def _next_timestamp(self) -> int:
+        # Video and live-stream modes need strictly increasing timestamps
+        self._timestamp_ms = max(self._timestamp_ms + 1, int(time.monotonic() * 1000))
+        return self._timestamp_ms
+    
+    def _on_result(self, result, image, timestamp_ms: int) -> None:
+        future = self._pending.pop(timestamp_ms, None)
+        if future is not None:
+            future.set_result(result)
+    
+    def detect(self, image: np.ndarray) -> Optional[np.ndarray]:
+        mp_image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=image)
+        
+        if self.running_mode == "image":
+            result = self.landmarker.detect(mp_image)
+        elif self.running_mode == "video":
+            result = self.landmarker.detect_for_video(mp_image, self._next_timestamp())
+        else:
+            timestamp = self._next_timestamp()
+            future = self._pending[timestamp] = Future()
+            try:
+                self.landmarker.detect_async(mp_image, timestamp)
+                result = future.result(timeout=settings.face_landmarker_timeout_seconds)
+            finally:
+                self._pending.pop(timestamp, None)
+        
+        if not result.face_landmarks:
+            return None
+        return np.array([(landmark.x, landmark.y, landmark.z) for landmark in result.face_landmarks[0]])
+    
+    def close(self) -> None:
+        self.landmarker.close()
+
+
+def _base_options(model_path: str, delegate: str, threads: int):
+    """Tasks BaseOptions, with XNNPACK threads when set (not exposed by the Python API)"""
+    from mediapipe.tasks.python import BaseOptions
+    from mediapipe.tasks.cc.core.proto import acceleration_pb2
+    from mediapipe.calculators.tensor import inference_calculator_pb2
+    
+    @dataclasses.dataclass
+    class _ThreadedBaseOptions(BaseOptions):
+        num_threads: int = 0
+        
+        def to_pb2(self):
+            proto = super().to_pb2()
+            if self.delegate == BaseOptions.Delegate.CPU and self.num_threads > 0:
+                xnnpack = inference_calculator_pb2.InferenceCalculatorOptions.Delegate.Xnnpack(
+                    num_threads=self.num_threads
+                )
+                proto.acceleration.CopyFrom(acceleration_pb2.Acceleration(xnnpack=xnnpack))
+            return proto
+    
+    return _ThreadedBaseOptions(
+        model_asset_path=model_path,
+        delegate=BaseOptions.Delegate.GPU if delegate == "gpu" else BaseOptions.Delegate.CPU,
+        num_threads=threads
+    )
+
+
+BACKENDS = {
+    FaceMeshBackend.name: FaceMeshBackend,
+    FaceLandmarkerBackend.name: FaceLandmarkerBackend,
+}
+
+
+def create_backend(
+    name: Optional[str] = None,
+    refine_landmarks: bool = True,
+    running_mode: str = "image"
+) -> LandmarkBackend:
+    """
+    Instantiate a backend by name, defaulting to the VISION_BACKEND setting
+    
+    Args:
+        name: Key of BACKENDS
+        refine_landmarks: face_mesh only; the Tasks model always outputs 478 points
+        running_mode: "image", or "video"/"live_stream" for the frames of one
+            stream (face_mesh tracks in both)
+    """
+    name = name or settings.vision_backend
+    if name == FaceMeshBackend.name:
+        return FaceMeshBackend(
+            refine_landmarks=refine_landmarks,
+            running_mode="image" if running_mode == "image" else "video"
+        )
+    return BACKENDS[name](running_mode=running_mode)
+
+
+class BackendPool:
+    """
+    Fixed set of backend instances, each used by one caller at a time
+    
+    Graphs are not thread-safe; with several instances, that many images
+    are inferred in parallel (useful only with spare cores). Consecutive
+    calls on one instance come from unrelated uploads, so only image-mode
+    backends are accepted.
+    """
+    
+    def __init__(self, factory: Callable[[], LandmarkBackend], size: int = 1):
+        """
+        Args:
+            factory: Builds one backend instance
+            size: Instances to build up front
+        
+        Raises:
+            ValueError: If the factory builds a tracking (video/live_stream) backend
+        """
+        self.size = max(1, size)
+        self._idle: "queue.SimpleQueue[LandmarkBackend]" = queue.SimpleQueue()
+        self._all = [factory() for _ in range(self.size)]
+        tracking = [backend for backend in self._all if backend.running_mode != "image"]
+        if tracking:
+            self.close()
+            raise ValueError(
+                f"Pooled landmark backends must run in image mode, got {tracking[0].running_mode!r}"
+            )
+        for backend in self._all:
+            self._idle.put(backend)
+    
+    @property
+    def idle(self) -> int:
+        """Instances not currently borrowed"""
+        return self._idle.qsize()
+    
+    @contextmanager
+    def acquire(self) -> Iterator[LandmarkBackend]:
+        """Borrow an instance, waiting for one to be returned if all are busy"""
+        backend = self._idle.get()
+        try:
+            yield backend
+        finally:
+            self._idle.put(backend)
+    
+    def close(self) -> None:
+        for backend in self._all:
+            backend.close()
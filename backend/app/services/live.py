@@ -0,0 +1,190 @@
+"""
+Live Mode - Per-session landmark tracking for camera streams
+Tracks one face across frames (VISION_BACKEND in a tracking running mode),
+smooths the landmarks and recomputes the measurements for every processed frame
+"""
+import math
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import registry, stage
+from app.models.schemas import GeometricMeasurements
+from app.services.geometry_calc import GeometryCalculator
+from app.services.landmark_backends import create_backend
+from app.services.vision_engine import ENGINE_PROFILES, VisionEngine
+
+LIVE_SESSIONS = registry.gauge("adam_live_sessions", "Open live-mode WebSocket sessions")
+
+
+class OneEuroFilter:
+    """
+    One Euro filter over a whole landmark array.
+    
+    Smooths heavily while the face is still (removes jitter) and lets fast
+    motion through with little lag: the cutoff frequency rises with the
+    filtered speed of each coordinate.
+    """
+    
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0, d_cutoff: float = 1.0):
+        """
+        Args:
+            min_cutoff: Cutoff (Hz) at rest; lower is smoother
+            beta: Cutoff increase per unit of speed; higher is less laggy
+            d_cutoff: Cutoff (Hz) for the speed estimate
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+    
+    def reset(self) -> None:
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t = 0.0
+    
+    @staticmethod
+    def _alpha(dt: float, cutoff):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+    
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        """
+        Filter one sample
+        
+        Args:
+            x: Landmark array (any shape, float)
+            t: Sample time in seconds
+        
+        Returns:
+            Smoothed array of the same shape
+        """
+        if self._x is None or x.shape != self._x.shape:
+            self._x, self._dx, self._t = x.copy(), np.zeros_like(x), t
+            return self._x
+        
+        dt = max(t - self._t, 1e-3)
+        self._t = t
+        
+        dx = (x - self._x) / dt
+        self._dx += self._alpha(dt, self.d_cutoff) * (dx - self._dx)
+        
+        alpha = self._alpha(dt, self.min_cutoff + self.beta * np.abs(self._dx))
+        self._x = self._x + alpha * (x - self._x)
+        return self._x
+
+
+class LiveSession:
+    """
+    State of one live-mode connection.
+    
+    Owns a landmark backend in tracking mode (FACE_LANDMARKER_LIVE_MODE for
+    face_landmarker, static_image_mode=False for face_mesh): after the first
+    detection, later frames only run the landmark model on the tracked
+    region, which is what makes per-frame analysis cheap. Frames of one
+    session are processed one at a time.
+    """
+    
+    def __init__(self, vision_engine: VisionEngine, geometry_calc: GeometryCalculator):
+        self.vision_engine = vision_engine
+        self.geometry_calc = geometry_calc
+        self.backend = create_backend(
+            settings.vision_backend,
+            refine_landmarks=ENGINE_PROFILES[settings.live_profile].refine_landmarks,
+            running_mode=settings.face_landmarker_live_mode
+        )
+        self.smoother = OneEuroFilter(
+            min_cutoff=settings.live_smoothing_min_cutoff,
+            beta=settings.live_smoothing_beta
+        )
+        self.max_frame_side = settings.live_max_frame_side
+        self.frames = 0
+        self.landmarks: Optional[np.ndarray] = None
+        self.measurements: Optional[GeometricMeasurements] = None
+        # Held for a whole frame, so close() waits for an in-flight one
+        self._lock = threading.Lock()
+    
+    def process_frame(self, image_bytes: bytes, timestamp: float) -> Optional[GeometricMeasurements]:
+        """
+        Decode a frame, track the face and update the smoothed measurements
+        
+        Args:
+            image_bytes: Encoded frame (JPEG, PNG, WebP)
+            timestamp: Capture or arrival time in seconds (drives the smoothing)
+        
+        Returns:
+            Measurements for this frame, or None if no face is tracked
+        """
+        with stage("live_frame"), self._lock:
+            image = self.vision_engine.decode_image_bytes(image_bytes)
+            height, width = image.shape[:2]
+            scale = self.max_frame_side / max(height, width)
+            if scale < 1.0:
+                import cv2
+                
+                # Landmarks are normalized, so downscaling doesn't change them
+                image = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+            
+            raw = self.backend.detect(image)
+            self.frames += 1
+            
+            if raw is None:
+                # Tracking lost: don't smooth across to the next face
+                self.smoother.reset()
+                self.landmarks = None
+                self.measurements = None
+                return None
+            
+            self.landmarks = self.smoother(raw.astype(np.float32), timestamp)
+            self.measurements = self.geometry_calc.calculate_all_measurements(
+                front_landmarks=self.landmarks.tolist(),
+                side_landmarks=None
+            )
+            return self.measurements
+    
+    def close(self) -> None:
+        with self._lock:
+            self.backend.close()
+
+
+class LiveSessionManager:
+    """
+    Caps concurrent live sessions per worker.
+    Every session holds its own landmark graph (memory and a CPU share).
+    """
+    
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = settings.live_max_sessions if max_sessions is None else max_sessions
+        self._open = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def open_sessions(self) -> int:
+        return self._open
+    
+    def stats(self) -> dict:
+        return {"open": self._open, "max": self.max_sessions}
+    
+    def open(self, vision_engine: VisionEngine, geometry_calc: GeometryCalculator) -> Optional[LiveSession]:
+        """New session, or None when the worker is at its limit"""
+        with self._lock:
+            if self._open >= self.max_sessions:
+                return None
+            self._open += 1
+            LIVE_SESSIONS.set(self._open)
+        try:
+            return LiveSession(vision_engine, geometry_calc)
+        except Exception:
+            self._release()
+            raise
+    
+    def close(self, session: LiveSession) -> None:
+        session.close()
+        self._release()
+    
+    def _release(self) -> None:
+        with self._lock:
+            self._open -= 1
+            LIVE_SESSIONS.set(self._open)
@@ -6,10 +6,17 @@ import json
 import re
 from typing import Optional
 
+from starlette.concurrency import run_in_threadpool
+
 from app.core.config import settings
 from app.core.prompts import AESTHETIC_EXPERT_PROMPT, format_analysis_prompt
 from app.core.constants import get_tier_from_score
+from app.core.metrics import LLM_FALLBACKS, stage
 from app.models.schemas import GeometricMeasurements, AnalysisResult, RadarData
+from app.services.percentiles import PercentileIndex
+from app.services.scoring import RuleScoringEngine
+from app.services.shared_cache import SharedCache, content_key
+from app.services import llm_clients
 
 
 class LLMAnalyzer:
@@ -18,15 +25,28 @@ class LLMAnalyzer:
     Sends measurements to Claude/Gemini for expert analysis.
     """
     
-    def __init__(self, provider: Optional[str] = None):
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        scoring_engine: Optional[RuleScoringEngine] = None,
+        cache: Optional[SharedCache] = None,
+        percentile_index: Optional[PercentileIndex] = None
+    ):
         """
         Initialize LLM client
         
         Args:
             provider: 'claude' or 'gemini', defaults to settings
+            scoring_engine: Rule scorer used when the LLM is unavailable
+            cache: Cross-worker cache of LLM responses by prompt
+            percentile_index: Reference population for AnalysisResult.percentiles
         """
         self.provider = provider or settings.llm_provider
+        self.scoring_engine = scoring_engine or RuleScoringEngine()
+        self.cache = cache
+        self.percentile_index = percentile_index
         self._client = None
+        self._async_client = None
     
     @property
     def client(self):
@@ -38,33 +58,49 @@ class LLMAnalyzer:
                 self._client = self._init_gemini()
         return self._client
     
-    def _init_claude(self):
-        """Initialize Anthropic Claude client"""
+    @property
+    def async_client(self):
+        """
+        Lazy initialization of the asyncio LLM client
+        
+        Awaiting requests on this client lets callers cancel the in-flight
+        HTTP request (e.g. when the browser disconnects).
+        """
+        if self._async_client is None:
+            if self.provider == "claude":
+                self._async_client = self._init_claude(async_client=True)
+            else:
+                # GenerativeModel serves both sync and async calls
+                self._async_client = self.client
+        return self._async_client
+    
+    async def _get_async_client(self):
+        """async_client, built in the threadpool on first use (the SDK import is slow)"""
+        if self._async_client is None:
+            await run_in_threadpool(lambda: self.async_client)
+        return self._async_client
+    
+    def _init_claude(self, async_client: bool = False):
+        """Get the shared (pooled) Anthropic Claude client"""
         try:
-            from anthropic import Anthropic
-            return Anthropic(api_key=settings.anthropic_api_key)
+            return llm_clients.get_anthropic_client(async_client=async_client)
         except ImportError:
-            raise ImportError("anthropic package not installed. Run: pip install anthropic")
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Claude client: {e}")
     
     def _init_gemini(self, model_name: str = None):
-        """Initialize Google Gemini client with specific model"""
+        """Get the shared Google Gemini client for a specific model"""
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=settings.google_api_key)
-            model = model_name or settings.gemini_model
-            return genai.GenerativeModel(model)
+            return llm_clients.get_gemini_model(model_name)
         except ImportError:
-            raise ImportError("google-generativeai package not installed. Run: pip install google-generativeai")
+            raise
         except Exception as e:
             raise RuntimeError(f"Failed to initialize Gemini client: {e}")
     
     def get_gemini_model(self, model_name: str):
         """Get a Gemini client for a specific model"""
-        import google.generativeai as genai
-        genai.configure(api_key=settings.google_api_key)
-        return genai.GenerativeModel(model_name)
+        return llm_clients.get_gemini_model(model_name)
     
     def _parse_json_response(self, text: str) -> dict:
         """
@@ -72,7 +108,7 @@ class LLMAnalyzer:
         
         Args:
             text: Raw LLM response text
-            
+        
         Returns:
             Parsed JSON dictionary
         """
@@ -97,7 +133,7 @@ class LLMAnalyzer:
         
         Args:
             user_prompt: User message with measurements
-            
+        
         Returns:
             Response text
         """
@@ -117,7 +153,7 @@ class LLMAnalyzer:
         
         Args:
             user_prompt: User message with measurements
-            
+        
         Returns:
             Response text
         """
@@ -125,37 +161,138 @@ class LLMAnalyzer:
         response = self.client.generate_content(full_prompt)
         return response.text
     
+    async def _call_claude_async(self, user_prompt: str) -> str:
+        """Make a cancellable API call to Claude"""
+        client = await self._get_async_client()
+        response = await client.messages.create(
+            model=settings.claude_model,
+            max_tokens=2000,
+            system=AESTHETIC_EXPERT_PROMPT,
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+        return response.content[0].text
+    
+    async def _call_gemini_async(self, user_prompt: str) -> str:
+        """Make a cancellable API call to Gemini"""
+        full_prompt = f"{AESTHETIC_EXPERT_PROMPT}\n\n{user_prompt}"
+        model = await self._get_async_client()
+        response = await model.generate_content_async(full_prompt)
+        return response.text
+    
+    async def analyze_async(self, measurements: GeometricMeasurements) -> AnalysisResult:
+        """
+        Async variant of analyze()
+        
+        Cancelling the awaiting task aborts the provider HTTP request instead of
+        letting it run to completion in a worker thread.
+        
+        Args:
+            measurements: Calculated geometric measurements
+        
+        Returns:
+            Complete analysis result with score, tier, and recommendations
+        """
+        with stage("prompt"):
+            user_prompt = format_analysis_prompt(measurements.model_dump())
+        
+        cache_key = self._cache_key(user_prompt)
+        if cache_key is not None:
+            cached = await run_in_threadpool(self.cache.get, cache_key)
+            if cached is not None:
+                return self._result_from_response(cached.decode(), measurements)
+        
+        try:
+            with stage("llm"):
+                if self.provider == "claude":
+                    response_text = await self._call_claude_async(user_prompt)
+                else:
+                    response_text = await self._call_gemini_async(user_prompt)
+        except Exception:
+            return self._fallback_analysis(measurements, reason="llm_error")
+        
+        result = self._parse_result(response_text, measurements)
+        if result is None:
+            return self._fallback_analysis(measurements, reason="parse_error")
+        if cache_key is not None:
+            await run_in_threadpool(self.cache.put, cache_key, response_text.encode())
+        return result
+    
     def analyze(self, measurements: GeometricMeasurements) -> AnalysisResult:
         """
         Perform LLM analysis of facial measurements
         
         Args:
             measurements: Calculated geometric measurements
-            
+        
         Returns:
             Complete analysis result with score, tier, and recommendations
         """
         # Format the prompt with actual measurements
-        user_prompt = format_analysis_prompt(measurements.model_dump())
+        with stage("prompt"):
+            user_prompt = format_analysis_prompt(measurements.model_dump())
+        
+        cache_key = self._cache_key(user_prompt)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return self._result_from_response(cached.decode(), measurements)
         
         # Call the appropriate LLM
         try:
-            if self.provider == "claude":
-                response_text = self._call_claude(user_prompt)
-            else:
-                response_text = self._call_gemini(user_prompt)
+            with stage("llm"):
+                if self.provider == "claude":
+                    response_text = self._call_claude(user_prompt)
+                else:
+                    response_text = self._call_gemini(user_prompt)
         except Exception as e:
             # Fallback to rule-based analysis if LLM fails
-            return self._fallback_analysis(measurements)
+            return self._fallback_analysis(measurements, reason="llm_error")
         
-        # Parse the response
-        try:
-            analysis_data = self._parse_json_response(response_text)
-        except ValueError:
-            return self._fallback_analysis(measurements)
+        result = self._parse_result(response_text, measurements)
+        if result is None:
+            return self._fallback_analysis(measurements, reason="parse_error")
+        if cache_key is not None:
+            self.cache.put(cache_key, response_text.encode())
+        return result
+    
+    def _cache_key(self, user_prompt: str) -> Optional[str]:
+        """
+        Shared-cache key of a response: provider, model and both prompts
         
-        # Validate and construct result
-        return self._construct_result(analysis_data, measurements)
+        Measurements are rounded before they reach the prompt, so the same
+        face photographed twice usually maps to the same key.
+        """
+        if self.cache is None:
+            return None
+        model = settings.claude_model if self.provider == "claude" else settings.gemini_model
+        return content_key("analysis", self.provider, model, AESTHETIC_EXPERT_PROMPT, user_prompt)
+    
+    def _result_from_response(
+        self,
+        response_text: str,
+        measurements: GeometricMeasurements
+    ) -> AnalysisResult:
+        """Parse raw LLM output into a result, falling back to rules on bad JSON"""
+        result = self._parse_result(response_text, measurements)
+        if result is None:
+            return self._fallback_analysis(measurements, reason="parse_error")
+        return result
+    
+    def _parse_result(
+        self,
+        response_text: str,
+        measurements: GeometricMeasurements
+    ) -> Optional[AnalysisResult]:
+        """Parse raw LLM output into a result, or None on bad JSON or fields"""
+        with stage("parse"):
+            try:
+                analysis_data = self._parse_json_response(response_text)
+                return self._construct_result(analysis_data, measurements)
+            except (ValueError, TypeError):
+                # ValidationError is a ValueError
+                return None
     
     def _construct_result(
         self, 
@@ -168,22 +305,34 @@ class LLMAnalyzer:
         Args:
             analysis_data: Parsed JSON from LLM
             measurements: Original measurements
-            
+        
         Returns:
             Validated AnalysisResult
+        
+        Raises:
+            ValueError: Missing or malformed fields (including ValidationError)
+            TypeError: A numeric field is null or not a number
         """
+        if not isinstance(analysis_data, dict):
+            raise ValueError("LLM response is not a JSON object")
+        
+        def clamp(value) -> float:
+            return min(10.0, max(1.0, float(value)))
+        
         # Extract radar data
         radar_raw = analysis_data.get("radar_data", {})
+        if not isinstance(radar_raw, dict):
+            raise ValueError("radar_data is not a JSON object")
         radar_data = RadarData(
-            eyes=min(10, max(1, float(radar_raw.get("eyes", 5)))),
-            jaw=min(10, max(1, float(radar_raw.get("jaw", 5)))),
-            midface=min(10, max(1, float(radar_raw.get("midface", 5)))),
-            symmetry=min(10, max(1, float(radar_raw.get("symmetry", 5)))),
-            harmony=min(10, max(1, float(radar_raw.get("harmony", 5))))
+            eyes=clamp(radar_raw.get("eyes", 5)),
+            jaw=clamp(radar_raw.get("jaw", 5)),
+            midface=clamp(radar_raw.get("midface", 5)),
+            symmetry=clamp(radar_raw.get("symmetry", 5)),
+            harmony=clamp(radar_raw.get("harmony", 5))
         )
         
         # Validate score range
-        score = min(10.0, max(1.0, float(analysis_data.get("score", 5.0))))
+        score = clamp(analysis_data.get("score", 5.0))
         
         # Get tier (use LLM's tier or derive from score)
         tier = analysis_data.get("tier")
@@ -191,130 +340,38 @@ class LLMAnalyzer:
             tier_info = get_tier_from_score(score)
             tier = tier_info["label"]
         
+        percentiles = None
+        if self.percentile_index is not None:
+            percentiles = self.percentile_index.percentiles(measurements)
+        
+        # LLM output is untrusted: validate, so a string where a list belongs
+        # fails here instead of being split into characters
         return AnalysisResult(
             score=score,
-            tier=tier,
+            tier=str(tier),
             analysis=str(analysis_data.get("analysis", "Analysis not available.")),
-            strengths=list(analysis_data.get("strengths", [])),
-            weaknesses=list(analysis_data.get("weaknesses", [])),
+            strengths=analysis_data.get("strengths", []),
+            weaknesses=analysis_data.get("weaknesses", []),
             advice=str(analysis_data.get("advice", "No specific recommendations.")),
             radar_data=radar_data,
-            measurements=measurements
+            measurements=measurements,
+            percentiles=percentiles
         )
     
-    def _fallback_analysis(self, measurements: GeometricMeasurements) -> AnalysisResult:
+    def _fallback_analysis(
+        self,
+        measurements: GeometricMeasurements,
+        reason: str = "llm_error"
+    ) -> AnalysisResult:
         """
         Generate rule-based analysis when LLM is unavailable
         
         Args:
             measurements: Calculated measurements
-            
+            reason: Why the fallback was used ('llm_error' or 'parse_error')
+        
         Returns:
             Basic analysis result
         """
-        # Calculate basic score from measurements
-        scores = []
-        strengths = []
-        weaknesses = []
-        
-        # Canthal tilt scoring
-        ct = measurements.canthal_tilt
-        if 4 <= ct <= 8:
-            scores.append(9)
-            strengths.append(f"Positive canthal tilt ({ct:.1f}°) creating hunter eye appearance")
-        elif 0 <= ct < 4:
-            scores.append(7)
-            strengths.append(f"Neutral to slightly positive canthal tilt ({ct:.1f}°)")
-        elif ct < 0:
-            scores.append(5)
-            weaknesses.append(f"Negative canthal tilt ({ct:.1f}°) may appear tired")
-        else:
-            scores.append(7)
-        
-        # Bigonial ratio scoring
-        ratio = measurements.bigonial_bizygomatic_ratio
-        if 0.75 <= ratio <= 0.80:
-            scores.append(9)
-            strengths.append(f"Ideal jaw-to-cheekbone ratio ({ratio*100:.0f}%)")
-        elif 0.70 <= ratio < 0.75 or 0.80 < ratio <= 0.85:
-            scores.append(7)
-        else:
-            scores.append(5)
-            weaknesses.append(f"Jaw-to-cheekbone ratio ({ratio*100:.0f}%) outside ideal range")
-        
-        # Gonial angle scoring
-        ga = measurements.gonial_angle
-        if 125 <= ga <= 130:
-            scores.append(9)
-            strengths.append(f"Well-defined gonial angle ({ga:.0f}°)")
-        elif 120 <= ga < 125 or 130 < ga <= 135:
-            scores.append(7)
-        else:
-            scores.append(5)
-            weaknesses.append(f"Gonial angle ({ga:.0f}°) outside ideal range")
-        
-        # Midface ratio scoring
-        mf = measurements.midface_ratio
-        if 0.43 <= mf <= 0.44:
-            scores.append(9)
-            strengths.append("Golden ratio midface proportions")
-        elif 0.40 <= mf < 0.43 or 0.44 < mf <= 0.47:
-            scores.append(7)
-        else:
-            scores.append(5)
-            weaknesses.append(f"Midface ratio ({mf*100:.0f}%) deviates from ideal")
-        
-        # Symmetry scoring
-        sym = measurements.symmetry_score
-        if sym >= 0.95:
-            scores.append(9)
-            strengths.append(f"Excellent facial symmetry ({sym*100:.0f}%)")
-        elif sym >= 0.90:
-            scores.append(7)
-            strengths.append(f"Good facial symmetry ({sym*100:.0f}%)")
-        else:
-            scores.append(5)
-            weaknesses.append(f"Facial asymmetry detected ({sym*100:.0f}%)")
-        
-        # Calculate final score
-        final_score = sum(scores) / len(scores) if scores else 5.0
-        final_score = round(final_score, 1)
-        
-        # Get tier
-        tier_info = get_tier_from_score(final_score)
-        
-        # Generate radar data from individual scores
-        radar_data = RadarData(
-            eyes=min(10, max(1, scores[0] if len(scores) > 0 else 5)),
-            jaw=min(10, max(1, (scores[1] + scores[2]) / 2 if len(scores) > 2 else 5)),
-            midface=min(10, max(1, scores[3] if len(scores) > 3 else 5)),
-            symmetry=min(10, max(1, scores[4] if len(scores) > 4 else 5)),
-            harmony=final_score
-        )
-        
-        analysis = (
-            f"Based on the geometric analysis of your facial features, "
-            f"you have achieved an overall score of {final_score}/10, "
-            f"placing you in the {tier_info['label']} tier. "
-            f"{tier_info['description']}. "
-            f"Your face shows {len(strengths)} notable strengths and "
-            f"{len(weaknesses)} areas that could be improved."
-        )
-        
-        advice = (
-            "Consider maintaining good posture and practicing proper tongue posture (mewing) "
-            "for long-term facial development. A lower body fat percentage can help "
-            "maximize facial definition. These scores are based on geometric measurements "
-            "and should be taken as informational rather than definitive."
-        )
-        
-        return AnalysisResult(
-            score=final_score,
-            tier=tier_info["label"],
-            analysis=analysis,
-            strengths=strengths if strengths else ["Analysis in progress"],
-            weaknesses=weaknesses if weaknesses else ["No major issues detected"],
-            advice=advice,
-            radar_data=radar_data,
-            measurements=measurements
-        )
+        LLM_FALLBACKS.inc(reason=reason)
+        return self.scoring_engine.analyze(measurements)
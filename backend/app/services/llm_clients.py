@@ -0,0 +1,205 @@
+"""
+LLM Clients - Shared, pooled provider clients
+One client per provider (and Gemini model) per process, so keep-alive
+connections are reused instead of paying TCP + TLS setup on every request
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+_anthropic_clients: Dict[bool, object] = {}
+_gemini_models: Dict[str, object] = {}
+_gemini_configured = False
+
+
+def _http_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+        keepalive_expiry=settings.llm_keepalive_seconds
+    )
+
+
+def get_anthropic_client(async_client: bool = False):
+    """
+    Shared Anthropic client with a tuned keep-alive pool
+    
+    Args:
+        async_client: Return the AsyncAnthropic client instead of the sync one
+    """
+    client = _anthropic_clients.get(async_client)
+    if client is None:
+        try:
+            import anthropic
+        except ImportError:
+            raise ImportError("anthropic package not installed. Run: pip install anthropic")
+        
+        if async_client:
+            client = anthropic.AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                timeout=settings.llm_timeout_seconds,
+                http_client=anthropic.DefaultAsyncHttpxClient(limits=_http_limits())
+            )
+        else:
+            client = anthropic.Anthropic(
+                api_key=settings.anthropic_api_key,
+                timeout=settings.llm_timeout_seconds,
+                http_client=anthropic.DefaultHttpxClient(limits=_http_limits())
+            )
+        _anthropic_clients[async_client] = client
+    return client
+
+
+def _configure_gemini():
+    """
+    Configure google-generativeai once per process
+    
+    genai.configure() discards the SDK's cached service clients (and their
+    open channels), so it must not run per request.
+    """
+    global _gemini_configured
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        raise ImportError("google-generativeai package not installed. Run: pip install google-generativeai")
+    
+    if not _gemini_configured:
+        genai.configure(api_key=settings.google_api_key)
+        _gemini_configured = True
+    return genai
+
+
+def get_gemini_model(model_name: Optional[str] = None):
+    """
+    Shared GenerativeModel for a model name (defaults to settings.gemini_model)
+    
+    Models share the SDK's per-process service clients, so every model reuses
+    the same connections.
+    """
+    model_name = model_name or settings.gemini_model
+    model = _gemini_models.get(model_name)
+    if model is None:
+        genai = _configure_gemini()
+        model = _gemini_models[model_name] = genai.GenerativeModel(model_name)
+    return model
+
+
+async def get_anthropic_client_async():
+    """
+    Shared AsyncAnthropic client for async callers
+    
+    The first call imports the SDK and builds the client, so that runs in the
+    threadpool instead of stalling the event loop.
+    """
+    client = _anthropic_clients.get(True)
+    if client is None:
+        client = await run_in_threadpool(get_anthropic_client, True)
+    return client
+
+
+async def get_gemini_model_async(model_name: Optional[str] = None):
+    """
+    get_gemini_model() for async callers
+    
+    Importing google.generativeai takes about a second, so a model that
+    doesn't exist yet is built in the threadpool.
+    """
+    model = _gemini_models.get(model_name or settings.gemini_model)
+    if model is None:
+        model = await run_in_threadpool(get_gemini_model, model_name)
+    return model
+
+
+def build() -> str:
+    """
+    Create the configured provider's client (SDK import + construction)
+    
+    Blocking; the lifespan runs it in the threadpool, with or without
+    warm-up, so no request builds it on the event loop.
+    
+    Returns:
+        "ok", or "skipped" without an API key
+    """
+    if settings.llm_provider == "claude":
+        if not settings.anthropic_api_key:
+            return "skipped"
+        get_anthropic_client(async_client=True)
+    else:
+        if not settings.google_api_key:
+            return "skipped"
+        get_gemini_model()
+    return "ok"
+
+
+async def _warm_anthropic() -> None:
+    # Any authenticated round trip opens a pooled connection; listing models is free
+    client = await get_anthropic_client_async()
+    await client.models.list(limit=1)
+
+
+async def _warm_gemini() -> None:
+    # count_tokens is free and goes through the same async channel as generate_content_async
+    model = await get_gemini_model_async()
+    await model.count_tokens_async("ping")
+
+
+async def warm_up(timeout: Optional[float] = None) -> Tuple[str, Optional[float]]:
+    """
+    Build the configured provider's client and open a connection to it
+    
+    Failures (no network, bad key) are swallowed: warm-up is an optimization
+    and must never block startup for longer than `timeout`.
+    
+    Args:
+        timeout: Seconds to spend at most, defaults to settings
+    
+    Returns:
+        ("ok", seconds taken), ("skipped", None) without an API key,
+        or ("failed", seconds spent)
+    """
+    if settings.llm_provider == "claude":
+        if not settings.anthropic_api_key:
+            return "skipped", None
+        warm = _warm_anthropic
+    else:
+        if not settings.google_api_key:
+            return "skipped", None
+        warm = _warm_gemini
+    
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(warm(), timeout=timeout or settings.llm_warmup_timeout_seconds)
+    except Exception:
+        return "failed", time.perf_counter() - start
+    return "ok", time.perf_counter() - start
+
+
+def pool_stats() -> dict:
+    """Configured pool size and whether the provider client exists yet"""
+    if settings.llm_provider == "claude":
+        client_ready = True in _anthropic_clients
+    else:
+        client_ready = settings.gemini_model in _gemini_models
+    return {
+        "provider": settings.llm_provider,
+        "api_key_configured": bool(
+            settings.anthropic_api_key if settings.llm_provider == "claude" else settings.google_api_key
+        ),
+        "client_ready": client_ready,
+        "max_connections": settings.llm_max_connections,
+    }
+
+
+async def close() -> None:
+    """Close pooled connections (lifespan shutdown)"""
+    for async_client, client in list(_anthropic_clients.items()):
+        if async_client:
+            await client.close()
+        else:
+            client.close()
+    _anthropic_clients.clear()
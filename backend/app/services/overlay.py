@@ -0,0 +1,221 @@
+"""
+Overlay Renderer - Annotated landmark images
+Draws points, the Face Mesh tessellation and measurement lines in a few
+batched OpenCV/NumPy calls, and caches the encoded result by image hash
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.constants import LANDMARK_INDICES, MEASUREMENT_LINES
+from app.core.metrics import record_cache
+from app.services.shared_cache import SharedCache
+
+# Measurement segments as index pairs, grouped per measurement
+_MEASUREMENT_EDGES = {
+    name: np.array([(LANDMARK_INDICES[a], LANDMARK_INDICES[b]) for a, b in pairs], dtype=np.int32)
+    for name, pairs in MEASUREMENT_LINES.items()
+}
+
+# RGB colors
+MESH_COLOR = (200, 200, 200)
+POINT_COLOR = (0, 255, 0)
+MEASUREMENT_COLORS = {
+    "canthal_tilt": (255, 64, 64),
+    "bigonial_width": (255, 160, 0),
+    "bizygomatic_width": (255, 220, 0),
+    "gonial_angle": (255, 96, 255),
+    "midface": (64, 160, 255),
+    "facial_thirds": (0, 220, 220),
+}
+
+OVERLAY_MEDIA_TYPES = {"jpeg": "image/jpeg", "png": "image/png"}
+
+
+@lru_cache(maxsize=1)
+def _mesh_edges() -> np.ndarray:
+    """Edge list (E, 2) of the 468-point tessellation plus the iris rings"""
+    # Lazy: mediapipe is slow to import (see VisionEngine.__init__)
+    import mediapipe as mp
+    
+    face_mesh = mp.solutions.face_mesh
+    return np.array(sorted(face_mesh.FACEMESH_TESSELATION | face_mesh.FACEMESH_IRISES), dtype=np.int32)
+
+
+def _pixel_coords(landmarks: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Normalized (N, 3) landmarks -> (N, 2) int32 pixel coordinates"""
+    return np.rint(landmarks[:, :2] * (width, height)).astype(np.int32)
+
+
+def _disk_offsets(radius: int) -> np.ndarray:
+    """(K, 2) pixel offsets covering a filled disk"""
+    span = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(span, span)
+    inside = dx * dx + dy * dy <= radius * radius
+    return np.stack([dx[inside], dy[inside]], axis=1)
+
+
+def draw_points(image: np.ndarray, points: np.ndarray, color: Sequence[int], radius: int = 1) -> None:
+    """
+    Stamp a filled disk at every point in one vectorized assignment
+    
+    Args:
+        image: RGB image, modified in place
+        points: (N, 2) pixel coordinates
+        color: RGB color
+        radius: Disk radius in pixels
+    """
+    height, width = image.shape[:2]
+    stamped = (points[:, None, :] + _disk_offsets(radius)[None, :, :]).reshape(-1, 2)
+    inside = (
+        (stamped[:, 0] >= 0) & (stamped[:, 0] < width)
+        & (stamped[:, 1] >= 0) & (stamped[:, 1] < height)
+    )
+    stamped = stamped[inside]
+    image[stamped[:, 1], stamped[:, 0]] = color
+
+
+def draw_segments(image: np.ndarray, points: np.ndarray, edges: np.ndarray, color: Sequence[int], thickness: int = 1) -> None:
+    """
+    Draw every (a, b) edge between points with a single cv2.polylines call
+    
+    Args:
+        image: RGB image, modified in place
+        points: (N, 2) pixel coordinates
+        edges: (E, 2) point index pairs
+        color: RGB color
+        thickness: Line thickness in pixels
+    """
+    import cv2
+    
+    edges = edges[(edges < len(points)).all(axis=1)]
+    if len(edges):
+        cv2.polylines(image, points[edges], False, color, thickness, cv2.LINE_AA)
+
+
+def render_overlay(
+    image: np.ndarray,
+    landmarks: np.ndarray,
+    points: bool = True,
+    mesh: bool = True,
+    measurements: bool = True
+) -> np.ndarray:
+    """
+    Draw the requested layers on a copy of the image
+    
+    Args:
+        image: RGB image
+        landmarks: Normalized (N, 3) landmarks (lists are accepted too)
+        points: Draw every landmark
+        mesh: Draw the Face Mesh tessellation
+        measurements: Draw the lines used by GeometryCalculator
+    
+    Returns:
+        Annotated RGB image
+    """
+    output = image.copy()
+    height, width = image.shape[:2]
+    coords = _pixel_coords(np.asarray(landmarks, dtype=np.float32), width, height)
+    # Keep strokes visible on large photos
+    scale = max(1, round(min(width, height) / 500))
+    
+    if mesh:
+        draw_segments(output, coords, _mesh_edges(), MESH_COLOR, scale)
+    if points:
+        draw_points(output, coords, POINT_COLOR, scale)
+    if measurements:
+        for name, edges in _MEASUREMENT_EDGES.items():
+            draw_segments(output, coords, edges, MEASUREMENT_COLORS[name], 2 * scale)
+    return output
+
+
+def encode_overlay(image: np.ndarray, fmt: str = "jpeg", quality: Optional[int] = None) -> bytes:
+    """
+    Encode an RGB image as JPEG or PNG
+    
+    Args:
+        image: RGB image
+        fmt: "jpeg" or "png"
+        quality: JPEG quality, defaults to settings
+    """
+    import cv2
+    
+    bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    if fmt == "png":
+        ok, buffer = cv2.imencode(".png", bgr, [cv2.IMWRITE_PNG_COMPRESSION, 3])
+    else:
+        ok, buffer = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, quality or settings.overlay_jpeg_quality])
+    if not ok:
+        raise ValueError(f"Failed to encode overlay as {fmt}")
+    return buffer.tobytes()
+
+
+def overlay_id(image_bytes: bytes, fmt: str, points: bool, mesh: bool, measurements: bool) -> str:
+    """Stable id for an image and rendering options"""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(f"|{fmt}|{int(points)}{int(mesh)}{int(measurements)}".encode())
+    return digest.hexdigest()[:32]
+
+
+class OverlayCache:
+    """
+    Byte-bounded LRU of encoded overlays, keyed by overlay_id.
+    Per worker process; a miss just means the overlay is drawn again.
+    With a SharedCache behind it, overlays drawn by one worker are also
+    served by the others (and GET /overlay/{id} works on any worker).
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None, shared: Optional[SharedCache] = None):
+        """
+        Args:
+            max_bytes: Total encoded size kept, defaults to settings
+            shared: Second tier consulted on a miss, written on put
+        """
+        self.max_bytes = int(settings.overlay_cache_mb * 1024 * 1024) if max_bytes is None else max_bytes
+        self.shared = shared
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        (fmt, encoded bytes) or None; refreshes the entry's recency
+        
+        A local miss reads the shared tier, so call it off the event loop.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.shared is not None:
+            value = self.shared.get(f"overlay:{key}")
+            if value is not None:
+                fmt, data = value.split(b"\n", 1)
+                entry = (fmt.decode(), data)
+                self._store(key, *entry)
+        record_cache("overlay", hit=entry is not None)
+        return entry
+    
+    def put(self, key: str, fmt: str, data: bytes) -> None:
+        """Store an overlay; with a shared tier this may block, so call it off the event loop"""
+        self._store(key, fmt, data)
+        if self.shared is not None:
+            self.shared.put(f"overlay:{key}", fmt.encode() + b"\n" + data)
+    
+    def _store(self, key: str, fmt: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[1])
+            self._entries[key] = (fmt, data)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
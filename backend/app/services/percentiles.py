@@ -0,0 +1,150 @@
+"""
+Percentile Index - Where each measurement falls in a reference population
+Sorted reference values per measurement, built offline (scripts/build_percentiles.py)
+and loaded once per worker; a lookup is two binary searches
+"""
+import json
+import os
+import time
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.schemas import GeometricMeasurements
+
+# facial_thirds is indexed as three columns
+THIRDS = ("upper", "middle", "lower")
+
+
+def measurement_columns() -> List[str]:
+    """Column names of GeometricMeasurements in schema order, facial_thirds split in three"""
+    names = []
+    for name in GeometricMeasurements.model_fields:
+        if name == "facial_thirds":
+            names.extend(f"facial_thirds_{part}" for part in THIRDS)
+        else:
+            names.append(name)
+    return names
+
+
+def flatten_measurements(measurements: GeometricMeasurements) -> Dict[str, float]:
+    """One value per column; unset optional measurements are left out"""
+    values = {}
+    for name in GeometricMeasurements.model_fields:
+        value = getattr(measurements, name, None)
+        if value is None:
+            continue
+        if name == "facial_thirds":
+            values.update((f"facial_thirds_{part}", third) for part, third in zip(THIRDS, value))
+        else:
+            values[name] = value
+    return values
+
+
+class PercentileIndex:
+    """
+    Sorted float32 reference values per measurement column.
+    
+    percentile() is the mid-rank: the share of the population below the
+    value plus half the share equal to it, so a value tied with many others
+    (measurements are rounded) lands in the middle of its run rather than at
+    either end. merge() adds a new dataset without re-reading the ones
+    already in the index.
+    """
+    
+    def __init__(
+        self,
+        columns: Mapping[str, np.ndarray],
+        sources: Optional[List[dict]] = None,
+        built_at: Optional[float] = None
+    ):
+        """
+        Args:
+            columns: Column name -> sorted, finite float32 values
+            sources: Datasets merged so far (path, rows, sha256)
+            built_at: Unix time of the last merge
+        """
+        self.columns = dict(columns)
+        self.sources = sources or []
+        self.built_at = built_at
+        self.min_samples = settings.percentile_min_samples
+    
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "PercentileIndex":
+        """Read an index written by save()"""
+        with np.load(path or settings.percentile_index_path) as data:
+            meta = json.loads(str(data["__meta__"]))
+            columns = {name: data[name] for name in data.files if name != "__meta__"}
+        return cls(columns, meta["sources"], meta["built_at"])
+    
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the index; the file is replaced atomically, so a starting worker never reads half of it"""
+        path = path or settings.percentile_index_path
+        meta = json.dumps({"sources": self.sources, "built_at": self.built_at})
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, __meta__=np.array(meta), **self.columns)
+        os.replace(tmp, path)
+    
+    def merge(self, columns: Mapping[str, np.ndarray], source: Optional[dict] = None) -> "PercentileIndex":
+        """
+        New index with more reference values
+        
+        Each incoming column is sorted on its own (O(m log m)) and inserted
+        into the existing sorted array in one linear pass.
+        
+        Args:
+            columns: Column name -> values; unknown names are ignored and
+                NaN/inf values are dropped
+            source: Description of the dataset, recorded in `sources`
+        
+        Returns:
+            The merged index (this one is left unchanged)
+        """
+        merged = dict(self.columns)
+        for name in measurement_columns():
+            if name not in columns:
+                continue
+            values = np.asarray(columns[name], dtype=np.float32)
+            values = np.sort(values[np.isfinite(values)])
+            existing = merged.get(name)
+            if existing is None or not len(existing):
+                merged[name] = values
+            else:
+                merged[name] = np.insert(existing, np.searchsorted(existing, values), values)
+        return PercentileIndex(merged, self.sources + ([source] if source else []), time.time())
+    
+    def percentile(self, column: str, value: float) -> Optional[float]:
+        """
+        Percentile (0-100, one decimal) of a value within its column
+        
+        Returns:
+            None if the column has fewer than PERCENTILE_MIN_SAMPLES values
+        """
+        values = self.columns.get(column)
+        if values is None or len(values) < self.min_samples:
+            return None
+        # Compare in the stored precision, so a value equal to reference
+        # values counts as a tie
+        value = np.float32(value)
+        below = np.searchsorted(values, value, side="left")
+        not_above = np.searchsorted(values, value, side="right")
+        return round(50.0 * float(below + not_above) / len(values), 1)
+    
+    def percentiles(self, measurements: GeometricMeasurements) -> Dict[str, float]:
+        """Percentile of every measurement the index covers, by column name"""
+        result = {}
+        for column, value in flatten_measurements(measurements).items():
+            percentile = self.percentile(column, value)
+            if percentile is not None:
+                result[column] = percentile
+        return result
+    
+    def stats(self) -> dict:
+        """Reference values per column and the datasets they came from"""
+        return {
+            "samples": {name: int(len(values)) for name, values in self.columns.items()},
+            "sources": len(self.sources),
+            "built_at": self.built_at,
+        }
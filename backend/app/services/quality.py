@@ -0,0 +1,125 @@
+"""
+Image Quality Gate - Cheap checks before Face Mesh and the LLM
+Rejects photos that are too small, badly exposed or blurry from a small
+grayscale copy, and faces too small to measure from the detected mesh
+"""
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import IMAGE_QUALITY_REJECTED
+
+# Longest side of the grayscale copy the checks run on
+GATE_SIDE = 256
+
+
+class ImageQualityError(ValueError):
+    """Raised when an image fails the quality gate; `code` is the API error code"""
+    
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def _reject(code: str, message: str) -> ImageQualityError:
+    IMAGE_QUALITY_REJECTED.inc(code=code)
+    return ImageQualityError(code, message)
+
+
+def _downsample_gray(image: np.ndarray) -> np.ndarray:
+    """Grayscale copy with a longest side of about GATE_SIDE pixels"""
+    import cv2
+    
+    height, width = image.shape[:2]
+    # Strided view first, so a 12 MP photo is never converted at full size
+    step = max(1, max(height, width) // (2 * GATE_SIDE))
+    gray = cv2.cvtColor(np.ascontiguousarray(image[::step, ::step]), cv2.COLOR_RGB2GRAY)
+    
+    scale = GATE_SIDE / max(gray.shape)
+    if scale < 1.0:
+        gray = cv2.resize(
+            gray, (round(gray.shape[1] * scale), round(gray.shape[0] * scale)), interpolation=cv2.INTER_AREA
+        )
+    return gray
+
+
+def measure_quality(image: np.ndarray) -> dict:
+    """
+    Sharpness and brightness of an image
+    
+    Args:
+        image: RGB image
+    
+    Returns:
+        width, height, brightness (mean gray level, 0-255) and sharpness
+        (variance of the Laplacian at GATE_SIDE resolution)
+    """
+    import cv2
+    
+    height, width = image.shape[:2]
+    gray = _downsample_gray(image)
+    return {
+        "width": width,
+        "height": height,
+        "brightness": float(gray.mean()),
+        "sharpness": float(cv2.Laplacian(gray, cv2.CV_32F).var()),
+    }
+
+
+def check_image_quality(image: np.ndarray, label: str = "Image") -> dict:
+    """
+    Reject images that would only produce junk measurements
+    
+    Args:
+        image: RGB image
+        label: How the image is named in error messages
+    
+    Returns:
+        The measure_quality values
+    
+    Raises:
+        ImageQualityError: IMAGE_TOO_SMALL, IMAGE_TOO_DARK,
+            IMAGE_OVEREXPOSED or IMAGE_BLURRY
+    """
+    height, width = image.shape[:2]
+    if min(height, width) < settings.quality_min_side:
+        raise _reject(
+            "IMAGE_TOO_SMALL",
+            f"{label} is {width}x{height}; use a photo at least "
+            f"{settings.quality_min_side} pixels on its shorter side."
+        )
+    
+    quality = measure_quality(image)
+    if quality["brightness"] < settings.quality_min_brightness:
+        raise _reject("IMAGE_TOO_DARK", f"{label} is too dark. Please retake it in better light.")
+    if quality["brightness"] > settings.quality_max_brightness:
+        raise _reject("IMAGE_OVEREXPOSED", f"{label} is overexposed. Please avoid direct light on the face.")
+    # Checked after exposure: a dark image also has little edge contrast
+    if quality["sharpness"] < settings.quality_min_sharpness:
+        raise _reject("IMAGE_BLURRY", f"{label} is too blurry. Please hold the camera still and retake it.")
+    return quality
+
+
+def check_face_size(landmarks: List[List[float]], width: int, height: int, label: str = "Image") -> None:
+    """
+    Reject faces too small for the measurements to be meaningful
+    
+    Args:
+        landmarks: Normalized landmarks of the detected face
+        width: Image width in pixels
+        height: Image height in pixels
+        label: How the image is named in error messages
+    
+    Raises:
+        ImageQualityError: FACE_TOO_SMALL
+    """
+    points = np.asarray(landmarks, dtype=np.float32)
+    face_width = float(np.ptp(points[:, 0])) * width
+    face_height = float(np.ptp(points[:, 1])) * height
+    if max(face_width, face_height) < settings.quality_min_face_px:
+        raise _reject(
+            "FACE_TOO_SMALL",
+            f"The face in the {label.lower()} is only about {face_width:.0f}x{face_height:.0f} pixels. "
+            f"Please move closer so it is at least {settings.quality_min_face_px} pixels tall."
+        )
@@ -0,0 +1,279 @@
+"""
+Result Store - Idempotent replay of analysis responses
+Completed responses are kept in SQLite under the client's Idempotency-Key;
+a pending row claims the key while one worker computes it
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+# Prune expired rows every N writes
+PRUNE_EVERY = 100
+
+# status_code of a claim whose response is still being computed
+PENDING = 0
+
+
+@dataclass
+class StoredResult:
+    """A response saved under an idempotency key, or the pending claim on it"""
+    key: str
+    fingerprint: str
+    status_code: int
+    body: bytes
+    created_at: float
+    
+    @property
+    def pending(self) -> bool:
+        return self.status_code == PENDING
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when a key is reused for a different request"""
+
+
+class ResultStore:
+    """
+    SQLite-backed key -> response store.
+    WAL mode lets every worker process share one file. Calls block on the
+    file (and on other workers' writes), so async code runs them in the
+    threadpool.
+    """
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        claim_timeout_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            path: SQLite database file, defaults to settings
+            ttl_seconds: How long results are replayable, defaults to settings
+            claim_timeout_seconds: How long a pending claim holds the key, defaults to settings
+        """
+        self.path = path or settings.idempotency_db_path
+        self.ttl_seconds = ttl_seconds or settings.idempotency_ttl_seconds
+        self.claim_timeout_seconds = claim_timeout_seconds or settings.idempotency_claim_timeout_seconds
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+    
+    def get(self, key: str) -> Optional[StoredResult]:
+        """Look up an unexpired result or pending claim"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, fingerprint, status_code, body, created_at FROM results WHERE key = ?",
+                (key,)
+            ).fetchone()
+        stored = StoredResult(*row) if row else None
+        return stored if stored is not None and self._live(stored, time.time()) else None
+    
+    def _live(self, stored: StoredResult, now: float) -> bool:
+        timeout = self.claim_timeout_seconds if stored.pending else self.ttl_seconds
+        return stored.created_at >= now - timeout
+    
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResult]:
+        """
+        Take the key for computing, unless a result or live claim already holds it
+        
+        The check and the insert of the pending row run in one write
+        transaction, so of several workers claiming the same key exactly one
+        gets None.
+        
+        Returns:
+            None if this caller now holds the key, otherwise the stored
+            result or the other caller's pending claim
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT key, fingerprint, status_code, body, created_at FROM results WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                existing = StoredResult(*row) if row else None
+                if existing is None or not self._live(existing, now):
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                        (key, fingerprint, PENDING, b"", now)
+                    )
+                    existing = None
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return existing
+    
+    def release(self, key: str) -> None:
+        """Drop a pending claim (the computation failed), so a retry can run it again"""
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE key = ? AND status_code = ?", (key, PENDING))
+    
+    def put(self, key: str, fingerprint: str, status_code: int, body: bytes) -> None:
+        """Save (or replace) a result, replacing the pending claim"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, fingerprint, status_code, body, time.time())
+            )
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._conn.execute(
+                    "DELETE FROM results WHERE created_at < ?",
+                    (time.time() - self.ttl_seconds,)
+                )
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+async def request_fingerprint(request: Request) -> str:
+    """Hash of method, path, query and body (the body is already cached by FastAPI)"""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}?{request.url.query}\n".encode())
+    digest.update(await request.body())
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """
+    Runs each Idempotency-Key at most once per TTL, across all workers.
+    
+    - A completed 2xx response is replayed from the store.
+    - The first request claims the key with a pending row in the store. A
+      retry arriving while it is still running attaches to the same
+      computation if it lands on the same worker, and otherwise polls the
+      row until the result is stored. If the claiming worker dies, its
+      claim expires after IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS and a retry
+      takes the key over.
+    - The computation is detached from the client connection: if the original
+      client drops (the flaky-network case), the result is still finished and
+      stored for its retry.
+    
+    Failures are not stored, so the client can retry them.
+    
+    The SQLite file is only opened by the first request that carries a key,
+    so a worker that never sees one never touches the disk.
+    """
+    
+    def __init__(self, store: Optional[ResultStore] = None, poll_seconds: Optional[float] = None):
+        """
+        Args:
+            store: Shared result store, opened from settings on first use if None
+            poll_seconds: Interval for checking another worker's claim, defaults to settings
+        """
+        self._store = store
+        self._store_lock = threading.Lock()
+        self.poll_seconds = settings.idempotency_poll_seconds if poll_seconds is None else poll_seconds
+        self._in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+    
+    @property
+    def store(self) -> ResultStore:
+        """The result store; opening it blocks, so first use happens in the threadpool"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = ResultStore()
+        return self._store
+    
+    @staticmethod
+    def _replay(status_code: int, body: bytes) -> Response:
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+    
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        make_work: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """
+        Return the response for `key`, computing it only if needed
+        
+        Args:
+            key: Client-supplied Idempotency-Key
+            fingerprint: Hash of the request (see request_fingerprint)
+            make_work: Creates the pipeline coroutine
+        
+        Returns:
+            Fresh, attached or replayed response
+        
+        Raises:
+            IdempotencyConflictError: If the key was used for a different request
+        """
+        while True:
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                if in_flight[0] != fingerprint:
+                    raise IdempotencyConflictError(key)
+                record_cache("idempotency", hit=True)
+                response = await asyncio.shield(in_flight[1])
+                return self._replay(response.status_code, bytes(response.body))
+            
+            stored = await run_in_threadpool(lambda: self.store.claim(key, fingerprint))
+            if stored is None:
+                break
+            if stored.fingerprint != fingerprint:
+                raise IdempotencyConflictError(key)
+            if not stored.pending:
+                record_cache("idempotency", hit=True)
+                return self._replay(stored.status_code, stored.body)
+            # Claimed by another worker (or by this one, just before it
+            # registered the task): check again shortly
+            await asyncio.sleep(self.poll_seconds)
+        
+        record_cache("idempotency", hit=False)
+        task = asyncio.create_task(self._compute(key, fingerprint, make_work))
+        # Retrieve the exception even if every waiter went away
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = (fingerprint, task)
+        return await asyncio.shield(task)
+    
+    async def _compute(
+        self,
+        key: str,
+        fingerprint: str,
+        make_work: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        stored = False
+        try:
+            response = await make_work()
+            if 200 <= response.status_code < 300:
+                await run_in_threadpool(self.store.put, key, fingerprint, response.status_code, bytes(response.body))
+                stored = True
+            return response
+        finally:
+            if not stored:
+                await run_in_threadpool(self.store.release, key)
+            self._in_flight.pop(key, None)
@@ -0,0 +1,262 @@
+"""
+Rule Scoring Engine - Instant Rule-Based Scoring
+Compiles band tables from IDEAL_VALUES and scores measurements in vectorized passes
+"""
+from typing import Dict, List, Mapping, Optional, Union
+
+import numpy as np
+
+from app.core.constants import (
+    IDEAL_VALUES,
+    TIER_DEFINITIONS,
+    RULE_SCORING,
+    RULE_BAND_SCORES,
+)
+from app.models.schemas import GeometricMeasurements, AnalysisResult, RadarData
+from app.services.percentiles import PercentileIndex
+
+
+# Band indices produced by RuleScoringEngine.bands()
+FAR_BELOW, NEAR_BELOW, IDEAL, NEAR_ABOVE, FAR_ABOVE = range(5)
+
+# Strength / weakness templates per metric and band ("{value}" is the raw measurement)
+BAND_MESSAGES = {
+    "canthal_tilt": {
+        IDEAL: ("strength", "Positive canthal tilt ({value:.1f}°) creating hunter eye appearance"),
+        NEAR_BELOW: ("strength", "Neutral to slightly positive canthal tilt ({value:.1f}°)"),
+        FAR_BELOW: ("weakness", "Negative canthal tilt ({value:.1f}°) may appear tired"),
+    },
+    "bigonial_bizygomatic_ratio": {
+        IDEAL: ("strength", "Ideal jaw-to-cheekbone ratio ({percent:.0f}%)"),
+        FAR_BELOW: ("weakness", "Jaw-to-cheekbone ratio ({percent:.0f}%) outside ideal range"),
+        FAR_ABOVE: ("weakness", "Jaw-to-cheekbone ratio ({percent:.0f}%) outside ideal range"),
+    },
+    "gonial_angle": {
+        IDEAL: ("strength", "Well-defined gonial angle ({value:.0f}°)"),
+        FAR_BELOW: ("weakness", "Gonial angle ({value:.0f}°) outside ideal range"),
+        FAR_ABOVE: ("weakness", "Gonial angle ({value:.0f}°) outside ideal range"),
+    },
+    "midface_ratio": {
+        IDEAL: ("strength", "Golden ratio midface proportions"),
+        FAR_BELOW: ("weakness", "Midface ratio ({percent:.0f}%) deviates from ideal"),
+        FAR_ABOVE: ("weakness", "Midface ratio ({percent:.0f}%) deviates from ideal"),
+    },
+    "symmetry": {
+        IDEAL: ("strength", "Excellent facial symmetry ({percent:.0f}%)"),
+        NEAR_BELOW: ("strength", "Good facial symmetry ({percent:.0f}%)"),
+        FAR_BELOW: ("weakness", "Facial asymmetry detected ({percent:.0f}%)"),
+    },
+}
+
+RULE_ADVICE = (
+    "Consider maintaining good posture and practicing proper tongue posture (mewing) "
+    "for long-term facial development. A lower body fat percentage can help "
+    "maximize facial definition. These scores are based on geometric measurements "
+    "and should be taken as informational rather than definitive."
+)
+
+BatchInput = Union[np.ndarray, Mapping[str, np.ndarray]]
+
+
+class RuleScoringEngine:
+    """
+    Table-driven scorer for facial measurements.
+    Band edges are compiled once from IDEAL_VALUES, so a single result and a batch
+    of millions of stored measurements go through the same vectorized code path.
+    """
+    
+    def __init__(
+        self,
+        ideal_values: Optional[dict] = None,
+        tier_definitions: Optional[dict] = None,
+        rules: Optional[dict] = None,
+        percentile_index: Optional[PercentileIndex] = None
+    ):
+        ideal_values = ideal_values or IDEAL_VALUES
+        self.percentile_index = percentile_index
+        tier_definitions = tier_definitions or TIER_DEFINITIONS
+        rules = rules or RULE_SCORING
+        
+        # Metric table: one column per scored measurement
+        self.metrics: List[str] = list(rules)
+        self.fields: List[str] = [rules[m]["field"] for m in self.metrics]
+        
+        lower, upper, near_lower, near_upper = [], [], [], []
+        for metric in self.metrics:
+            ideal = ideal_values[metric]
+            margin_low, margin_high = rules[metric]["margin"]
+            ideal_min = ideal.get("ideal_min", -np.inf)
+            ideal_max = ideal.get("ideal_max", np.inf)
+            lower.append(ideal_min)
+            upper.append(ideal_max)
+            # Round to avoid float drift at band edges (0.75 - 0.05 != 0.70)
+            near_lower.append(-np.inf if margin_low is None else round(ideal_min - margin_low, 6))
+            near_upper.append(np.inf if margin_high is None else round(ideal_max + margin_high, 6))
+        
+        self._lower = np.array(lower, dtype=np.float64)
+        self._upper = np.array(upper, dtype=np.float64)
+        self._near_lower = np.array(near_lower, dtype=np.float64)
+        self._near_upper = np.array(near_upper, dtype=np.float64)
+        self._band_scores = np.array(RULE_BAND_SCORES, dtype=np.float64)
+        
+        # Radar table: which metric columns average into each radar axis
+        self.radar_axes: Dict[str, np.ndarray] = {}
+        for axis in ("eyes", "jaw", "midface", "symmetry"):
+            columns = [i for i, m in enumerate(self.metrics) if rules[m]["radar"] == axis]
+            self.radar_axes[axis] = np.array(columns, dtype=np.intp)
+        
+        # Tier table: sorted lower bounds for searchsorted lookup
+        tiers = sorted(tier_definitions.items(), key=lambda item: item[1]["range"][0])
+        self._tier_lower = np.array([info["range"][0] for _, info in tiers], dtype=np.float64)
+        self._tier_keys = np.array([key for key, _ in tiers], dtype=object)
+        self._tier_labels = np.array([info["label"] for _, info in tiers], dtype=object)
+        self._tier_info = {
+            key: {"key": key, "label": info["label"], "description": info["description"]}
+            for key, info in tiers
+        }
+    
+    def to_array(self, measurements: BatchInput) -> np.ndarray:
+        """
+        Normalize input into an (N, M) float array in metric order
+        
+        Args:
+            measurements: (N, M) / (M,) array, or mapping of field name to 1-D arrays
+        
+        Returns:
+            Float64 array of shape (N, M)
+        """
+        if isinstance(measurements, Mapping):
+            columns = [np.asarray(measurements[field], dtype=np.float64) for field in self.fields]
+            return np.stack(columns, axis=-1).reshape(-1, len(self.fields))
+        return np.asarray(measurements, dtype=np.float64).reshape(-1, len(self.fields))
+    
+    def measurement_vector(self, measurements: GeometricMeasurements) -> np.ndarray:
+        """Convert a single GeometricMeasurements into a (1, M) array"""
+        return np.array(
+            [[getattr(measurements, field) for field in self.fields]],
+            dtype=np.float64
+        )
+    
+    def bands(self, values: np.ndarray) -> np.ndarray:
+        """
+        Classify every measurement into a band
+        
+        Args:
+            values: (N, M) measurement array
+        
+        Returns:
+            (N, M) int array of band indices (FAR_BELOW .. FAR_ABOVE)
+        """
+        band = np.full(values.shape, FAR_ABOVE, dtype=np.int8)
+        band[values <= self._near_upper] = NEAR_ABOVE
+        band[values <= self._upper] = IDEAL
+        band[values < self._lower] = NEAR_BELOW
+        band[values < self._near_lower] = FAR_BELOW
+        return band
+    
+    def score_batch(self, measurements: BatchInput) -> Dict[str, np.ndarray]:
+        """
+        Score a batch of measurements in one vectorized pass
+        
+        Args:
+            measurements: (N, M) array or mapping of field name to 1-D arrays
+        
+        Returns:
+            Dictionary of arrays: score, tier_key, tier, bands, metric_scores and
+            one entry per radar axis (eyes, jaw, midface, symmetry, harmony)
+        """
+        values = self.to_array(measurements)
+        bands = self.bands(values)
+        metric_scores = self._band_scores[bands]
+        
+        score = np.round(metric_scores.mean(axis=1), 1)
+        tier_index = np.searchsorted(self._tier_lower, score, side="right") - 1
+        tier_index = np.clip(tier_index, 0, len(self._tier_lower) - 1)
+        
+        result = {
+            "score": score,
+            "tier_key": self._tier_keys[tier_index],
+            "tier": self._tier_labels[tier_index],
+            "bands": bands,
+            "metric_scores": metric_scores,
+        }
+        for axis, columns in self.radar_axes.items():
+            result[axis] = np.clip(metric_scores[:, columns].mean(axis=1), 1.0, 10.0)
+        result["harmony"] = score
+        return result
+    
+    def score(self, measurements: GeometricMeasurements) -> dict:
+        """
+        Score a single measurement set
+        
+        Args:
+            measurements: Calculated geometric measurements
+        
+        Returns:
+            Dictionary with score, tier info, radar data, strengths and weaknesses
+        """
+        batch = self.score_batch(self.measurement_vector(measurements))
+        
+        strengths, weaknesses = [], []
+        for metric, field, band in zip(self.metrics, self.fields, batch["bands"][0]):
+            message = BAND_MESSAGES.get(metric, {}).get(int(band))
+            if message is None:
+                continue
+            kind, template = message
+            value = getattr(measurements, field)
+            text = template.format(value=value, percent=value * 100)
+            (strengths if kind == "strength" else weaknesses).append(text)
+        
+        return {
+            "score": float(batch["score"][0]),
+            "tier": self._tier_info[batch["tier_key"][0]],
+            "radar_data": RadarData.model_construct(
+                eyes=float(batch["eyes"][0]),
+                jaw=float(batch["jaw"][0]),
+                midface=float(batch["midface"][0]),
+                symmetry=float(batch["symmetry"][0]),
+                harmony=float(batch["harmony"][0])
+            ),
+            "strengths": strengths,
+            "weaknesses": weaknesses,
+        }
+    
+    def analyze(self, measurements: GeometricMeasurements) -> AnalysisResult:
+        """
+        Build a complete rule-based AnalysisResult without calling an LLM
+        
+        Args:
+            measurements: Calculated geometric measurements
+        
+        Returns:
+            Analysis result with score, tier, radar data and generic advice
+        """
+        scored = self.score(measurements)
+        tier_info = scored["tier"]
+        strengths = scored["strengths"]
+        weaknesses = scored["weaknesses"]
+        
+        analysis = (
+            f"Based on the geometric analysis of your facial features, "
+            f"you have achieved an overall score of {scored['score']}/10, "
+            f"placing you in the {tier_info['label']} tier. "
+            f"{tier_info['description']}. "
+            f"Your face shows {len(strengths)} notable strengths and "
+            f"{len(weaknesses)} areas that could be improved."
+        )
+        
+        percentiles = None
+        if self.percentile_index is not None:
+            percentiles = self.percentile_index.percentiles(measurements)
+        
+        return AnalysisResult.model_construct(
+            score=scored["score"],
+            tier=tier_info["label"],
+            analysis=analysis,
+            strengths=strengths if strengths else ["Analysis in progress"],
+            weaknesses=weaknesses if weaknesses else ["No major issues detected"],
+            advice=RULE_ADVICE,
+            radar_data=scored["radar_data"],
+            measurements=measurements,
+            percentiles=percentiles
+        )
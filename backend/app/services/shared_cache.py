@@ -0,0 +1,199 @@
+"""
+Shared Cache - Content-addressed results shared by every worker on a host
+Landmark arrays, LLM analyses and rendered overlays in one SQLite file (WAL),
+bounded in bytes with least-recently-used eviction
+"""
+import hashlib
+import io
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import record_cache
+
+# Eviction frees down to this fraction of max_bytes, so it runs in batches
+EVICT_TO = 0.9
+
+# Reads keep recency in memory until the next write; beyond this many
+# pending keys, further reads are not recorded
+MAX_PENDING_TOUCHES = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage VALUES (0, 0, 0);
+"""
+
+
+def content_key(kind: str, *parts: Union[bytes, str]) -> str:
+    """
+    Cache key for a result derived from `parts`
+    
+    Args:
+        kind: Key prefix, also the cache label in metrics
+        parts: Everything the result depends on (image bytes, profile, ...)
+    
+    Returns:
+        "<kind>:<hex digest>"
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode())
+        digest.update(b"\0")
+    return f"{kind}:{digest.hexdigest()}"
+
+
+def pack_array(array: np.ndarray, size: Tuple[int, int]) -> bytes:
+    """Landmark array plus the (width, height) of the image it came from"""
+    buffer = io.BytesIO()
+    buffer.write(struct.pack("<II", *size))
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def unpack_array(value: bytes) -> Tuple[np.ndarray, Tuple[int, int]]:
+    """Inverse of pack_array"""
+    width, height = struct.unpack_from("<II", value)
+    return np.load(io.BytesIO(memoryview(value)[8:]), allow_pickle=False), (width, height)
+
+
+class SharedCache:
+    """
+    Key -> bytes store in one SQLite file opened by every worker process.
+    
+    WAL mode lets readers run while another process writes. Writes take the
+    database lock up front (BEGIN IMMEDIATE) and keep the entry count and
+    total size in the same transaction, so concurrent writers can't double
+    count or over-evict. Reads never write: the keys they hit are remembered
+    and their recency is written with the next put.
+    
+    Errors (a locked or unwritable file) count as misses; the caller just
+    computes the result again.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: SQLite database file, defaults to settings
+            max_bytes: Total value size kept, defaults to settings
+        """
+        self.path = path or settings.shared_cache_path
+        self.max_bytes = int(settings.shared_cache_mb * 1024 * 1024) if max_bytes is None else max_bytes
+        self._touched: Dict[str, float] = {}
+        # Separate connections, so a read never waits behind a write that is
+        # itself waiting for another process's lock
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        with self._write_lock:
+            self._writer.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Value stored under key, or None
+        
+        Waits for the read lock and the disk; call it off the event loop.
+        """
+        try:
+            with self._read_lock:
+                row = self._reader.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            row = None
+        
+        record_cache(f"shared_{key.split(':', 1)[0]}", hit=row is not None)
+        if row is None:
+            return None
+        if len(self._touched) < MAX_PENDING_TOUCHES:
+            self._touched[key] = time.time()
+        return row[0]
+    
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Store (or replace) a value, evicting least recently used entries
+        once the total size exceeds max_bytes
+        
+        May wait for another process's write; call it off the event loop.
+        """
+        if len(value) > self.max_bytes:
+            return
+        touched, self._touched = self._touched, {}
+        now = time.time()
+        
+        try:
+            with self._write_lock:
+                self._writer.execute("BEGIN IMMEDIATE")
+                try:
+                    if touched:
+                        self._writer.executemany(
+                            "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                            [(accessed_at, touched_key) for touched_key, accessed_at in touched.items()]
+                        )
+                    previous = self._writer.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                    self._writer.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                        (key, value, len(value), now)
+                    )
+                    total = self._writer.execute(
+                        "UPDATE usage SET entries = entries + ?, bytes = bytes + ? WHERE id = 0 RETURNING bytes",
+                        (0 if previous else 1, len(value) - (previous[0] if previous else 0))
+                    ).fetchone()[0]
+                    if total > self.max_bytes:
+                        self._evict(total)
+                    self._writer.execute("COMMIT")
+                except BaseException:
+                    self._writer.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            return
+    
+    def _evict(self, total: int) -> None:
+        """Delete the least recently used entries (inside put's transaction)"""
+        target = total - int(self.max_bytes * EVICT_TO)
+        cursor = self._writer.execute("SELECT key, size FROM entries ORDER BY accessed_at")
+        keys, freed = [], 0
+        for key, size in cursor:
+            if freed >= target:
+                break
+            keys.append((key,))
+            freed += size
+        cursor.close()
+        
+        self._writer.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self._writer.execute(
+            "UPDATE usage SET entries = entries - ?, bytes = bytes - ? WHERE id = 0",
+            (len(keys), freed)
+        )
+    
+    def stats(self) -> dict:
+        """Entries and bytes stored by all workers together"""
+        with self._read_lock:
+            entries, used = self._reader.execute("SELECT entries, bytes FROM usage WHERE id = 0").fetchone()
+        return {"entries": entries, "bytes": used, "max_bytes": self.max_bytes}
+    
+    def close(self) -> None:
+        with self._write_lock, self._read_lock:
+            self._writer.close()
+            self._reader.close()
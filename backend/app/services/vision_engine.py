@@ -4,14 +4,135 @@ Processes images and extracts 468 facial landmarks
 """
 import base64
 import io
-from typing import Optional, Tuple, List
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, List
 
-import cv2
 import numpy as np
-import mediapipe as mp
-from PIL import Image
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
+from app.core.metrics import stage
 from app.models.schemas import LandmarkData
+from app.services.landmark_backends import BackendPool, create_backend
+from app.services.overlay import render_overlay
+from app.services.quality import check_face_size, check_image_quality
+from app.services.shared_cache import SharedCache, content_key, pack_array, unpack_array
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured byte or pixel limits"""
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Face Mesh settings for one kind of request"""
+    name: str
+    refine_landmarks: bool
+    description: str
+
+
+# GeometryCalculator reads no iris points (pupils are estimated from the
+# canthi), so only the refined eye and lip contours separate the two
+ENGINE_PROFILES: Dict[str, EngineProfile] = {
+    "precise": EngineProfile("precise", True, "Refined eyes and lips plus iris, 478 points"),
+    "fast": EngineProfile("fast", False, "Base mesh only, 468 points"),
+}
+
+
+def _downscale(image: np.ndarray, max_side: int) -> np.ndarray:
+    """Shrink an image so its longest side is at most max_side"""
+    import cv2
+    
+    height, width = image.shape[:2]
+    if max(height, width) <= max_side:
+        return image
+    # A strided view first keeps INTER_AREA's cost independent of the input size
+    step = max(1, max(height, width) // max_side)
+    if step > 1:
+        image = np.ascontiguousarray(image[::step, ::step])
+        height, width = image.shape[:2]
+    scale = max_side / max(height, width)
+    return cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def _square_roi(
+    center_x: float,
+    center_y: float,
+    side: float,
+    width: int,
+    height: int
+) -> Optional[Tuple[int, int, int, int]]:
+    """Square of `side` pixels around a center, clipped to the image, or None if empty"""
+    x0, x1 = max(0, round(center_x - side / 2)), min(width, round(center_x + side / 2))
+    y0, y1 = max(0, round(center_y - side / 2)), min(height, round(center_y + side / 2))
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        return None
+    return x0, y0, x1, y1
+
+
+def _detection_roi(box: Tuple[float, float, float, float], width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+    """Padded square crop around a face detector box given in pixels"""
+    x0, y0, x1, y1 = box
+    # The detector's box spans brows to mouth; pad it to the whole head
+    return _square_roi(
+        (x0 + x1) / 2,
+        (y0 + y1) / 2,
+        max(x1 - x0, y1 - y0) * settings.roi_padding,
+        width,
+        height
+    )
+
+
+def _detection_tiles(width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """
+    The whole frame plus overlapping square tiles covering it
+    
+    The full-range detector letterboxes its input to 192 px, so in a wide
+    group photo a face a tenth of the width is too small for it. Tiles are
+    at most half the long side and overlap by a quarter of their side.
+    """
+    side = min(width, height, max(width, height) // 2)
+    if side < 2:
+        return [(0, 0, width, height)]
+    stride = side * 3 // 4
+    
+    def starts(length: int) -> List[int]:
+        positions = list(range(0, length - side + 1, stride))
+        if positions[-1] + side < length:
+            positions.append(length - side)
+        return positions
+    
+    return [(0, 0, width, height)] + [(x, y, x + side, y + side) for y in starts(height) for x in starts(width)]
+
+
+def _suppress_overlaps(boxes: np.ndarray, scores: np.ndarray, threshold: float = 0.5) -> List[int]:
+    """
+    Greedy non-maximum suppression, best score first
+    
+    Overlap is measured against the smaller box, so the partial box of a
+    face cut by a tile edge is dropped in favour of its whole box.
+    
+    Args:
+        boxes: (B, 4) pixel boxes as x0, y0, x1, y1
+        scores: (B,) detector scores
+        threshold: Overlap above which the lower-scoring box is dropped
+    
+    Returns:
+        Indices of the boxes kept
+    """
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep: List[int] = []
+    for i in np.argsort(-scores):
+        if keep:
+            kept = boxes[keep]
+            overlap_x = np.clip(np.minimum(kept[:, 2], boxes[i, 2]) - np.maximum(kept[:, 0], boxes[i, 0]), 0, None)
+            overlap_y = np.clip(np.minimum(kept[:, 3], boxes[i, 3]) - np.maximum(kept[:, 1], boxes[i, 1]), 0, None)
+            smaller = np.minimum(areas[keep], areas[i])
+            if np.any(overlap_x * overlap_y > threshold * smaller):
+                continue
+        keep.append(int(i))
+    return keep
 
 
 class VisionEngine:
@@ -20,16 +141,59 @@ class VisionEngine:
     Extracts 468 landmark points from facial images.
     """
     
-    def __init__(self):
-        """Initialize MediaPipe Face Mesh"""
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            refine_landmarks=True,  # Includes iris landmarks
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
+    def __init__(self, cache: Optional[SharedCache] = None):
+        """
+        Initialize MediaPipe Face Mesh
+        
+        Args:
+            cache: Cross-worker cache of landmark arrays by image hash
+        """
+        # Imported here, not at module load: mediapipe takes ~1 s to import,
+        # which endpoints that never touch the engine shouldn't pay
+        import mediapipe as mp
+        
+        # Landmark model (legacy FaceMesh graph or Tasks FaceLandmarker): a
+        # pool of graphs per profile, each graph used by one call at a time
+        self.pools: Dict[str, BackendPool] = {
+            name: BackendPool(
+                lambda profile=profile: create_backend(settings.vision_backend, profile.refine_landmarks),
+                settings.vision_pool_size
+            )
+            for name, profile in ENGINE_PROFILES.items()
+        }
+        # Pre-stage for the ROI crop: the full-range detector finds small or
+        # distant faces that the mesh's own short-range detector misses
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=1,
+            min_detection_confidence=0.5
         )
+        # The detector graph is shared and not thread-safe
+        self._lock = threading.Lock()
+        
+        self.cache = cache
+        
+        # Intake limits, checked before the expensive decode steps
+        self.max_image_bytes = int(settings.max_image_mb * 1024 * 1024)
+        self.max_image_pixels = int(settings.max_image_megapixels * 1_000_000)
+    
+    def warm_up(self, width: int = 640, height: int = 480) -> None:
+        """
+        Run dummy inferences so TFLite graph initialization happens up front
+        
+        Every graph of every profile's pool runs once.
+        
+        Args:
+            width: Width of the blank warm-up frame
+            height: Height of the blank warm-up frame
+        """
+        blank = np.zeros((height, width, 3), dtype=np.uint8)
+        for name, pool in self.pools.items():
+            for _ in range(pool.size):
+                self.process_image(blank, name)
+    
+    def stats(self) -> dict:
+        """Graphs per profile and how many are idle"""
+        return {name: {"size": pool.size, "idle": pool.idle} for name, pool in self.pools.items()}
     
     def decode_base64_image(self, base64_string: str) -> np.ndarray:
         """
@@ -40,60 +204,413 @@ class VisionEngine:
             
         Returns:
             Numpy array of the image in RGB format
+            
+        Raises:
+            ImageTooLargeError: If the decoded size would exceed the limits
+        """
+        with stage("decode"):
+            image_bytes = self.decode_base64_bytes(base64_string)
+            del base64_string
+            
+            return self.decode_image_bytes(image_bytes)
+    
+    def decode_base64_bytes(self, base64_string: str) -> bytes:
+        """
+        Decode a base64 image string to the encoded file bytes (no pixel decode)
+        
+        Args:
+            base64_string: Base64 encoded image (with or without data URL prefix)
+            
+        Returns:
+            Encoded image file contents
+            
+        Raises:
+            ImageTooLargeError: If the decoded size would exceed the limit
         """
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
+        # Remove data URL prefix if present (only scan the header, not the payload)
+        comma = base64_string.find(',', 0, 256)
+        if comma != -1:
+            base64_string = base64_string[comma + 1:]
         
-        # Decode base64
-        image_bytes = base64.b64decode(base64_string)
+        # Base64 inflates by 4/3, so the decoded size is known before decoding
+        if len(base64_string) * 3 // 4 > self.max_image_bytes:
+            raise ImageTooLargeError(
+                f"Image exceeds the {settings.max_image_mb:g} MB limit."
+            )
         
-        # Convert to PIL Image
-        image = Image.open(io.BytesIO(image_bytes))
+        return base64.b64decode(base64_string)
+    
+    def decode_checked_bytes(self, image_bytes: bytes, label: Optional[str] = "Image") -> np.ndarray:
+        """
+        decode_image_bytes followed by the quality gate (if enabled)
         
-        # Convert to RGB if necessary
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        Args:
+            image_bytes: Encoded image file contents
+            label: How quality errors name the image; None skips the gate
         
-        # Convert to numpy array
-        return np.array(image)
+        Raises:
+            ImageTooLargeError: If the pixel count exceeds the limit
+            ImageQualityError: If the image is too small, badly exposed or blurry
+        """
+        with stage("decode"):
+            image = self.decode_image_bytes(image_bytes)
+        if label is not None and settings.quality_gate:
+            with stage("quality"):
+                check_image_quality(image, label)
+        return image
     
-    def process_image(self, image: np.ndarray) -> Optional[List[List[float]]]:
+    def decode_image_bytes(self, image_bytes: bytes) -> np.ndarray:
+        """
+        Decode encoded image bytes (JPEG, PNG, ...) to an RGB numpy array
+        
+        Args:
+            image_bytes: Encoded image file contents
+            
+        Returns:
+            Numpy array of the image in RGB format
+            
+        Raises:
+            ImageTooLargeError: If the pixel count exceeds the limit
+        """
+        from PIL import Image
+        
+        # Image.open only parses the header, so dimensions are checked
+        # before any pixel data is decoded
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            width, height = image.size
+            if width * height > self.max_image_pixels:
+                raise ImageTooLargeError(
+                    f"Image is {width}x{height}; the limit is "
+                    f"{settings.max_image_megapixels:g} megapixels."
+                )
+            
+            # Convert to RGB if necessary
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            
+            # asarray wraps PIL's buffer instead of copying it a second time
+            return np.asarray(image)
+    
+    def process_image(self, image: np.ndarray, profile: str = "precise") -> Optional[List[List[float]]]:
         """
         Process a single image and extract facial landmarks
         
         Args:
             image: Numpy array of the image in RGB format
+            profile: Key of ENGINE_PROFILES
             
         Returns:
-            List of 478 landmarks (468 face + 10 iris), each as [x, y, z]
+            List of landmarks, each as [x, y, z]: 478 (468 face + 10 iris)
+            with the "precise" profile, 468 with "fast"
             Returns None if no face detected
         """
-        # Process the image
-        results = self.face_mesh.process(image)
+        landmarks = self._detect(image, profile)
+        if landmarks is None:
+            return None
+        
+        # Normalized [x, y, z] per landmark (x, y in 0-1 of the full image)
+        return landmarks.tolist()
+    
+    def process_image_array(self, image: np.ndarray, profile: str = "precise") -> Optional[np.ndarray]:
+        """
+        Like process_image, but as a float32 array of shape (478, 3)
         
-        # Check if face was detected
-        if not results.multi_face_landmarks:
+        Skips the nested Python lists for callers that only ship the raw mesh.
+        """
+        landmarks = self._detect(image, profile)
+        if landmarks is None:
             return None
+        return landmarks.astype(np.float32)
+    
+    def process_image_faces(self, image: np.ndarray, max_faces: int, profile: str = "fast") -> np.ndarray:
+        """
+        Mesh every face of a group photo
+        
+        The mesh's own detector only finds faces that fill a good part of the
+        frame, which faces in a group photo rarely do. Faces are located with
+        the tiled full-range detector and each is meshed on its own crop.
+        
+        Args:
+            image: Numpy array of the image in RGB format
+            max_faces: Most faces to mesh
+            profile: Key of ENGINE_PROFILES
+        
+        Returns:
+            (F, N, 3) float32 landmarks normalized to the full image, faces
+            ordered left to right; F is 0 if no face was found
+        """
+        faces = [self._mesh(image, profile, roi) for roi in self._find_face_rois(image, max_faces)]
+        faces = [landmarks for landmarks in faces if landmarks is not None]
+        if not faces:
+            return np.empty((0, 0, 3), dtype=np.float32)
+        return np.stack(faces).astype(np.float32)
+    
+    def _detect(self, image: np.ndarray, profile: str) -> Optional[np.ndarray]:
+        """
+        Run Face Mesh, re-running it on a crop around the face when that helps
+        
+        With ROI cropping enabled:
+        - a face found on the whole frame that is small relative to it is
+          refined by a second pass on a padded crop around its landmarks
+          (more pixels per landmark, better precision)
+        - when the whole frame yields nothing, the full-range face detector
+          runs on a downscaled copy and the mesh is retried on a crop around
+          what it finds (the mesh's own detector misses faces that are a
+          small part of a large photo)
+        Faces that fill the frame, the common selfie, take a single pass.
+        
+        Returns:
+            (478, 3) float64 landmarks normalized to the full image, or None
+        """
+        landmarks = self._mesh(image, profile)
+        if not settings.roi_crop:
+            return landmarks
+        
+        if landmarks is None:
+            roi = self._find_face_roi(image)
+        else:
+            extent = max(np.ptp(landmarks[:, 0]), np.ptp(landmarks[:, 1]))
+            if extent >= settings.roi_refine_below:
+                return landmarks
+            roi = self._landmark_roi(landmarks, image.shape[1], image.shape[0])
+        if roi is None:
+            return landmarks
+        
+        refined = self._mesh(image, profile, roi)
+        # The detector's box can be off; keep the whole-frame result then
+        return refined if refined is not None else landmarks
+    
+    def _mesh(
+        self,
+        image: np.ndarray,
+        profile: str,
+        roi: Optional[Tuple[int, int, int, int]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Run Face Mesh on the whole image or on a crop of it
+        
+        Args:
+            image: Full resolution RGB image
+            profile: Key of ENGINE_PROFILES
+            roi: Optional (x0, y0, x1, y1) pixel bounds to crop to
         
-        # Get the first face's landmarks
-        face_landmarks = results.multi_face_landmarks[0]
+        Returns:
+            (478, 3) float64 landmarks normalized to the full image, or None
+        """
+        crop = image
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            # The landmark model's input is 192 px; a larger crop only adds
+            # conversion cost inside the graph
+            crop = _downscale(np.ascontiguousarray(image[y0:y1, x0:x1]), settings.roi_mesh_side)
         
-        # Extract normalized coordinates
-        landmarks = []
-        for landmark in face_landmarks.landmark:
-            landmarks.append([
-                landmark.x,  # Normalized x (0-1)
-                landmark.y,  # Normalized y (0-1)
-                landmark.z   # Normalized z (depth)
-            ])
+        with stage("mesh"), self.pools[profile].acquire() as backend:
+            landmarks = backend.detect(crop)
         
+        if landmarks is not None and roi is not None:
+            # Crop-normalized -> full-image-normalized; z is on the x scale
+            height, width = image.shape[:2]
+            crop_width, crop_height = x1 - x0, y1 - y0
+            landmarks[:, 0] = (landmarks[:, 0] * crop_width + x0) / width
+            landmarks[:, 1] = (landmarks[:, 1] * crop_height + y0) / height
+            landmarks[:, 2] *= crop_width / width
         return landmarks
     
+    def _find_face_roi(self, image: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Padded square crop around the largest face the detector finds
+        
+        Args:
+            image: Full resolution RGB image
+        
+        Returns:
+            (x0, y0, x1, y1) pixel bounds, or None if no face was found
+        """
+        height, width = image.shape[:2]
+        with stage("face_detect"), self._lock:
+            results = self.face_detection.process(_downscale(image, settings.roi_detect_side))
+        if not results.detections:
+            return None
+        
+        box = max(
+            (detection.location_data.relative_bounding_box for detection in results.detections),
+            key=lambda b: b.width * b.height
+        )
+        return _detection_roi(
+            (box.xmin * width, box.ymin * height, (box.xmin + box.width) * width, (box.ymin + box.height) * height),
+            width,
+            height
+        )
+    
+    def _find_face_rois(self, image: np.ndarray, max_faces: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Padded square crops around every face the detector finds
+        
+        The detector runs on the whole frame and on each _detection_tiles
+        tile, each downscaled to ROI_DETECT_SIDE; boxes of the same face from
+        overlapping tiles are merged.
+        
+        Args:
+            image: Full resolution RGB image
+            max_faces: Most confident faces to keep
+        
+        Returns:
+            (x0, y0, x1, y1) pixel bounds, left to right
+        """
+        height, width = image.shape[:2]
+        boxes, scores = [], []
+        with stage("face_detect"), self._lock:
+            for x0, y0, x1, y1 in _detection_tiles(width, height):
+                tile = np.ascontiguousarray(image[y0:y1, x0:x1])
+                results = self.face_detection.process(_downscale(tile, settings.roi_detect_side))
+                tile_width, tile_height = x1 - x0, y1 - y0
+                for detection in results.detections or []:
+                    box = detection.location_data.relative_bounding_box
+                    boxes.append((
+                        x0 + box.xmin * tile_width,
+                        y0 + box.ymin * tile_height,
+                        x0 + (box.xmin + box.width) * tile_width,
+                        y0 + (box.ymin + box.height) * tile_height,
+                    ))
+                    scores.append(detection.score[0])
+        if not boxes:
+            return []
+        
+        keep = _suppress_overlaps(np.array(boxes), np.array(scores))[:max_faces]
+        rois = [_detection_roi(boxes[i], width, height) for i in sorted(keep, key=lambda i: boxes[i][0])]
+        return [roi for roi in rois if roi is not None]
+    
+    def _landmark_roi(self, landmarks: np.ndarray, width: int, height: int) -> Optional[Tuple[int, int, int, int]]:
+        """Padded square crop around a mesh found on the whole frame"""
+        x_min, x_max = landmarks[:, 0].min() * width, landmarks[:, 0].max() * width
+        y_min, y_max = landmarks[:, 1].min() * height, landmarks[:, 1].max() * height
+        # The mesh already spans the whole face, so it needs less padding
+        # than the detector's box
+        return _square_roi(
+            (x_min + x_max) / 2,
+            (y_min + y_max) / 2,
+            max(x_max - x_min, y_max - y_min) * settings.roi_padding * 0.75,
+            width,
+            height
+        )
+    
+    async def _cached_async(
+        self,
+        image_base64: str,
+        kind: str,
+        variant: str,
+        label: Optional[str],
+        compute: Callable[[np.ndarray], Optional[np.ndarray]]
+    ) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+        """
+        Decode an upload and run `compute` on it, through the shared cache
+        
+        Keys hash the encoded image bytes with everything else the result
+        depends on, so the same upload hits in any worker. On a hit nothing
+        is decoded; a cached result already passed the quality gate.
+        
+        Args:
+            image_base64: Base64 encoded image
+            kind: Cache key prefix ("landmarks" or "faces")
+            variant: Other inputs of `compute` (profile, face limit)
+            label: How quality errors name the image; None skips the gate
+            compute: Runs on the decoded RGB image, in the threadpool
+        
+        Returns:
+            (compute's result, (width, height)); None results aren't cached
+        """
+        image_bytes = await run_in_threadpool(self.decode_base64_bytes, image_base64)
+        key = None
+        if self.cache is not None:
+            gated = label is not None and settings.quality_gate
+            key = await run_in_threadpool(
+                content_key, kind, image_bytes, variant, settings.vision_backend, str(gated)
+            )
+            cached = await run_in_threadpool(self.cache.get, key)
+            if cached is not None:
+                return unpack_array(cached)
+        
+        image = await run_in_threadpool(self.decode_checked_bytes, image_bytes, label)
+        del image_bytes
+        size = (image.shape[1], image.shape[0])
+        result = await run_in_threadpool(compute, image)
+        del image
+        
+        if key is not None and result is not None:
+            await run_in_threadpool(self.cache.put, key, pack_array(result, size))
+        return result, size
+    
+    async def _landmarks_async(
+        self,
+        image_base64: str,
+        profile: str,
+        label: Optional[str]
+    ) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+        """_detect on an upload, through the shared cache (see _cached_async)"""
+        return await self._cached_async(
+            image_base64, "landmarks", profile, label, lambda image: self._detect(image, profile)
+        )
+    
+    async def extract_landmark_array_async(self, image_base64: str) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+        """
+        Decode one image and extract its mesh as an array
+        
+        Decode and inference run in the threadpool as separate steps, like
+        extract_landmarks_from_base64_async. No quality gate.
+        
+        Args:
+            image_base64: Base64 encoded image
+        
+        Returns:
+            (landmarks of shape (478, 3) or None if no face, (width, height))
+        """
+        landmarks, size = await self._landmarks_async(image_base64, "precise", None)
+        return (None if landmarks is None else landmarks.astype(np.float32)), size
+    
+    async def extract_faces_from_base64_async(
+        self,
+        image_base64: str,
+        max_faces: int,
+        profile: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Decode a group photo and mesh every face in it
+        
+        Decode (with the quality gate) and inference run in the threadpool as
+        separate steps, like extract_landmarks_from_base64_async. With the
+        gate enabled, faces smaller than QUALITY_MIN_FACE_PX are dropped.
+        
+        Args:
+            image_base64: Base64 encoded group photo
+            max_faces: Most faces to mesh
+            profile: ENGINE_PROFILES key, defaults to GROUP_PROFILE
+        
+        Returns:
+            process_image_faces result for the kept faces
+        
+        Raises:
+            ImageQualityError: If the photo fails the quality gate, or every
+                face found is too small
+        """
+        profile = profile or settings.group_profile
+        faces, (width, height) = await self._cached_async(
+            image_base64, "faces", f"{profile}:{max_faces}", "Group photo",
+            lambda image: self.process_image_faces(image, max_faces, profile)
+        )
+        
+        if settings.quality_gate and len(faces):
+            extent = np.maximum(np.ptp(faces[:, :, 0], axis=1) * width, np.ptp(faces[:, :, 1], axis=1) * height)
+            large = extent >= settings.quality_min_face_px
+            if not large.any():
+                check_face_size(faces[int(np.argmax(extent))], width, height, "Group photo")
+            faces = faces[large]
+        return faces
+    
     def extract_landmarks_from_base64(
         self,
         front_image_base64: str,
-        side_image_base64: Optional[str] = None
+        side_image_base64: Optional[str] = None,
+        profile: Optional[str] = None
     ) -> LandmarkData:
         """
         Extract landmarks from base64 encoded images
@@ -101,16 +618,18 @@ class VisionEngine:
         Args:
             front_image_base64: Base64 encoded front-facing image
             side_image_base64: Optional base64 encoded side profile image
+            profile: ENGINE_PROFILES key for the front image, defaults to
+                ANALYZE_PROFILE; the side image uses SIDE_PROFILE
             
         Returns:
             LandmarkData containing extracted landmarks
         """
         # Process front image
         front_image = self.decode_base64_image(front_image_base64)
-        front_landmarks = self.process_image(front_image)
+        front_landmarks = self.process_image(front_image, profile or settings.analyze_profile)
         
         if front_landmarks is None:
-            return LandmarkData(
+            return LandmarkData.model_construct(
                 front_landmarks=[],
                 side_landmarks=None,
                 face_detected=False,
@@ -121,9 +640,63 @@ class VisionEngine:
         side_landmarks = None
         if side_image_base64:
             side_image = self.decode_base64_image(side_image_base64)
-            side_landmarks = self.process_image(side_image)
+            side_landmarks = self.process_image(side_image, settings.side_profile)
         
-        return LandmarkData(
+        return LandmarkData.model_construct(
+            front_landmarks=front_landmarks,
+            side_landmarks=side_landmarks,
+            face_detected=True,
+            confidence=self._calculate_confidence(front_landmarks)
+        )
+    
+    async def extract_landmarks_from_base64_async(
+        self,
+        front_image_base64: str,
+        side_image_base64: Optional[str] = None,
+        profile: Optional[str] = None
+    ) -> LandmarkData:
+        """
+        Async variant of extract_landmarks_from_base64
+        
+        Each decode/inference stage runs in the threadpool as its own step, so a
+        cancelled request stops before starting the next stage. Images go
+        through the quality gate before Face Mesh runs on them. With a shared
+        cache, a repeated upload skips both (see _cached_async).
+        
+        Args:
+            front_image_base64: Base64 encoded front-facing image
+            side_image_base64: Optional base64 encoded side profile image
+            profile: ENGINE_PROFILES key for the front image, defaults to
+                ANALYZE_PROFILE; the side image uses SIDE_PROFILE
+            
+        Returns:
+            LandmarkData containing extracted landmarks
+        
+        Raises:
+            ImageQualityError: If an image fails the quality gate
+        """
+        front, (front_width, front_height) = await self._landmarks_async(
+            front_image_base64, profile or settings.analyze_profile, "Front image"
+        )
+        
+        if front is None:
+            return LandmarkData.model_construct(
+                front_landmarks=[],
+                side_landmarks=None,
+                face_detected=False,
+                confidence=0.0
+            )
+        
+        front_landmarks = front.tolist()
+        if settings.quality_gate:
+            check_face_size(front_landmarks, front_width, front_height, "Front image")
+        
+        side_landmarks = None
+        if side_image_base64:
+            side, _ = await self._landmarks_async(side_image_base64, settings.side_profile, "Side image")
+            side_landmarks = None if side is None else side.tolist()
+        
+        return LandmarkData.model_construct(
             front_landmarks=front_landmarks,
             side_landmarks=side_landmarks,
             face_detected=True,
@@ -182,6 +755,9 @@ class VisionEngine:
         """
         Draw landmarks on an image for visualization
         
+        Points (and the tessellation) are drawn in batched calls, see
+        app.services.overlay.
+        
         Args:
             image: Original image
             landmarks: Landmark coordinates
@@ -190,26 +766,11 @@ class VisionEngine:
         Returns:
             Image with landmarks drawn
         """
-        output_image = image.copy()
-        h, w = image.shape[:2]
-        
-        # Draw landmarks as points
-        for x, y, z in landmarks:
-            cx, cy = int(x * w), int(y * h)
-            cv2.circle(output_image, (cx, cy), 1, (0, 255, 0), -1)
-        
-        if draw_mesh:
-            # Draw face mesh connections
-            mp_drawing = mp.solutions.drawing_utils
-            mp_drawing_styles = mp.solutions.drawing_styles
-            
-            # This requires the original MediaPipe results object
-            # For now, just draw the points
-            pass
-        
-        return output_image
+        return render_overlay(image, landmarks, points=True, mesh=draw_mesh, measurements=False)
     
     def __del__(self):
         """Cleanup MediaPipe resources"""
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
+        for pool in getattr(self, 'pools', {}).values():
+            pool.close()
+        if hasattr(self, 'face_detection'):
+            self.face_detection.close()
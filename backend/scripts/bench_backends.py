@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Benchmark the landmark backends on the same image corpus
+
+Runs every image through each backend (both Face Mesh engine profiles, and
+every FaceLandmarker running mode / thread count) directly, without the ROI stage, and reports per-image latency
+(p50/p95), throughput, detection rate and the mean landmark offset from the
+first backend ("precise" Face Mesh), so speed and agreement can be compared.
+
+Usage (from backend/):
+    python scripts/bench_backends.py --model models/face_landmarker.task
+    python scripts/bench_backends.py --images ~/faces --threads 1,2,4 --modes image,video
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+from synthetic_faces import synthetic_face  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def load_corpus(directory: Optional[Path], count: int, size: int) -> List[np.ndarray]:
+    """RGB arrays from a directory of photos, or synthetic faces"""
+    if directory is None:
+        return [synthetic_face(seed, size) for seed in range(count)]
+    
+    from PIL import Image
+    
+    paths = sorted(p for p in directory.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)[:count]
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    return [np.asarray(Image.open(path).convert("RGB")) for path in paths]
+
+
+def run_backend(backend, images: List[np.ndarray], repeats: int) -> dict:
+    """Time every image `repeats` times; the first pass doubles as warm-up"""
+    backend.detect(images[0])
+    
+    latencies = []
+    landmarks = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        landmarks = []
+        for image in images:
+            t = time.perf_counter()
+            landmarks.append(backend.detect(image))
+            latencies.append((time.perf_counter() - t) * 1000)
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+            "mean": round(float(np.mean(latencies)), 2),
+        },
+        "images_per_second": round(len(latencies) / elapsed, 1),
+        "detection_rate": round(sum(l is not None for l in landmarks) / len(images), 3),
+        "_landmarks": landmarks,
+    }
+
+
+def mean_offset(reference: List[Optional[np.ndarray]], other: List[Optional[np.ndarray]], sizes: List[tuple]) -> Optional[float]:
+    """Mean landmark distance in pixels over images both backends detected"""
+    offsets = []
+    for a, b, (height, width) in zip(reference, other, sizes):
+        if a is None or b is None:
+            continue
+        count = min(len(a), len(b))
+        delta = (a[:count, :2] - b[:count, :2]) * (width, height)
+        offsets.append(float(np.linalg.norm(delta, axis=1).mean()))
+    return round(float(np.mean(offsets)), 2) if offsets else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=Path, help="Directory of face photos (default: synthetic faces)")
+    parser.add_argument("--count", type=int, default=16, help="Images in the corpus")
+    parser.add_argument("--image-size", type=int, default=480, help="Synthetic face size in pixels")
+    parser.add_argument("--repeats", type=int, default=3, help="Passes over the corpus per backend")
+    parser.add_argument("--model", help="face_landmarker.task path (default: FACE_LANDMARKER_MODEL_PATH)")
+    parser.add_argument("--modes", default="image,video", help="FaceLandmarker running modes to run")
+    parser.add_argument("--threads", default="0", help="Comma-separated XNNPACK thread counts (0 = default)")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    args = parser.parse_args()
+    
+    from app.services.landmark_backends import FaceLandmarkerBackend, FaceMeshBackend
+    
+    images = load_corpus(args.images, args.count, args.image_size)
+    sizes = [image.shape[:2] for image in images]
+    
+    candidates = [
+        ("face_mesh[precise]", lambda: FaceMeshBackend(refine_landmarks=True)),
+        ("face_mesh[fast]", lambda: FaceMeshBackend(refine_landmarks=False)),
+    ]
+    for mode in filter(None, args.modes.split(",")):
+        for threads in (int(t) for t in args.threads.split(",")):
+            label = f"face_landmarker[{mode}, threads={threads or 'default'}]"
+            candidates.append((label, lambda mode=mode, threads=threads: FaceLandmarkerBackend(
+                model_path=args.model, running_mode=mode, threads=threads
+            )))
+    
+    results: Dict[str, dict] = {}
+    reference = None
+    for label, factory in candidates:
+        try:
+            backend = factory()
+        except Exception as e:
+            results[label] = {"error": str(e)}
+            continue
+        try:
+            result = run_backend(backend, images, args.repeats)
+        finally:
+            backend.close()
+        landmarks = result.pop("_landmarks")
+        if reference is None:
+            reference = landmarks
+        else:
+            result["offset_from_face_mesh_px"] = mean_offset(reference, landmarks, sizes)
+        results[label] = result
+        print(f"{label}: p50 {result['latency_ms']['p50']} ms", file=sys.stderr)
+    
+    report = {
+        "corpus": {"images": len(images), "source": str(args.images or "synthetic"), "repeats": args.repeats},
+        "backends": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
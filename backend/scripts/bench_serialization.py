@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Benchmark response construction + serialization CPU per request
+
+Compares FastAPI's default path (validated pydantic construction, response_model
+re-validation, JSON-mode dump, json.dumps) with the lean path used by the routes
+(model_construct + ORJSONResponse).
+
+Usage (from backend/):
+    python scripts/bench_serialization.py [--iterations 5000]
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.api.responses import ORJSONResponse  # noqa: E402
+from app.models.schemas import (  # noqa: E402
+    AnalysisResponse,
+    AnalysisResult,
+    GeometricMeasurements,
+    RadarData,
+)
+
+MEASUREMENTS = {
+    "canthal_tilt": 5.2,
+    "bigonial_bizygomatic_ratio": 0.77,
+    "midface_ratio": 0.44,
+    "gonial_angle": 127.3,
+    "nasofrontal_angle": 132.5,
+    "facial_thirds": [0.32, 0.35, 0.33],
+    "symmetry_score": 0.92,
+    "ipd_face_ratio": 0.44,
+}
+RADAR = {"eyes": 8.5, "jaw": 7.5, "midface": 6.8, "symmetry": 8.2, "harmony": 7.8}
+TEXT = {
+    "score": 7.5,
+    "tier": "Chadlite",
+    "analysis": "Cấu trúc khuôn mặt của bạn cho thấy sự hài hòa tốt. " * 12,
+    "strengths": ["Positive canthal tilt (5.2°)", "Ideal jaw-to-cheekbone ratio (77%)"] * 3,
+    "weaknesses": ["Slightly elongated midface"] * 3,
+    "advice": "Consider mewing exercises and lowering body fat. " * 6,
+}
+
+RESPONSE_ADAPTER = TypeAdapter(AnalysisResponse)
+
+
+def build_default() -> AnalysisResponse:
+    """Validated construction, as the routes did before"""
+    return AnalysisResponse(
+        success=True,
+        data=AnalysisResult(
+            **TEXT,
+            radar_data=RadarData(**RADAR),
+            measurements=GeometricMeasurements(**MEASUREMENTS)
+        ),
+        timestamp=datetime.utcnow()
+    )
+
+
+def build_lean() -> AnalysisResponse:
+    """Trusted construction for internally produced data"""
+    return AnalysisResponse.model_construct(
+        success=True,
+        data=AnalysisResult.model_construct(
+            **TEXT,
+            radar_data=RadarData.model_construct(**RADAR),
+            measurements=GeometricMeasurements.model_construct(**MEASUREMENTS)
+        ),
+        timestamp=datetime.utcnow()
+    )
+
+
+def default_path() -> bytes:
+    """Mirror of fastapi.routing.serialize_response + JSONResponse"""
+    response = build_default()
+    value = RESPONSE_ADAPTER.validate_python(response)
+    content = RESPONSE_ADAPTER.dump_python(value, mode="json")
+    return JSONResponse(content).body
+
+
+def lean_path() -> bytes:
+    return ORJSONResponse(build_lean()).body
+
+
+def compare_default_path() -> bytes:
+    """/analyze/compare payload: model_dump() per model, jsonable_encoder, json.dumps"""
+    payload = {
+        "success": True,
+        "measurements": GeometricMeasurements(**MEASUREMENTS).model_dump(),
+        "model_results": {
+            f"model-{i}": {"success": True, "data": build_default().data.model_dump(), "time_seconds": 1.2}
+            for i in range(4)
+        },
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def compare_lean_path() -> bytes:
+    payload = {
+        "success": True,
+        "measurements": GeometricMeasurements.model_construct(**MEASUREMENTS),
+        "model_results": {
+            f"model-{i}": {"success": True, "data": build_lean().data, "time_seconds": 1.2}
+            for i in range(4)
+        },
+        "timestamp": datetime.utcnow(),
+    }
+    return ORJSONResponse(payload).body
+
+
+def bench(fn, iterations: int) -> float:
+    """Return microseconds per call"""
+    for _ in range(min(200, iterations)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    
+    # Both paths must produce the same document
+    assert json.loads(default_path())["data"] == json.loads(lean_path())["data"]
+    
+    rows = [
+        ("analyze", bench(default_path, args.iterations), bench(lean_path, args.iterations), len(lean_path())),
+        ("compare", bench(compare_default_path, args.iterations), bench(compare_lean_path, args.iterations), len(compare_lean_path())),
+    ]
+    
+    print(f"{'payload':<10}{'default µs':>12}{'lean µs':>10}{'speedup':>9}{'bytes':>8}")
+    for name, default_us, lean_us, size in rows:
+        print(f"{name:<10}{default_us:>12.1f}{lean_us:>10.1f}{default_us / lean_us:>8.1f}x{size:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Compare per-worker caching with the shared SQLite cache as workers are added
+
+Replays one skewed (Zipf) stream of repeated uploads, spread round-robin over
+N worker processes. Per-worker mode gives each process its own LRU of the same
+size; shared mode has every process read and write one SharedCache file. The
+report lists the hit rate and get/put latency per worker count: with the
+shared cache the hit rate should stay flat as workers are added.
+
+Usage (from backend/):
+    python scripts/bench_shared_cache.py
+    python scripts/bench_shared_cache.py --workers 1,2,4,8 --keys 5000 --cache-mb 16
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+
+def request_stream(requests: int, keys: int, skew: float, seed: int) -> List[int]:
+    """Key ids; a few popular uploads repeat often, most are seen once or twice"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, keys + 1) ** skew
+    return rng.choice(keys, size=requests, p=weights / weights.sum()).tolist()
+
+
+def run_local(stream: List[int], value: bytes, max_bytes: int) -> dict:
+    """One worker's slice against its own byte-bounded LRU"""
+    entries: "OrderedDict[int, bytes]" = OrderedDict()
+    used = hits = 0
+    for key in stream:
+        if key in entries:
+            entries.move_to_end(key)
+            hits += 1
+            continue
+        entries[key] = value
+        used += len(value)
+        while used > max_bytes:
+            used -= len(entries.popitem(last=False)[1])
+    return {"hits": hits, "requests": len(stream), "get_ms": [], "put_ms": []}
+
+
+def run_shared(args: tuple) -> dict:
+    """One worker's slice against the SharedCache file"""
+    stream, value, path, max_bytes, start_at = args
+    from app.services.shared_cache import SharedCache
+    
+    cache = SharedCache(path, max_bytes=max_bytes)
+    # Start together, so the workers' requests interleave as they would live
+    time.sleep(max(0.0, start_at - time.time()))
+    hits = 0
+    get_ms, put_ms = [], []
+    for key in stream:
+        t = time.perf_counter()
+        found = cache.get(f"bench:{key}") is not None
+        get_ms.append((time.perf_counter() - t) * 1000)
+        if found:
+            hits += 1
+            continue
+        t = time.perf_counter()
+        cache.put(f"bench:{key}", value)
+        put_ms.append((time.perf_counter() - t) * 1000)
+    cache.close()
+    return {"hits": hits, "requests": len(stream), "get_ms": get_ms, "put_ms": put_ms}
+
+
+def summarize(results: List[dict]) -> dict:
+    hits = sum(r["hits"] for r in results)
+    requests = sum(r["requests"] for r in results)
+    summary = {"hit_rate": round(hits / requests, 3)}
+    for name in ("get_ms", "put_ms"):
+        samples = [s for r in results for s in r[name]]
+        if samples:
+            summary[name] = {
+                "p50": round(float(np.percentile(samples, 50)), 3),
+                "p99": round(float(np.percentile(samples, 99)), 3),
+            }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--requests", type=int, default=6000, help="Uploads in the stream")
+    parser.add_argument("--keys", type=int, default=3000, help="Distinct uploads")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of upload popularity")
+    parser.add_argument("--value-kb", type=float, default=11.5, help="Entry size (a packed 478-point mesh is ~11.5 KB)")
+    parser.add_argument("--cache-mb", type=float, default=8.0, help="Size of each per-worker LRU and of the shared cache")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    args = parser.parse_args()
+    
+    stream = request_stream(args.requests, args.keys, args.skew, args.seed)
+    value = os.urandom(int(args.value_kb * 1024))
+    max_bytes = int(args.cache_mb * 1024 * 1024)
+    
+    results = {}
+    for workers in (int(w) for w in args.workers.split(",")):
+        slices = [stream[i::workers] for i in range(workers)]
+        local = summarize([run_local(s, value, max_bytes) for s in slices])
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.sqlite3")
+            start_at = time.time() + 1.0
+            with multiprocessing.Pool(workers) as pool:
+                shared = summarize(pool.map(
+                    run_shared, [(s, value, path, max_bytes, start_at) for s in slices]
+                ))
+        
+        results[str(workers)] = {"per_worker": local, "shared": shared}
+        print(
+            f"{workers} workers: per-worker hit rate {local['hit_rate']}, shared {shared['hit_rate']}",
+            file=sys.stderr
+        )
+    
+    report = {
+        "stream": {
+            "requests": args.requests, "keys": args.keys, "skew": args.skew,
+            "value_kb": args.value_kb, "cache_mb": args.cache_mb,
+        },
+        "workers": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
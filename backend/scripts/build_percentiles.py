@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Build or extend the population percentile index from measured datasets
+
+Each input is a scripts/measure_bulk.py output directory (its
+measurements.npz), a .npz with one array per measurement, or a .csv with one
+column per measurement. Columns are matched by name against
+GeometricMeasurements (facial_thirds as facial_thirds_upper/middle/lower);
+other columns are ignored.
+
+With --update the inputs are merged into the existing index instead of
+replacing it. Datasets already in the index (same content hash) are skipped,
+so re-running an update after adding one archive only reads that archive.
+Workers load the index at startup: restart or recycle them to pick up a new
+file.
+
+Usage (from backend/):
+    python scripts/build_percentiles.py /tmp/measured
+    python scripts/build_percentiles.py /tmp/measured-2024 --update
+    python scripts/build_percentiles.py a.csv b.npz --out /srv/percentiles.npz
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.services.percentiles import PercentileIndex, measurement_columns  # noqa: E402
+
+
+def dataset_file(source: Path) -> Path:
+    """The file holding the measurements of an input"""
+    return source / "measurements.npz" if source.is_dir() else source
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_columns(path: Path) -> Dict[str, np.ndarray]:
+    """Measurement columns of a .npz or .csv dataset"""
+    names = set(measurement_columns())
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files if name in names}
+    
+    with path.open(newline="") as f:
+        reader = csv.DictReader(f)
+        wanted = [name for name in reader.fieldnames or [] if name in names]
+        values: Dict[str, list] = {name: [] for name in wanted}
+        for row in reader:
+            for name in wanted:
+                values[name].append(float(row[name]) if row[name] not in ("", "None") else np.nan)
+    return {name: np.array(column, dtype=np.float64) for name, column in values.items()}
+
+
+def lookup_us(index: PercentileIndex, repeats: int = 2000) -> float:
+    """Mean time of one percentile() call, in microseconds"""
+    columns = [name for name, values in index.columns.items() if len(values)]
+    if not columns:
+        return 0.0
+    probes = [(name, float(index.columns[name][len(index.columns[name]) // 2])) for name in columns]
+    start = time.perf_counter()
+    for i in range(repeats):
+        index.percentile(*probes[i % len(probes)])
+    return round((time.perf_counter() - start) / repeats * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("inputs", type=Path, nargs="+", help="measure_bulk output dirs, .npz or .csv files")
+    parser.add_argument("--out", type=Path, default=Path(settings.percentile_index_path), help="Index file")
+    parser.add_argument("--update", action="store_true", help="Merge into the existing index instead of replacing it")
+    args = parser.parse_args()
+    
+    index = PercentileIndex({})
+    if args.update:
+        if not args.out.exists():
+            parser.error(f"--update: {args.out} does not exist")
+        index = PercentileIndex.load(str(args.out))
+    known = {source["sha256"] for source in index.sources}
+    
+    added = 0
+    for source in args.inputs:
+        path = dataset_file(source)
+        if not path.is_file() or path.suffix not in (".npz", ".csv"):
+            parser.error(f"{source}: not a measure_bulk output directory, .npz or .csv file")
+        sha256 = file_hash(path)
+        if sha256 in known:
+            print(f"{path}: already in the index, skipped", file=sys.stderr)
+            continue
+        
+        columns = read_columns(path)
+        if not columns:
+            parser.error(f"{path}: no measurement columns")
+        rows = max(len(values) for values in columns.values())
+        index = index.merge(columns, {"path": str(path.resolve()), "rows": rows, "sha256": sha256})
+        known.add(sha256)
+        added += 1
+        print(f"{path}: {rows} rows", file=sys.stderr)
+    
+    if added:
+        os.makedirs(args.out.resolve().parent, exist_ok=True)
+        index.save(str(args.out))
+    
+    report = {
+        "index": str(args.out),
+        "datasets_added": added,
+        **index.stats(),
+        "columns": {
+            name: {
+                "p5": round(float(values[int(0.05 * (len(values) - 1))]), 4),
+                "p50": round(float(values[int(0.50 * (len(values) - 1))]), 4),
+                "p95": round(float(values[int(0.95 * (len(values) - 1))]), 4),
+            }
+            for name, values in index.columns.items() if len(values)
+        },
+        "lookup_us": lookup_us(index),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
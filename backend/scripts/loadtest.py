@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+"""
+End-to-end load test for the analysis endpoints
+
+Drives the real FastAPI app in-process (httpx ASGITransport, no sockets or
+network) with a stubbed LLM, so only decode, FaceMesh, geometry, parsing and
+serialization cost CPU. Images come from --images or the synthetic face corpus.
+Prints a JSON report with p50/p95/p99 latency, throughput and error rates per
+endpoint.
+
+Usage (from backend/):
+    python scripts/loadtest.py --requests 200 --concurrency 8 --mix quick=6,analyze=3,compare=1
+    python scripts/loadtest.py --url http://localhost:8000 ...   # a running server (real LLM)
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from synthetic_faces import synthetic_corpus, to_data_url  # noqa: E402
+
+ENDPOINTS = {
+    "quick": "/api/v1/analyze/quick",
+    "analyze": "/api/v1/analyze",
+    "compare": "/api/v1/analyze/compare",
+}
+
+IMAGE_SUFFIXES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp"}
+
+STUB_RESPONSE = json.dumps({
+    "score": 6.8,
+    "tier": "Chadlite",
+    "analysis": "Balanced proportions with a slightly long midface. " * 8,
+    "strengths": ["Positive canthal tilt", "Good facial symmetry", "Defined jawline"],
+    "weaknesses": ["Slightly elongated midface"],
+    "advice": "Maintain low body fat and good posture. " * 4,
+    "radar_data": {"eyes": 7.5, "jaw": 7.0, "midface": 6.0, "symmetry": 8.0, "harmony": 7.0},
+})
+
+
+# ============================================
+# STUBBED LLM
+# ============================================
+
+def install_stub_llm(app, latency: float, jitter: float) -> None:
+    """
+    Replace provider calls with a sleep + canned JSON answer
+    
+    The analyzer dependency is overridden (parsing and result construction
+    still run), and the shared Gemini model factory is swapped for
+    /analyze/compare.
+    """
+    from app.api import deps
+    from app.services.enrichment import EnrichmentService
+    from app.services.llm_analyzer import LLMAnalyzer
+    
+    async def fake_call() -> str:
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+        return STUB_RESPONSE
+    
+    class StubLLMAnalyzer(LLMAnalyzer):
+        async def _call_claude_async(self, user_prompt: str) -> str:
+            return await fake_call()
+        
+        async def _call_gemini_async(self, user_prompt: str) -> str:
+            return await fake_call()
+    
+    class StubResponse:
+        text = STUB_RESPONSE
+    
+    class StubGenerativeModel:
+        def __init__(self, model_name: str, *args, **kwargs):
+            self.model_name = model_name
+        
+        async def generate_content_async(self, prompt: str):
+            await fake_call()
+            return StubResponse()
+    
+    from app.services import llm_clients
+    llm_clients.get_gemini_model = lambda model_name=None: StubGenerativeModel(model_name)
+    
+    analyzer = StubLLMAnalyzer(scoring_engine=deps.get_scoring_engine())
+    enrichment = EnrichmentService(analyzer)
+    app.dependency_overrides[deps.get_llm_analyzer] = lambda: analyzer
+    app.dependency_overrides[deps.get_enrichment_service] = lambda: enrichment
+
+
+# ============================================
+# WORKLOAD
+# ============================================
+
+def load_images(directory: Optional[Path], count: int, size: int) -> List[str]:
+    """Data URLs from a directory of photos, or from synthetic faces"""
+    if directory is None:
+        return [to_data_url(image) for image in synthetic_corpus(count, size)]
+    
+    images = [
+        f"data:{IMAGE_SUFFIXES[path.suffix.lower()]};base64,{base64.b64encode(path.read_bytes()).decode()}"
+        for path in sorted(directory.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+    if not images:
+        raise SystemExit(f"No images found in {directory}")
+    return images
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'quick=6,analyze=3,compare=1' -> {'quick': 6.0, ...}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}' in --mix (choose from {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def plan_requests(weights: Dict[str, float], images: List[str], total: int, rng: random.Random) -> List[Tuple[str, dict]]:
+    """Pick endpoint and images for every request up front"""
+    names = list(weights)
+    plan = []
+    for name in rng.choices(names, weights=[weights[n] for n in names], k=total):
+        body = {"front_image": rng.choice(images)}
+        if name == "analyze":
+            body["side_image"] = rng.choice(images)
+        plan.append((name, body))
+    return plan
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+async def run_load(client: httpx.AsyncClient, plan: List[Tuple[str, dict]], concurrency: int) -> Tuple[List[tuple], float]:
+    """
+    Execute the plan with a fixed number of concurrent clients
+    
+    Returns:
+        (endpoint, status, latency seconds) per request, and wall-clock duration
+    """
+    results = []
+    queue = iter(plan)
+    
+    async def worker():
+        for name, body in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.post(ENDPOINTS[name], json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            results.append((name, status, time.perf_counter() - start))
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def summarize(results: List[tuple], duration: float) -> dict:
+    """Per-endpoint and overall latency percentiles, throughput and error rates"""
+    groups = defaultdict(list)
+    for name, status, latency in results:
+        groups[name].append((status, latency))
+        groups["overall"].append((status, latency))
+    
+    report = {}
+    for name in sorted(groups, key=lambda name: (name == "overall", name)):
+        rows = groups[name]
+        latencies = np.array([latency for _, latency in rows]) * 1000
+        statuses = defaultdict(int)
+        for status, _ in rows:
+            statuses[str(status)] += 1
+        errors = sum(count for status, count in statuses.items() if status != "200")
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[name] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / duration, 2),
+            "error_rate": round(errors / len(rows), 4),
+            "status_counts": dict(sorted(statuses.items())),
+            "latency_ms": {
+                "p50": round(float(p50), 1),
+                "p95": round(float(p95), 1),
+                "p99": round(float(p99), 1),
+                "mean": round(float(latencies.mean()), 1),
+                "max": round(float(latencies.max()), 1),
+            },
+        }
+    return report
+
+
+async def main_async(args) -> dict:
+    rng = random.Random(args.seed)
+    images = load_images(args.images, args.corpus_size, args.image_size)
+    weights = parse_mix(args.mix)
+    warmup = plan_requests(weights, images, args.warmup, rng)
+    plan = plan_requests(weights, images, args.requests, rng)
+    
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        lifespan = None
+    else:
+        from app.main import app
+        install_stub_llm(app, args.llm_latency, args.llm_jitter)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadtest",
+            timeout=args.timeout
+        )
+        # ASGITransport doesn't send lifespan events; run startup/shutdown ourselves
+        lifespan = app.router.lifespan_context(app)
+    
+    if lifespan is not None:
+        await lifespan.__aenter__()
+    try:
+        async with client:
+            if warmup:
+                await run_load(client, warmup, args.concurrency)
+            results, duration = await run_load(client, plan, args.concurrency)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    
+    return {
+        "config": {
+            "target": args.url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": weights,
+            "images": str(args.images) if args.images else f"synthetic x{len(images)}",
+            "llm_latency_s": None if args.url else args.llm_latency,
+        },
+        "duration_seconds": round(duration, 3),
+        "endpoints": summarize(results, duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--mix", default="quick=6,analyze=3,compare=1", help="Endpoint weights")
+    parser.add_argument("--images", type=Path, help="Directory of face photos (default: synthetic faces)")
+    parser.add_argument("--corpus-size", type=int, default=16, help="Synthetic faces to generate")
+    parser.add_argument("--image-size", type=int, default=480, help="Synthetic face size in pixels")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Stub LLM mean latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="Stub LLM latency stddev (s)")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    args = parser.parse_args()
+    
+    # Keep stdout clean for the JSON report (app startup logs go to stderr)
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
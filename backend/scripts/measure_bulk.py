@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+"""
+Measure every face photo in a directory or manifest, offline
+
+Decodes and runs Face Mesh in a process pool (one VisionEngine per process),
+computes GeometricMeasurements with GeometryCalculator (front view, the same
+values /analyze returns without a side image) and writes columnar files.
+
+Inputs are split into fixed shards. Each shard is written atomically once all
+of its images are done, so a run that is interrupted picks up at the first
+missing shard when started again with the same --out.
+
+Output (in --out):
+    run.json               Settings and input count, fixed by the first run
+    paths.txt              Input paths in processing order (row = index)
+    parts/part-NNNNN.npz   One per shard (the checkpoints)
+    landmarks.npy          (F, N, 3) float32 normalized landmarks of measured images
+    measurements.npz       index, width, height and one array per measurement
+    measurements.csv       path, width, height and the measurements
+    failures.csv           path, error code and message of skipped images
+
+Usage (from backend/):
+    python scripts/measure_bulk.py ~/archive --out /tmp/measured
+    python scripts/measure_bulk.py manifest.txt --out /tmp/measured --workers 4 --profile fast
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np  # noqa: E402
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+# (index, landmarks or None, (width, height), error code, error message)
+Result = Tuple[int, Optional[np.ndarray], Tuple[int, int], str, str]
+
+
+# ============================================
+# INPUTS
+# ============================================
+
+def list_inputs(source: Path) -> List[str]:
+    """
+    Image paths from a directory (recursive, sorted) or a manifest: a CSV
+    with a `path` column, or a text file with one path per line. Relative
+    manifest entries are resolved against the manifest's directory.
+    """
+    if source.is_dir():
+        return sorted(
+            str(path) for path in source.rglob("*")
+            if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file()
+        )
+    
+    if source.suffix.lower() == ".csv":
+        with source.open(newline="") as f:
+            entries = [row["path"] for row in csv.DictReader(f)]
+    else:
+        entries = [
+            line.strip() for line in source.read_text().splitlines()
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+    return [str(source.parent / entry) if not os.path.isabs(entry) else entry for entry in entries]
+
+
+def open_run(out: Path, source: Path, settings: dict) -> Tuple[List[str], dict]:
+    """
+    Input paths and settings of the run in `out`, creating it on first use
+    
+    A resumed run keeps its original input list and settings; settings left
+    as None are taken from it, others must match.
+    """
+    run_file = out / "run.json"
+    if run_file.exists():
+        run = json.loads(run_file.read_text())
+        settings = {key: run["settings"][key] if value is None else value for key, value in settings.items()}
+        changed = [key for key, value in settings.items() if run["settings"].get(key) != value]
+        if changed:
+            raise SystemExit(
+                f"{out} was started with different {', '.join(changed)}; "
+                "use a new --out or the original settings"
+            )
+        return (out / "paths.txt").read_text().splitlines(), settings
+    
+    paths = list_inputs(source)
+    if not paths:
+        raise SystemExit(f"No images found in {source}")
+    (out / "parts").mkdir(parents=True, exist_ok=True)
+    (out / "paths.txt").write_text("\n".join(paths) + "\n")
+    run_file.write_text(json.dumps({
+        "source": str(source),
+        "images": len(paths),
+        "settings": settings,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, indent=2) + "\n")
+    return paths, settings
+
+
+# ============================================
+# WORKERS
+# ============================================
+
+_engine = None
+
+
+def init_worker() -> None:
+    """Build this process's VisionEngine (graphs are per process)"""
+    global _engine
+    import cv2
+    
+    # Parallelism comes from the pool; keep OpenCV from oversubscribing
+    cv2.setNumThreads(1)
+    from app.services.vision_engine import VisionEngine
+    _engine = VisionEngine()
+
+
+def measure_image(task: Tuple[int, str, str, bool]) -> Result:
+    """Decode and mesh one image; failures come back as an error code"""
+    from app.services.quality import ImageQualityError, check_face_size
+    from app.services.vision_engine import ImageTooLargeError
+    
+    index, path, profile, quality_gate = task
+    try:
+        image = _engine.decode_checked_bytes(Path(path).read_bytes(), "Image" if quality_gate else None)
+        height, width = image.shape[:2]
+        landmarks = _engine.process_image(image, profile)
+        if landmarks is None:
+            return index, None, (width, height), "FACE_NOT_DETECTED", "Could not detect a face."
+        if quality_gate:
+            check_face_size(landmarks, width, height, "Image")
+        return index, np.asarray(landmarks), (width, height), "", ""
+    except ImageTooLargeError as e:
+        return index, None, (0, 0), "IMAGE_TOO_LARGE", str(e)
+    except ImageQualityError as e:
+        return index, None, (0, 0), e.code, str(e)
+    except Exception as e:
+        return index, None, (0, 0), "UNREADABLE_IMAGE", f"{type(e).__name__}: {e}"
+
+
+# ============================================
+# SHARDS
+# ============================================
+
+def shard_path(out: Path, shard: int) -> Path:
+    return out / "parts" / f"part-{shard:05d}.npz"
+
+
+def shard_indices(shard: int, shard_size: int, total: int) -> range:
+    return range(shard * shard_size, min((shard + 1) * shard_size, total))
+
+
+def measure_columns(calculator, landmarks: np.ndarray) -> Dict[str, np.ndarray]:
+    """One float64 array per measurement (facial_thirds split in three, unset values NaN)"""
+    from app.services.percentiles import flatten_measurements, measurement_columns
+    
+    measurements = calculator.calculate_batch_measurements(landmarks) if len(landmarks) else []
+    rows = [flatten_measurements(measurement) for measurement in measurements]
+    return {
+        name: np.array([row.get(name, np.nan) for row in rows], dtype=np.float64)
+        for name in measurement_columns()
+    }
+
+
+def write_shard(path: Path, results: List[Result], calculator) -> None:
+    """Measure a finished shard and write it atomically (rename into place)"""
+    measured = [r for r in results if r[1] is not None]
+    failed = [r for r in results if r[1] is None]
+    landmarks = np.stack([r[1] for r in measured]) if measured else np.empty((0, 0, 3))
+    
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        np.savez(
+            f,
+            index=np.array([r[0] for r in measured], dtype=np.int64),
+            width=np.array([r[2][0] for r in measured], dtype=np.int32),
+            height=np.array([r[2][1] for r in measured], dtype=np.int32),
+            landmarks=landmarks.astype(np.float32),
+            failed_index=np.array([r[0] for r in failed], dtype=np.int64),
+            failed_code=np.array([r[3] for r in failed], dtype=str),
+            failed_message=np.array([r[4] for r in failed], dtype=str),
+            **measure_columns(calculator, landmarks)
+        )
+    os.replace(tmp, path)
+
+
+def load_shards(out: Path, shards: int) -> Iterator[Dict[str, np.ndarray]]:
+    for shard in range(shards):
+        with np.load(shard_path(out, shard)) as part:
+            yield {name: part[name] for name in part.files}
+
+
+def merge(out: Path, paths: List[str], shards: int) -> Tuple[int, int]:
+    """Concatenate the shards into the final files; returns (measured, failed)"""
+    from app.services.percentiles import measurement_columns
+    
+    measured = failed = 0
+    points = None
+    for part in load_shards(out, shards):
+        measured += len(part["index"])
+        failed += len(part["failed_index"])
+        if len(part["index"]):
+            points = part["landmarks"].shape[1]
+    
+    # Written through a memmap, so the archive never has to fit in memory
+    landmarks = np.lib.format.open_memmap(
+        out / "landmarks.npy", mode="w+", dtype=np.float32, shape=(measured, points or 0, 3)
+    )
+    header = ["width", "height"] + measurement_columns()
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in ["index"] + header}
+    row = 0
+    with (out / "measurements.csv").open("w", newline="") as m, (out / "failures.csv").open("w", newline="") as fl:
+        measurements_csv, failures_csv = csv.writer(m), csv.writer(fl)
+        measurements_csv.writerow(["path"] + header)
+        failures_csv.writerow(["path", "code", "message"])
+        for part in load_shards(out, shards):
+            for index, code, message in zip(part["failed_index"], part["failed_code"], part["failed_message"]):
+                failures_csv.writerow([paths[index], code, message])
+            
+            count = len(part["index"])
+            if not count:
+                continue
+            landmarks[row:row + count] = part["landmarks"]
+            row += count
+            for name, parts in columns.items():
+                parts.append(part[name])
+            for i in range(count):
+                measurements_csv.writerow([paths[part["index"][i]]] + [part[name][i].item() for name in header])
+    landmarks.flush()
+    del landmarks
+    
+    np.savez(
+        out / "measurements.npz",
+        **{name: np.concatenate(parts) if parts else np.empty(0) for name, parts in columns.items()}
+    )
+    return measured, failed
+
+
+# ============================================
+# MAIN
+# ============================================
+
+def main():
+    from app.core.config import settings
+    
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", type=Path, help="Directory of photos, or a manifest (.txt or .csv with a path column)")
+    parser.add_argument("--out", type=Path, required=True, help="Output (and checkpoint) directory")
+    parser.add_argument("--workers", type=int, default=settings.workers, help="Processes (default: WORKERS, one per core)")
+    parser.add_argument("--profile", choices=("precise", "fast"), help="Engine profile (default: ANALYZE_PROFILE)")
+    parser.add_argument("--shard-size", type=int, help="Images per checkpointed shard (default: 500)")
+    parser.add_argument("--quality-gate", action="store_true", help="Skip images /analyze would reject as unusable")
+    parser.add_argument("--report-seconds", type=float, default=5.0, help="Progress interval on stderr")
+    args = parser.parse_args()
+    
+    from app.services.geometry_calc import GeometryCalculator
+    
+    args.out.mkdir(parents=True, exist_ok=True)
+    resuming = (args.out / "run.json").exists()
+    paths, run_settings = open_run(args.out, args.source, {
+        "profile": args.profile or (None if resuming else settings.analyze_profile),
+        "backend": settings.vision_backend,
+        "shard_size": args.shard_size or (None if resuming else 500),
+        "quality_gate": args.quality_gate,
+    })
+    args.profile, args.shard_size = run_settings["profile"], run_settings["shard_size"]
+    shards = (len(paths) + args.shard_size - 1) // args.shard_size
+    pending = [shard for shard in range(shards) if not shard_path(args.out, shard).exists()]
+    done_before = len(paths) - sum(len(shard_indices(shard, args.shard_size, len(paths))) for shard in pending)
+    if done_before:
+        print(f"Resuming: {shards - len(pending)}/{shards} shards already done", file=sys.stderr)
+    
+    calculator = GeometryCalculator()
+    tasks = (
+        (index, paths[index], args.profile, args.quality_gate)
+        for shard in pending
+        for index in shard_indices(shard, args.shard_size, len(paths))
+    )
+    
+    start = last_report = time.perf_counter()
+    processed = 0
+    buffer: List[Result] = []
+    shard_iter = iter(pending)
+    current = next(shard_iter, None)
+    try:
+        if pending:
+            with multiprocessing.Pool(args.workers, initializer=init_worker) as pool:
+                for result in pool.imap(measure_image, tasks, chunksize=4):
+                    buffer.append(result)
+                    processed += 1
+                    # imap keeps input order, so a shard is done at its last index
+                    if result[0] == shard_indices(current, args.shard_size, len(paths))[-1]:
+                        write_shard(shard_path(args.out, current), buffer, calculator)
+                        buffer = []
+                        current = next(shard_iter, None)
+                    
+                    now = time.perf_counter()
+                    if now - last_report >= args.report_seconds:
+                        last_report = now
+                        rate = processed / (now - start)
+                        remaining = len(paths) - done_before - processed
+                        print(
+                            f"{done_before + processed}/{len(paths)} images, "
+                            f"{rate:.1f} images/s, ~{remaining / rate:.0f} s left",
+                            file=sys.stderr
+                        )
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same --out to resume", file=sys.stderr)
+        sys.exit(130)
+    elapsed = time.perf_counter() - start
+    
+    measured, failed = merge(args.out, paths, shards)
+    report = {
+        "images": len(paths),
+        "measured": measured,
+        "failed": failed,
+        "processed_this_run": processed,
+        "seconds": round(elapsed, 1),
+        "images_per_second": round(processed / elapsed, 1) if processed else None,
+        "workers": args.workers,
+        "out": str(args.out),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
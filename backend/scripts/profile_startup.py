@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+Startup profiler and cold-start budget check
+
+Two reports:
+- imports: `python -X importtime -c "import app.main"` aggregated by top-level
+  package (self time and cumulative time), so a heavy dependency that sneaks
+  back into the import path shows up immediately
+- endpoints: every endpoint is hit from a fresh interpreter (what a
+  serverless cold start looks like): app import, lifespan startup, first
+  request and a second (warm) request are timed separately and the first
+  request is checked against a per-endpoint budget
+
+Prints a JSON report and exits 1 when an endpoint is over budget.
+
+Usage (from backend/):
+    python scripts/profile_startup.py                 # PRELOAD_MODELS=false, like Vercel
+    python scripts/profile_startup.py --preload       # long-running server settings
+    python scripts/profile_startup.py --endpoints health,ready --top 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# name -> (method, path, first-request budget in ms)
+# Light endpoints must not touch the vision stack; /landmarks pays for
+# loading MediaPipe on its first call when models aren't preloaded
+ENDPOINTS = {
+    "health": ("GET", "/api/v1/health", 50),
+    "ready": ("GET", "/api/v1/ready", 50),
+    "models": ("GET", "/api/v1/models", 50),
+    "landmarks-info": ("GET", "/api/v1/landmarks-info", 50),
+    "metrics": ("GET", "/metrics", 50),
+    "landmarks": ("POST", "/api/v1/landmarks", 5000),
+}
+
+
+# ============================================
+# IMPORT TIME
+# ============================================
+
+def profile_imports(env: dict) -> List[dict]:
+    """
+    Import app.main under -X importtime and aggregate by top-level package
+    
+    Returns:
+        One entry per package: self_ms (sum of its modules' own time) and
+        cumulative_ms (its slowest single import, dependencies included)
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    self_us: Dict[str, int] = defaultdict(int)
+    cumulative_us: Dict[str, int] = defaultdict(int)
+    modules: Dict[str, int] = defaultdict(int)
+    
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_part, cumulative_part, name_part = line[len("import time:"):].split("|")
+        name = name_part.strip()
+        package = name.split(".")[0]
+        self_us[package] += int(self_part)
+        modules[package] += 1
+        cumulative_us[package] = max(cumulative_us[package], int(cumulative_part))
+    
+    return sorted(
+        (
+            {
+                "package": package,
+                "self_ms": round(self_us[package] / 1000, 1),
+                "cumulative_ms": round(cumulative_us[package] / 1000, 1),
+                "modules": modules[package],
+            }
+            for package in self_us
+        ),
+        key=lambda entry: entry["self_ms"],
+        reverse=True
+    )
+
+
+# ============================================
+# ENDPOINT COLD START
+# ============================================
+
+def run_child(method: str, path: str, body_file: Optional[str]) -> dict:
+    """Measure one cold start in this (fresh) interpreter"""
+    import asyncio
+    import contextlib
+    
+    timings = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        from app.main import app
+    timings["import_ms"] = (time.perf_counter() - start) * 1000
+    
+    import httpx
+    
+    body = None
+    if body_file:
+        with open(body_file, "rb") as f:
+            body = f.read()
+    
+    async def measure():
+        # ASGITransport doesn't send lifespan events; run startup ourselves
+        lifespan = app.router.lifespan_context(app)
+        step = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stderr):
+            await lifespan.__aenter__()
+        timings["startup_ms"] = (time.perf_counter() - step) * 1000
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://profile") as client:
+                for key in ("first_request_ms", "warm_request_ms"):
+                    step = time.perf_counter()
+                    response = await client.request(
+                        method, path, content=body,
+                        headers={"Content-Type": "application/json"} if body else None
+                    )
+                    timings[key] = (time.perf_counter() - step) * 1000
+                    timings["status"] = response.status_code
+        finally:
+            with contextlib.redirect_stdout(sys.stderr):
+                await lifespan.__aexit__(None, None, None)
+    
+    asyncio.run(measure())
+    timings["cold_total_ms"] = timings["import_ms"] + timings["startup_ms"] + timings["first_request_ms"]
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in timings.items()}
+
+
+def landmarks_body() -> bytes:
+    """JSON body for /landmarks with a synthetic face"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from synthetic_faces import encode_jpeg, synthetic_face, to_data_url
+    
+    return json.dumps({"image": to_data_url(encode_jpeg(synthetic_face(0)))}).encode()
+
+
+def profile_endpoints(names: List[str], env: dict) -> Dict[str, dict]:
+    """Cold-start every endpoint in its own interpreter"""
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        body_file = None
+        if "landmarks" in names:
+            # Built here so the child doesn't import cv2 before the app does
+            body_file = os.path.join(tmp, "landmarks.json")
+            with open(body_file, "wb") as f:
+                f.write(landmarks_body())
+        
+        for name in names:
+            method, path, budget = ENDPOINTS[name]
+            command = [sys.executable, __file__, "--child", method, path]
+            if method == "POST" and body_file:
+                command += ["--body-file", body_file]
+            proc = subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                report[name] = {"error": proc.stderr.strip().splitlines()[-1:], "budget_ms": budget, "within_budget": False}
+                continue
+            timings = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings["budget_ms"] = budget
+            timings["within_budget"] = timings["status"] < 500 and timings["first_request_ms"] <= budget
+            report[name] = timings
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoint names")
+    parser.add_argument("--preload", action="store_true", help="Profile with PRELOAD_MODELS=true")
+    parser.add_argument("--top", type=int, default=15, help="Packages listed in the import report")
+    parser.add_argument("--output", type=Path, help="Also write the JSON report here")
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--body-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        sys.path.insert(0, str(BACKEND_DIR))
+        print(json.dumps(run_child(*args.child, args.body_file)))
+        return
+    
+    names = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(names) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))} (choose from {', '.join(ENDPOINTS)})")
+    
+    env = {**os.environ, "PRELOAD_MODELS": "true" if args.preload else "false"}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")]))
+    
+    imports = profile_imports(env)
+    endpoints = profile_endpoints(names, env)
+    report = {
+        "preload_models": args.preload,
+        "python": sys.version.split()[0],
+        "import_total_ms": round(sum(entry["self_ms"] for entry in imports), 1),
+        "imports": imports[:args.top],
+        "endpoints": endpoints,
+    }
+    
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    
+    over_budget = [name for name, timings in endpoints.items() if not timings["within_budget"]]
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Synthetic face corpus for offline benchmarks and load tests
+
+Draws simple frontal faces (skin ellipse, eyes, brows, nose, mouth, hair) with
+randomized proportions and colors. MediaPipe Face Mesh detects them reliably,
+so the whole pipeline runs without bundled photos or network access.
+
+Usage (from backend/):
+    python scripts/synthetic_faces.py --count 16 --out /tmp/faces
+"""
+import argparse
+import base64
+import sys
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+
+def _color(values) -> tuple:
+    return tuple(int(v) for v in values)
+
+
+def synthetic_face(seed: int, size: int = 480) -> np.ndarray:
+    """
+    Render one synthetic frontal face
+    
+    Args:
+        seed: RNG seed (same seed, same face)
+        size: Width and height in pixels
+    
+    Returns:
+        RGB uint8 image
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((size, size, 3), rng.integers(150, 230, 3), np.uint8)
+    
+    cx = size // 2 + int(rng.integers(-10, 10))
+    cy = size // 2 + int(rng.integers(-10, 10))
+    skin = rng.integers((150, 110, 80), (230, 180, 150))
+    fw = int(size * rng.uniform(0.26, 0.32))
+    fh = int(size * rng.uniform(0.36, 0.42))
+    
+    # Hair, neck, face
+    cv2.ellipse(image, (cx, cy - int(fh * 0.25)), (int(fw * 1.1), int(fh * 0.85)), 0, 180, 360, _color(rng.integers(20, 80, 3)), -1)
+    cv2.rectangle(image, (cx - fw // 3, cy + fh // 2), (cx + fw // 3, size), _color(skin * 0.85), -1)
+    cv2.ellipse(image, (cx, cy), (fw, fh), 0, 0, 360, _color(skin), -1)
+    
+    # Eyes (sclera, iris, pupil) and brows
+    eye_y = cy - int(fh * 0.12)
+    eye_dx = int(fw * rng.uniform(0.38, 0.46))
+    for side in (-1, 1):
+        x = cx + side * eye_dx
+        cv2.ellipse(image, (x, eye_y), (int(fw * 0.2), int(fh * 0.06)), 0, 0, 360, (245, 245, 245), -1)
+        cv2.circle(image, (x, eye_y), int(fh * 0.05), _color(rng.integers(30, 90, 3)), -1)
+        cv2.circle(image, (x, eye_y), int(fh * 0.022), (10, 10, 10), -1)
+        cv2.ellipse(image, (x, eye_y - int(fh * 0.12)), (int(fw * 0.24), int(fh * 0.04)), 0, 180, 360, (50, 35, 25), 6)
+    
+    # Nose and mouth
+    nose_y = cy + int(fh * rng.uniform(0.18, 0.25))
+    nose = np.array([[cx, eye_y + 10], [cx - int(fw * 0.12), nose_y], [cx + int(fw * 0.12), nose_y]])
+    cv2.polylines(image, [nose], False, _color(skin * 0.7), 3)
+    cv2.ellipse(image, (cx, nose_y), (int(fw * 0.14), int(fh * 0.04)), 0, 0, 180, _color(skin * 0.6), 3)
+    cv2.ellipse(image, (cx, cy + int(fh * 0.45)), (int(fw * rng.uniform(0.25, 0.35)), int(fh * 0.07)), 0, 0, 180, (150, 50, 60), -1)
+    
+    # Soften edges and add sensor noise so images don't compress identically
+    image = cv2.GaussianBlur(image, (5, 5), 0)
+    noisy = image + rng.normal(0, 4, image.shape)
+    return np.clip(noisy, 0, 255).astype(np.uint8)
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    """Encode an RGB image as JPEG (what the frontend camera uploads)"""
+    ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+def to_data_url(image_bytes: bytes, mime: str = "image/jpeg") -> str:
+    return f"data:{mime};base64,{base64.b64encode(image_bytes).decode()}"
+
+
+def synthetic_corpus(count: int, size: int = 480, seed: int = 0) -> List[bytes]:
+    """JPEG bytes for `count` distinct synthetic faces"""
+    return [encode_jpeg(synthetic_face(seed + i, size)) for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=16)
+    parser.add_argument("--size", type=int, default=480)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+    
+    args.out.mkdir(parents=True, exist_ok=True)
+    for i, image_bytes in enumerate(synthetic_corpus(args.count, args.size, args.seed)):
+        (args.out / f"synthetic_{args.seed + i:04d}.jpg").write_bytes(image_bytes)
+    print(f"Wrote {args.count} faces to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,28 @@
 #!/usr/bin/env python
 """
 Startup script for Railway deployment
-Handles PORT environment variable
+Handles PORT environment variable and production worker settings
 """
 import os
 import uvicorn
 
+from app.core.config import settings
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    print(f"🚀 Starting server on port {port}")
+    workers = max(1, settings.workers)
+    
+    # Recycling only makes sense under the multiprocess supervisor, which
+    # respawns exited workers; a single worker would just stop serving.
+    max_requests = settings.worker_max_requests if workers > 1 else 0
+    
+    print(f"🚀 Starting server on port {port} with {workers} worker(s)")
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=port,
-        log_level="info"
+        log_level="info",
+        workers=workers,
+        limit_max_requests=max_requests or None,
+        limit_max_requests_jitter=settings.worker_max_requests_jitter if max_requests else 0
     )
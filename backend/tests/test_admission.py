@@ -0,0 +1,69 @@
+"""
+Admission control tests
+AdmissionController.gather admits a fanned-out request one call at a time
+"""
+import asyncio
+
+import pytest
+
+from app.services.admission import PRIORITY_ANALYZE, AdmissionController, ServerOverloadedError
+
+
+class Tracker:
+    """Records how many calls run at once"""
+    
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.finished = 0
+    
+    async def call(self, value: int, delay: float = 0.02) -> int:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(delay)
+            self.finished += 1
+            return value
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_gather_holds_one_slot_per_call():
+    admission = AdmissionController("test", slots=2, max_queue=16, max_wait_seconds=5)
+    tracker = Tracker()
+    
+    results = await admission.gather(PRIORITY_ANALYZE, (tracker.call(i) for i in range(6)))
+    
+    assert results == list(range(6))
+    assert tracker.peak == 2
+    assert admission.idle
+
+
+@pytest.mark.asyncio
+async def test_gather_cancels_the_rest_on_failure():
+    admission = AdmissionController("test", slots=1, max_queue=16, max_wait_seconds=5)
+    tracker = Tracker()
+    
+    async def fail() -> None:
+        raise RuntimeError("provider down")
+    
+    with pytest.raises(RuntimeError):
+        await admission.gather(PRIORITY_ANALYZE, [fail(), tracker.call(1), tracker.call(2)])
+    await asyncio.sleep(0.05)
+    
+    assert tracker.finished == 0 and tracker.running == 0
+    assert admission.idle and admission.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_gather_rejected_when_queue_is_full():
+    admission = AdmissionController("test", slots=1, max_queue=1, max_wait_seconds=5)
+    tracker = Tracker()
+    
+    with pytest.raises(ServerOverloadedError):
+        await admission.gather(PRIORITY_ANALYZE, (tracker.call(i) for i in range(4)))
+    await asyncio.sleep(0.05)
+    
+    assert tracker.finished == 0 and tracker.running == 0
+    assert admission.idle and admission.queued == 0
@@ -0,0 +1,150 @@
+"""
+Deferred enrichment tests
+Expiry by completion time, deferral while the LLM stage is busy, deduplication
+and the queue limit
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.models.schemas import EnrichmentStatus, GeometricMeasurements
+from app.services.admission import PRIORITY_ANALYZE, AdmissionController, ServerOverloadedError
+from app.services.enrichment import EnrichmentService
+
+
+class FakeAnalyzer:
+    """Stands in for LLMAnalyzer; counts provider calls"""
+    
+    def __init__(self, latency: float = 0.02):
+        self.latency = latency
+        self.calls = 0
+    
+    async def analyze_async(self, measurements: GeometricMeasurements):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return f"analysis {self.calls}"
+
+
+def make_measurements(canthal_tilt: float) -> GeometricMeasurements:
+    return GeometricMeasurements(
+        canthal_tilt=canthal_tilt,
+        bigonial_bizygomatic_ratio=0.77,
+        midface_ratio=0.435,
+        gonial_angle=127.0,
+        nasofrontal_angle=130.0,
+        facial_thirds=[0.33, 0.33, 0.34],
+        symmetry_score=0.97,
+    )
+
+
+async def hold_slot(admission: AdmissionController, seconds: float):
+    async with admission.admit(PRIORITY_ANALYZE):
+        await asyncio.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_identical_jobs_share_one_call():
+    analyzer = FakeAnalyzer()
+    service = EnrichmentService(analyzer, workers=1, ttl_seconds=60)
+    try:
+        # Submitted before the worker runs: two distinct measurement sets
+        jobs = [await service.submit(make_measurements(tilt)) for tilt in (5.0, 6.0, 5.0, 5.0)]
+        for job in jobs:
+            await service.wait(job.id, timeout=2)
+        
+        assert analyzer.calls == 2
+        assert {job.status for job in jobs} == {EnrichmentStatus.COMPLETED}
+        assert jobs[0].result == jobs[2].result == jobs[3].result != jobs[1].result
+    finally:
+        await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_waits_for_idle_llm_stage():
+    admission = AdmissionController("llm", slots=1)
+    analyzer = FakeAnalyzer()
+    service = EnrichmentService(
+        analyzer, workers=2, ttl_seconds=60, admission=admission, max_defer_seconds=5, poll_seconds=0.01
+    )
+    try:
+        request = asyncio.create_task(hold_slot(admission, 0.3))
+        await asyncio.sleep(0)
+        job = await service.submit(make_measurements(5.0))
+        
+        await asyncio.sleep(0.15)
+        assert analyzer.calls == 0
+        assert job.status == EnrichmentStatus.PENDING
+        
+        await request
+        await service.wait(job.id, timeout=2)
+        assert job.status == EnrichmentStatus.COMPLETED
+        assert analyzer.calls == 1
+    finally:
+        await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_runs_after_max_defer_under_sustained_load():
+    admission = AdmissionController("llm", slots=1, max_wait_seconds=5)
+    analyzer = FakeAnalyzer()
+    service = EnrichmentService(
+        analyzer, workers=1, ttl_seconds=60, admission=admission, max_defer_seconds=0.1, poll_seconds=0.01
+    )
+    try:
+        request = asyncio.create_task(hold_slot(admission, 0.3))
+        await asyncio.sleep(0)
+        job = await service.submit(make_measurements(5.0))
+        
+        await asyncio.sleep(0.2)
+        # Past the deferral: queued for a slot behind the request
+        assert admission.queued == 1
+        
+        await request
+        await service.wait(job.id, timeout=2)
+        assert job.status == EnrichmentStatus.COMPLETED
+    finally:
+        await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_ttl_counts_from_completion():
+    analyzer = FakeAnalyzer(latency=0.3)
+    service = EnrichmentService(analyzer, workers=1, ttl_seconds=0.2)
+    try:
+        slow = await service.submit(make_measurements(5.0))
+        await service.wait(slow.id, timeout=2)
+        
+        # Created more than a TTL ago, but only just finished
+        await service.submit(make_measurements(6.0))
+        assert service.get(slow.id) is slow
+        
+        finished_at = slow.finished_at
+        while time.monotonic() - finished_at <= 0.2:
+            await asyncio.sleep(0.05)
+        await service.submit(make_measurements(7.0))
+        assert service.get(slow.id) is None
+    finally:
+        await service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_rejects_jobs_past_max_queued():
+    analyzer = FakeAnalyzer()
+    service = EnrichmentService(analyzer, workers=1, ttl_seconds=60, max_queued=2)
+    try:
+        # Submitted before the worker runs, so all of them are still queued
+        jobs = [await service.submit(make_measurements(tilt)) for tilt in (5.0, 6.0)]
+        with pytest.raises(ServerOverloadedError) as exc_info:
+            await service.submit(make_measurements(7.0))
+        
+        assert exc_info.value.retry_after >= 1
+        assert service.stats()["queued"] == 2
+        assert service.stats()["rejected"] == 1
+        
+        for job in jobs:
+            await service.wait(job.id, timeout=2)
+        assert service.stats()["queued"] == 0
+        assert (await service.submit(make_measurements(7.0))).status == EnrichmentStatus.PENDING
+    finally:
+        await service.shutdown()
@@ -0,0 +1,117 @@
+"""
+Geometry regression tests
+calculate_batch_measurements must agree with per-face calls and with the
+values of the original scalar implementation
+"""
+import numpy as np
+import pytest
+
+from app.core.constants import LANDMARK_INDICES
+from app.services.geometry_calc import GeometryCalculator
+
+# Measured by the original per-landmark implementation on the faces below
+EXPECTED_FRONT = {
+    "canthal_tilt": -108.26,
+    "bigonial_bizygomatic_ratio": 0.846,
+    "midface_ratio": 0.041,
+    "gonial_angle": 27.3,
+    "nasofrontal_angle": 52.8,
+    "facial_thirds": [0.014, 0.015, 0.971],
+    "symmetry_score": 0.521,
+    "ipd_face_ratio": 1.035,
+}
+EXPECTED_WITH_SIDE = {**EXPECTED_FRONT, "gonial_angle": 120.5, "nasofrontal_angle": 61.1}
+EXPECTED_DEGENERATE = {
+    "canthal_tilt": 0.0,
+    "bigonial_bizygomatic_ratio": 0.77,
+    "midface_ratio": 0.44,
+    "gonial_angle": 90.0,
+    "nasofrontal_angle": 90.0,
+    "facial_thirds": [0.33, 0.34, 0.33],
+    "symmetry_score": 0.9,
+    "ipd_face_ratio": 0.44,
+}
+
+MIRRORED_PAIRS = [
+    ("left_inner_canthus", "right_inner_canthus"),
+    ("left_outer_canthus", "right_outer_canthus"),
+    ("left_gonion", "right_gonion"),
+    ("left_zygion", "right_zygion"),
+    ("left_eyebrow_inner", "right_eyebrow_inner"),
+    ("left_eyebrow_outer", "right_eyebrow_outer"),
+]
+
+
+@pytest.fixture(scope="module")
+def calc() -> GeometryCalculator:
+    return GeometryCalculator()
+
+
+def reference_faces():
+    rng = np.random.default_rng(2024)
+    front = rng.uniform(0.2, 0.8, (478, 3)).round(4)
+    side = rng.uniform(0.2, 0.8, (478, 3)).round(4)
+    side[LANDMARK_INDICES["chin_menton"], :2] = (0.5, 0.9)
+    side[LANDMARK_INDICES["left_gonion"], :2] = (0.45, 0.6)
+    return front, side
+
+
+def random_faces(count: int, seed: int, points: int = 478) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(0, 1, (count, points, 3))
+
+
+def test_matches_original_implementation(calc):
+    front, side = reference_faces()
+    
+    assert calc.calculate_all_measurements(front.tolist()).model_dump() == EXPECTED_FRONT
+    assert calc.calculate_all_measurements(front.tolist(), side.tolist()).model_dump() == EXPECTED_WITH_SIDE
+
+
+def test_degenerate_geometry_uses_defaults(calc):
+    zeros = np.zeros((478, 3))
+    
+    assert calc.calculate_all_measurements(zeros).model_dump() == EXPECTED_DEGENERATE
+    with_side = calc.calculate_all_measurements(zeros, zeros).model_dump()
+    assert with_side == {**EXPECTED_DEGENERATE, "gonial_angle": 128.0}
+
+
+@pytest.mark.parametrize("points", [468, 478])
+def test_batch_matches_single_faces(calc, points):
+    faces = random_faces(64, seed=points, points=points)
+    
+    batch = calc.calculate_batch_measurements(faces)
+    
+    assert [m.model_dump() for m in batch] == [
+        calc.calculate_all_measurements(face.tolist()).model_dump() for face in faces
+    ]
+
+
+def test_batch_with_side_view_matches_single_faces(calc):
+    faces, sides = random_faces(64, seed=1), random_faces(64, seed=2)
+    
+    batch = calc.calculate_batch_measurements(faces, sides)
+    
+    assert [m.model_dump() for m in batch] == [
+        calc.calculate_all_measurements(face, side).model_dump() for face, side in zip(faces, sides)
+    ]
+
+
+def test_degenerate_face_in_batch_does_not_affect_others(calc):
+    faces = random_faces(3, seed=3)
+    faces[1] = 0.0
+    
+    batch = calc.calculate_batch_measurements(faces)
+    
+    assert batch[1].model_dump() == EXPECTED_DEGENERATE
+    assert batch[0].model_dump() == calc.calculate_all_measurements(faces[0]).model_dump()
+    assert batch[2].model_dump() == calc.calculate_all_measurements(faces[2]).model_dump()
+
+
+def test_mirrored_face_is_symmetric(calc):
+    face = random_faces(1, seed=4)[0]
+    face[LANDMARK_INDICES["nose_tip"], 0] = 0.5
+    face[LANDMARK_INDICES["chin_menton"], 0] = 0.5
+    for left, right in MIRRORED_PAIRS:
+        face[LANDMARK_INDICES[right], :2] = (1.0 - face[LANDMARK_INDICES[left], 0], face[LANDMARK_INDICES[left], 1])
+    
+    assert calc.calculate_all_measurements(face).symmetry_score == 1.0
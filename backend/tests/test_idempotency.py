@@ -0,0 +1,161 @@
+"""
+Idempotency tests
+ResultStore claims and IdempotencyService replay, within one worker and across
+workers sharing the SQLite file
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import Response
+
+from app.core.config import settings
+from app.services.result_store import (
+    IdempotencyConflictError,
+    IdempotencyService,
+    ResultStore,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "idempotency.sqlite3")
+
+
+def make_store(db_path, **kwargs) -> ResultStore:
+    return ResultStore(db_path, ttl_seconds=kwargs.pop("ttl_seconds", 60), **kwargs)
+
+
+class Pipeline:
+    """Counts how often the work ran; each call returns a fresh response"""
+    
+    def __init__(self, status_code: int = 200, delay: float = 0.05):
+        self.status_code = status_code
+        self.delay = delay
+        self.calls = 0
+    
+    async def __call__(self) -> Response:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return Response(content=b'{"run": %d}' % self.calls, status_code=self.status_code)
+
+
+def test_claim_is_exclusive_across_connections(db_path):
+    first, second = make_store(db_path), make_store(db_path)
+    
+    assert first.claim("k", "fp") is None
+    pending = second.claim("k", "fp")
+    assert pending is not None and pending.pending
+    
+    first.put("k", "fp", 200, b"{}")
+    stored = second.claim("k", "fp")
+    assert not stored.pending
+    assert (stored.status_code, stored.body) == (200, b"{}")
+
+
+def test_release_drops_only_pending_claims(db_path):
+    store = make_store(db_path)
+    
+    store.claim("failed", "fp")
+    store.release("failed")
+    assert store.get("failed") is None
+    assert store.claim("failed", "fp") is None
+    
+    store.put("done", "fp", 200, b"{}")
+    store.release("done")
+    assert store.get("done").status_code == 200
+
+
+def test_stale_claim_is_taken_over(db_path):
+    crashed = make_store(db_path, claim_timeout_seconds=0.05)
+    crashed.claim("k", "fp")
+    retry = make_store(db_path, claim_timeout_seconds=0.05)
+    
+    assert retry.claim("k", "fp") is not None
+    time.sleep(0.1)
+    assert retry.claim("k", "fp") is None
+
+
+def test_results_expire_after_ttl(db_path):
+    store = make_store(db_path, ttl_seconds=0.05)
+    store.put("k", "fp", 200, b"{}")
+    assert store.get("k") is not None
+    
+    time.sleep(0.1)
+    assert store.get("k") is None
+    assert store.claim("k", "fp") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_on_one_worker_run_once(db_path):
+    service = IdempotencyService(make_store(db_path), poll_seconds=0.01)
+    pipeline = Pipeline()
+    
+    responses = await asyncio.gather(*(service.run("k", "fp", pipeline) for _ in range(5)))
+    
+    assert pipeline.calls == 1
+    assert {bytes(response.body) for response in responses} == {b'{"run": 1}'}
+    assert sum("Idempotent-Replayed" in response.headers for response in responses) == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_on_another_worker_waits_for_the_claim(db_path):
+    workers = [IdempotencyService(make_store(db_path), poll_seconds=0.01) for _ in range(3)]
+    pipeline = Pipeline(delay=0.1)
+    
+    responses = await asyncio.gather(*(worker.run("k", "fp", pipeline) for worker in workers))
+    
+    assert pipeline.calls == 1
+    assert {bytes(response.body) for response in responses} == {b'{"run": 1}'}
+
+
+@pytest.mark.asyncio
+async def test_completed_result_is_replayed(db_path):
+    pipeline = Pipeline()
+    await IdempotencyService(make_store(db_path)).run("k", "fp", pipeline)
+    
+    replayed = await IdempotencyService(make_store(db_path)).run("k", "fp", pipeline)
+    
+    assert pipeline.calls == 1
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert bytes(replayed.body) == b'{"run": 1}'
+
+
+@pytest.mark.asyncio
+async def test_reused_key_with_other_request_conflicts(db_path):
+    service = IdempotencyService(make_store(db_path))
+    await service.run("k", "fp", Pipeline())
+    
+    with pytest.raises(IdempotencyConflictError):
+        await service.run("k", "other", Pipeline())
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_stored(db_path):
+    service = IdempotencyService(make_store(db_path))
+    failing = Pipeline(status_code=503)
+    
+    await service.run("k", "fp", failing)
+    await service.run("k", "fp", failing)
+    assert failing.calls == 2
+    
+    async def crash() -> Response:
+        raise RuntimeError("boom")
+    
+    with pytest.raises(RuntimeError):
+        await service.run("crash", "fp", crash)
+    recovered = await service.run("crash", "fp", Pipeline())
+    assert recovered.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_store_opens_on_first_keyed_request(db_path, monkeypatch):
+    monkeypatch.setattr(settings, "idempotency_db_path", db_path)
+    service = IdempotencyService()
+    assert not os.path.exists(db_path)
+    
+    await service.run("k", "fp", Pipeline())
+    
+    assert os.path.exists(db_path)
+    assert service.store.get("k").status_code == 200
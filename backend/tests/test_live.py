@@ -0,0 +1,76 @@
+"""
+Live mode tests
+Frames take a vision admission slot and are skipped while the stage is busy
+"""
+import asyncio
+
+import orjson
+import pytest
+
+from app.api.live import LiveConnection
+from app.services.admission import PRIORITY_ANALYZE, AdmissionController
+
+
+class FakeWebSocket:
+    """Collects the messages sent to the client"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send_text(self, text: str) -> None:
+        self.sent.append(orjson.loads(text))
+
+
+class FakeSession:
+    """Stands in for LiveSession; records the admission state per frame"""
+    
+    max_frame_side = 640
+    
+    def __init__(self, admission: AdmissionController):
+        self.admission = admission
+        self.frames = 0
+        self.active_during_frame = []
+    
+    def process_frame(self, image_bytes: bytes, timestamp: float):
+        self.frames += 1
+        self.active_during_frame.append(self.admission.stats()["active"])
+        return None
+
+
+async def hold_slot(admission: AdmissionController, seconds: float):
+    async with admission.admit(PRIORITY_ANALYZE):
+        await asyncio.sleep(seconds)
+
+
+async def send_frame(connection: LiveConnection, messages: int) -> dict:
+    connection.mailbox.put(b"frame", 0.0)
+    while len(connection.websocket.sent) < messages:
+        await asyncio.sleep(0.01)
+    return connection.websocket.sent[-1]
+
+
+@pytest.mark.asyncio
+async def test_frames_hold_a_vision_slot_and_skip_when_busy():
+    admission = AdmissionController("vision", slots=1, max_wait_seconds=5)
+    session = FakeSession(admission)
+    connection = LiveConnection(FakeWebSocket(), session, None, admission, None)
+    processor = asyncio.create_task(connection._process_frames())
+    try:
+        processed = await send_frame(connection, 1)
+        assert processed["type"] == "measurements"
+        assert session.active_during_frame == [1]
+        assert admission.idle
+        
+        request = asyncio.create_task(hold_slot(admission, 0.2))
+        await asyncio.sleep(0)
+        skipped = await send_frame(connection, 2)
+        assert skipped == {"type": "skipped", "reason": "server_busy", "dropped": 1}
+        assert session.frames == 1
+        
+        await request
+        resumed = await send_frame(connection, 3)
+        assert resumed["type"] == "measurements" and resumed["dropped"] == 1
+        assert session.frames == 2
+    finally:
+        processor.cancel()
+        await asyncio.gather(processor, return_exceptions=True)
@@ -0,0 +1,68 @@
+"""
+LLM analyzer tests
+Malformed LLM output falls back to the rule engine instead of building an
+invalid AnalysisResult
+"""
+import json
+
+import pytest
+
+from app.models.schemas import GeometricMeasurements
+from app.services.llm_analyzer import LLMAnalyzer
+
+VALID = {
+    "score": 7.5,
+    "tier": "High Tier Normie",
+    "analysis": "Balanced proportions.",
+    "strengths": ["Strong jaw", "Positive canthal tilt"],
+    "weaknesses": ["Long midface"],
+    "advice": "Keep body fat low.",
+    "radar_data": {"eyes": 8, "jaw": 12, "midface": 6, "symmetry": 7.5, "harmony": 0},
+}
+
+
+@pytest.fixture(scope="module")
+def analyzer() -> LLMAnalyzer:
+    return LLMAnalyzer(provider="claude")
+
+
+@pytest.fixture(scope="module")
+def measurements() -> GeometricMeasurements:
+    return GeometricMeasurements(
+        canthal_tilt=5.0,
+        bigonial_bizygomatic_ratio=0.77,
+        midface_ratio=0.435,
+        gonial_angle=127.0,
+        nasofrontal_angle=130.0,
+        facial_thirds=[0.33, 0.33, 0.34],
+        symmetry_score=0.97,
+    )
+
+
+def test_valid_response(analyzer, measurements):
+    result = analyzer._result_from_response(f"```json\n{json.dumps(VALID)}\n```", measurements)
+    
+    assert result.score == 7.5
+    assert result.strengths == ["Strong jaw", "Positive canthal tilt"]
+    assert result.radar_data.jaw == 10.0 and result.radar_data.harmony == 1.0
+    assert result.measurements == measurements
+
+
+@pytest.mark.parametrize("override", [
+    {"strengths": "Strong jaw"},
+    {"weaknesses": [{"text": "Long midface"}]},
+    {"score": None},
+    {"score": "n/a"},
+    {"radar_data": {**VALID["radar_data"], "eyes": None}},
+    {"radar_data": {**VALID["radar_data"], "jaw": "n/a"}},
+    {"radar_data": [8, 7, 6, 7, 8]},
+])
+def test_malformed_fields_fall_back_to_rules(analyzer, measurements, override):
+    result = analyzer._result_from_response(json.dumps({**VALID, **override}), measurements)
+    
+    assert result == analyzer.scoring_engine.analyze(measurements)
+
+
+def test_non_object_response_falls_back_to_rules(analyzer, measurements):
+    assert analyzer._parse_result("[1, 2, 3]", measurements) is None
+    assert analyzer._parse_result("no json here", measurements) is None
@@ -0,0 +1,118 @@
+"""
+Percentile index tests
+Mid-rank lookup, the sample threshold, incremental merges and the index file
+"""
+import numpy as np
+import pytest
+
+from app.models.schemas import GeometricMeasurements
+from app.services.percentiles import PercentileIndex, measurement_columns
+
+
+def build(columns, min_samples: int = 100) -> PercentileIndex:
+    index = PercentileIndex({}).merge(columns)
+    index.min_samples = min_samples
+    return index
+
+
+def brute_force_percentile(values: np.ndarray, value: float) -> float:
+    values = values.astype(np.float32)
+    value = np.float32(value)
+    # Ranks counted in halves: each value below counts 2, each tie 1
+    half_ranks = 2 * int(np.sum(values < value)) + int(np.sum(values == value))
+    return round(50.0 * half_ranks / len(values), 1)
+
+
+def test_mid_rank():
+    index = build({"canthal_tilt": np.arange(100.0)})
+    
+    assert index.percentile("canthal_tilt", 49.5) == 50.0
+    assert index.percentile("canthal_tilt", 10.0) == 10.5
+    assert index.percentile("canthal_tilt", -1.0) == 0.0
+    assert index.percentile("canthal_tilt", 1000.0) == 100.0
+
+
+def test_ties_land_mid_run():
+    index = build({"midface_ratio": np.full(200, 0.44)})
+    
+    assert index.percentile("midface_ratio", 0.44) == 50.0
+
+
+def test_matches_brute_force_on_rounded_values():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(0.77, 0.05, 5000), 3)
+    index = build({"bigonial_bizygomatic_ratio": values})
+    
+    for probe in np.round(rng.normal(0.77, 0.08, 200), 3):
+        assert index.percentile("bigonial_bizygomatic_ratio", probe) == brute_force_percentile(values, probe)
+
+
+def test_min_samples():
+    index = build({"canthal_tilt": np.arange(99.0), "gonial_angle": np.arange(100.0)})
+    
+    assert index.percentile("canthal_tilt", 10.0) is None
+    assert index.percentile("gonial_angle", 10.0) is not None
+    assert index.percentile("symmetry_score", 0.9) is None
+
+
+def test_incremental_merge_equals_full_build():
+    rng = np.random.default_rng(1)
+    first = {"canthal_tilt": rng.normal(4, 3, 1000), "symmetry_score": rng.uniform(0.8, 1, 1000)}
+    second = {"canthal_tilt": rng.normal(5, 3, 700), "gonial_angle": rng.normal(125, 5, 700)}
+    
+    merged = PercentileIndex({}).merge(first, {"path": "a"}).merge(second, {"path": "b"})
+    full = PercentileIndex({}).merge({
+        "canthal_tilt": np.concatenate([first["canthal_tilt"], second["canthal_tilt"]]),
+        "symmetry_score": first["symmetry_score"],
+        "gonial_angle": second["gonial_angle"],
+    })
+    
+    assert merged.columns.keys() == full.columns.keys()
+    for name, values in merged.columns.items():
+        assert np.array_equal(values, full.columns[name])
+        assert np.all(np.diff(values) >= 0)
+    assert [source["path"] for source in merged.sources] == ["a", "b"]
+
+
+def test_merge_drops_non_finite_and_unknown_columns():
+    base = PercentileIndex({})
+    index = base.merge({"canthal_tilt": [1.0, np.nan, np.inf, 2.0], "not_a_measurement": [1.0]})
+    
+    assert index.columns["canthal_tilt"].tolist() == [1.0, 2.0]
+    assert "not_a_measurement" not in index.columns
+    assert base.columns == {}
+
+
+def test_percentiles_by_column():
+    rng = np.random.default_rng(2)
+    index = build({name: rng.uniform(0, 1, 500) for name in measurement_columns() if name != "ipd_face_ratio"})
+    measurements = GeometricMeasurements(
+        canthal_tilt=0.5,
+        bigonial_bizygomatic_ratio=0.5,
+        midface_ratio=0.5,
+        gonial_angle=0.5,
+        nasofrontal_angle=0.5,
+        facial_thirds=[0.2, 0.5, 0.8],
+        symmetry_score=0.5,
+        ipd_face_ratio=0.5,
+    )
+    
+    result = index.percentiles(measurements)
+    
+    assert "ipd_face_ratio" not in result
+    assert set(result) == set(measurement_columns()) - {"ipd_face_ratio"}
+    assert result["facial_thirds_upper"] < result["facial_thirds_middle"] < result["facial_thirds_lower"]
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "percentiles.npz")
+    index = PercentileIndex({}).merge({"canthal_tilt": np.arange(150.0)}, {"path": "a", "rows": 150})
+    index.save(path)
+    
+    loaded = PercentileIndex.load(path)
+    
+    assert np.array_equal(loaded.columns["canthal_tilt"], index.columns["canthal_tilt"])
+    assert loaded.sources == index.sources
+    assert loaded.built_at == pytest.approx(index.built_at)
+    assert loaded.percentile("canthal_tilt", 75.0) == index.percentile("canthal_tilt", 75.0)
+    assert not (tmp_path / "percentiles.npz.tmp").exists()
@@ -0,0 +1,130 @@
+"""
+Rule scoring regression tests
+RuleScoringEngine must score every band exactly like the original if/elif fallback
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from app.core.constants import TIER_DEFINITIONS, get_tier_from_score
+from app.models.schemas import GeometricMeasurements
+from app.services.scoring import FAR_BELOW, IDEAL, NEAR_ABOVE, NEAR_BELOW, RuleScoringEngine
+
+# Values on and around every band edge, per scored field
+EDGE_VALUES = {
+    "canthal_tilt": [-2.0, -0.01, 0.0, 2.0, 3.99, 4.0, 6.0, 8.0, 8.01, 12.0],
+    "bigonial_bizygomatic_ratio": [0.6, 0.699, 0.70, 0.72, 0.75, 0.80, 0.82, 0.85, 0.851, 0.95],
+    "gonial_angle": [110.0, 119.9, 120.0, 125.0, 130.0, 130.1, 135.0, 135.1, 150.0],
+    "midface_ratio": [0.35, 0.399, 0.40, 0.43, 0.435, 0.44, 0.441, 0.47, 0.471, 0.55],
+    "symmetry_score": [0.5, 0.899, 0.90, 0.94, 0.95, 1.0],
+}
+
+
+def reference_scores(m: GeometricMeasurements) -> list:
+    """Per-metric scores of the original LLMAnalyzer._fallback_analysis"""
+    ct, ratio, ga = m.canthal_tilt, m.bigonial_bizygomatic_ratio, m.gonial_angle
+    mf, sym = m.midface_ratio, m.symmetry_score
+    return [
+        9 if 4 <= ct <= 8 else 7 if 0 <= ct < 4 else 5 if ct < 0 else 7,
+        9 if 0.75 <= ratio <= 0.80 else 7 if 0.70 <= ratio < 0.75 or 0.80 < ratio <= 0.85 else 5,
+        9 if 125 <= ga <= 130 else 7 if 120 <= ga < 125 or 130 < ga <= 135 else 5,
+        9 if 0.43 <= mf <= 0.44 else 7 if 0.40 <= mf < 0.43 or 0.44 < mf <= 0.47 else 5,
+        9 if sym >= 0.95 else 7 if sym >= 0.90 else 5,
+    ]
+
+
+def make_measurements(**overrides) -> GeometricMeasurements:
+    values = dict(
+        canthal_tilt=5.0,
+        bigonial_bizygomatic_ratio=0.77,
+        midface_ratio=0.435,
+        gonial_angle=127.0,
+        nasofrontal_angle=130.0,
+        facial_thirds=[0.33, 0.33, 0.34],
+        symmetry_score=0.97,
+    )
+    values.update(overrides)
+    return GeometricMeasurements(**values)
+
+
+@pytest.fixture(scope="module")
+def engine() -> RuleScoringEngine:
+    return RuleScoringEngine()
+
+
+@pytest.mark.parametrize(
+    "field,value",
+    [(field, value) for field, values in EDGE_VALUES.items() for value in values]
+)
+def test_band_edges_match_reference(engine, field, value):
+    measurements = make_measurements(**{field: value})
+    expected = reference_scores(measurements)
+    
+    scored = engine.score_batch(engine.measurement_vector(measurements))
+    
+    assert scored["metric_scores"][0].tolist() == expected
+    assert scored["score"][0] == round(sum(expected) / len(expected), 1)
+
+
+def test_batch_matches_single(engine):
+    rng = np.random.default_rng(0)
+    rows = [
+        make_measurements(**{field: float(rng.choice(values)) for field, values in EDGE_VALUES.items()})
+        for _ in range(200)
+    ]
+    batch = engine.score_batch(np.vstack([engine.measurement_vector(m) for m in rows]))
+    
+    for i, measurements in enumerate(rows):
+        single = engine.score(measurements)
+        assert single["score"] == batch["score"][i]
+        assert single["tier"]["label"] == batch["tier"][i]
+        assert single["radar_data"].jaw == batch["jaw"][i]
+
+
+def test_mapping_input_matches_array(engine):
+    rng = np.random.default_rng(1)
+    columns = {field: rng.choice(values, size=50) for field, values in EDGE_VALUES.items()}
+    array = np.stack([columns[field] for field in engine.fields], axis=1)
+    
+    assert (engine.score_batch(columns)["score"] == engine.score_batch(array)["score"]).all()
+
+
+@pytest.mark.parametrize("score", [round(1.0 + 0.1 * i, 1) for i in range(91)])
+def test_tier_lookup_matches_tier_table(engine, score):
+    tier_index = np.searchsorted(engine._tier_lower, score, side="right") - 1
+    
+    assert engine._tier_keys[tier_index] == get_tier_from_score(score)["key"]
+
+
+def test_bands(engine):
+    values = np.array([[-1.0, 0.72, 125.0, 0.45, 0.99]])
+    
+    assert engine.bands(values).tolist() == [[FAR_BELOW, NEAR_BELOW, IDEAL, NEAR_ABOVE, IDEAL]]
+
+
+def test_analyze_messages(engine):
+    result = engine.analyze(make_measurements(canthal_tilt=-3.0, symmetry_score=0.92))
+    
+    assert "Negative canthal tilt (-3.0°) may appear tired" in result.weaknesses
+    assert "Good facial symmetry (92%)" in result.strengths
+    assert result.tier == TIER_DEFINITIONS[get_tier_from_score(result.score)["key"]]["label"]
+    assert result.radar_data.harmony == result.score
+
+
+def test_all_combinations_match_reference(engine):
+    """Every combination of one value per band and metric"""
+    per_band = {
+        "canthal_tilt": [-1.0, 2.0, 6.0, 9.0],
+        "bigonial_bizygomatic_ratio": [0.6, 0.72, 0.77, 0.83, 0.9],
+        "gonial_angle": [110.0, 122.0, 127.0, 133.0, 140.0],
+        "midface_ratio": [0.35, 0.41, 0.435, 0.46, 0.5],
+        "symmetry_score": [0.8, 0.92, 0.97],
+    }
+    rows = [dict(zip(per_band, combo)) for combo in itertools.product(*per_band.values())]
+    batch = engine.score_batch({field: np.array([row[field] for row in rows]) for field in per_band})
+    
+    for i, row in enumerate(rows):
+        expected = reference_scores(make_measurements(**row))
+        assert batch["metric_scores"][i].tolist() == expected
+        assert batch["tier_key"][i] == get_tier_from_score(round(sum(expected) / len(expected), 1))["key"]
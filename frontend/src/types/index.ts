@@ -27,6 +27,7 @@ export interface AnalysisResult {
     advice: string;
     radar_data: RadarData;
     measurements: GeometricMeasurements;
+    percentiles?: Record<string, number>;
 }
 
 export interface AnalysisResponse {